@@ -5,6 +5,9 @@ Outputs are saved to: analysis/plots/ folder.
 
 Usage:
     python analysis/seaborn_analysis.py
+
+If a market snapshot exists (src/scripts/export_market_snapshot.py), fresh
+coins are read from it instead of MongoDB.
 """
 
 import sys
@@ -407,6 +410,8 @@ def main():
                     'dogecoin', 'polkadot', 'avalanche-2', 'chainlink', 'litecoin']
     
     coins_data = {}
+    if os.path.exists(os.path.join(db.SNAPSHOT_DIR, 'manifest.json')):
+        db.enable_snapshot_read_through()
     
     for coin in target_coins:
         df = load_coin_data(coin)
@@ -0,0 +1,60 @@
+"""
+Benchmark: sıralı eşik indeksi (alerts.AlertIndex) ile her tick'te tüm kuralları
+tarayan yaklaşımın karşılaştırması.
+
+Usage:
+    python scripts/bench_alerts.py --rules 1000000 --ticks 10000
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from alerts import AlertIndex
+
+
+def full_scan(thresholds, is_above, previous, value):
+    """Her tick'te tüm kuralların kontrolü (vektörize tarama, O(n))."""
+    up = is_above & (previous < thresholds) & (thresholds <= value)
+    down = ~is_above & (value <= thresholds) & (thresholds < previous)
+    return np.flatnonzero(up | down)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the sorted-threshold alert index')
+    parser.add_argument('--rules', type=int, default=1_000_000)
+    parser.add_argument('--ticks', type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    thresholds = rng.uniform(40_000, 100_000, args.rules)
+    is_above = rng.random(args.rules) < 0.5
+    prices = 70_000 * np.cumprod(1 + rng.normal(0, 0.001, args.ticks + 1))
+
+    start = time.perf_counter()
+    index = AlertIndex()
+    index.extend(
+        {"rule_id": i, "coin_id": "bitcoin", "metric": "price",
+         "condition": "above" if above else "below", "threshold": float(t)}
+        for i, (t, above) in enumerate(zip(thresholds.tolist(), is_above.tolist()))
+    )
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index_hits = sum(
+        len(index.crossed("bitcoin", "price", prices[i], prices[i + 1])) for i in range(args.ticks)
+    )
+    index_time = time.perf_counter() - start
+
+    scan_ticks = min(args.ticks, 200)
+    start = time.perf_counter()
+    scan_hits = sum(len(full_scan(thresholds, is_above, prices[i], prices[i + 1])) for i in range(scan_ticks))
+    scan_time = (time.perf_counter() - start) / scan_ticks * args.ticks
+
+    print(f'rules             : {args.rules:,}  (index build {build_time:.2f} s)')
+    print(f'ticks             : {args.ticks:,}  hits {index_hits:,}')
+    print(f'index per tick    : {index_time / args.ticks * 1e6:.1f} us')
+    print(f'full scan per tick: {scan_time / args.ticks * 1e6:.1f} us  (estimated from {scan_ticks} ticks, {scan_hits:,} hits)')
+    print(f'speedup           : {scan_time / index_time:.1f}x')
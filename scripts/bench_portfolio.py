@@ -0,0 +1,81 @@
+"""
+Benchmark: vektörize portföy P&L motoru (portfolio.user_totals) ile
+kullanıcı/işlem döngülü eski calculate_exchange_overview karşılaştırması.
+
+Usage:
+    python scripts/bench_portfolio.py --trades 1000000 --users 10000 --repeat 3
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+from portfolio import TradeBook, user_totals, coin_trade_counts
+
+
+def legacy_totals(users, prices):
+    """calculate_exchange_overview'in eski hali; her işlem için Python döngüsü."""
+    performances = []
+    coin_counts = {}
+    for user in users:
+        buy_val = 0
+        curr_val = 0
+        for trade in user['trades']:
+            curr_p = prices.get(trade['coin'], trade['buy_price'])
+            buy_val += trade['buy_price'] * trade['amount']
+            curr_val += curr_p * trade['amount']
+            coin_counts[trade['coin']] = coin_counts.get(trade['coin'], 0) + 1
+        performances.append(((curr_val - buy_val) / (buy_val + 1e-10)) * 100)
+    return performances, coin_counts
+
+
+def vectorized_totals(users, prices):
+    book = TradeBook.from_users(users)
+    return user_totals(book, prices)['pnl_percent'], coin_trade_counts(book)
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized portfolio P&L engine')
+    parser.add_argument('--trades', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--coins', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coin_names = np.array([f'coin-{i}' for i in range(args.coins)], dtype=object)
+    coins = coin_names[rng.integers(0, args.coins, args.trades)]
+    amounts = rng.uniform(0.01, 10, args.trades)
+    buy_prices = rng.uniform(1, 1000, args.trades)
+    owners = np.sort(rng.integers(0, args.users, args.trades))
+    prices = {name: float(p) for name, p in zip(coin_names, rng.uniform(1, 1000, args.coins))}
+
+    bounds = np.searchsorted(owners, np.arange(args.users + 1))
+    users = [
+        {'username': f'user-{u}', 'trades': [
+            {'coin': coins[i], 'amount': float(amounts[i]), 'buy_price': float(buy_prices[i])}
+            for i in range(bounds[u], bounds[u + 1])
+        ]}
+        for u in range(args.users)
+    ]
+
+    legacy_time = timed(lambda: legacy_totals(users, prices), args.repeat)
+    vector_time = timed(lambda: vectorized_totals(users, prices), args.repeat)
+    book = TradeBook.from_arrays(coins, amounts, buy_prices, user_ids=owners, users=list(range(args.users)))
+    columnar_time = timed(lambda: user_totals(book, prices), args.repeat)
+
+    print(f'trades            : {args.trades:,}  users {args.users:,}')
+    print(f'legacy loop       : best {legacy_time * 1000:.1f} ms')
+    print(f'vectorized (docs) : best {vector_time * 1000:.1f} ms  ({legacy_time / vector_time:.2f}x)')
+    print(f'vectorized (cols) : best {columnar_time * 1000:.1f} ms  ({legacy_time / columnar_time:.2f}x)')
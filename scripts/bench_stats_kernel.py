@@ -0,0 +1,61 @@
+"""
+Benchmark: tek geçişli istatistik çekirdeği (stats_kernel.summarize) ile
+eski pandas çağrı zinciri karşılaştırması.
+
+Usage:
+    python scripts/bench_stats_kernel.py --rows 1000000 --repeat 5
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import numpy as np
+import pandas as pd
+from stats_kernel import summarize
+
+
+def legacy_statistics(data):
+    """calculate_descriptive_statistics'in eski hali; her pandas indirgemesi bir veri geçişi."""
+    reductions = [
+        data.mean, data.std, data.min, data.max,
+        data.max, data.min, data.var,
+        lambda: data.quantile(0.25), lambda: data.quantile(0.50), lambda: data.quantile(0.75),
+        lambda: data.quantile(0.75), lambda: data.quantile(0.25),
+        data.skew, data.kurtosis,
+        data.std, data.mean, data.mean,
+    ]
+    for reduction in reductions:
+        reduction()
+    return len(reductions)
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the single-pass statistics kernel')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = pd.Series(30000 * np.cumprod(1 + rng.normal(0, 0.01, size=args.rows)))
+
+    legacy_passes = legacy_statistics(data)
+    legacy_time = timed(lambda: legacy_statistics(data), args.repeat)
+    # Kernel: NaN filtresi + 1 partition + toplam + m2/m3/m4 indirgemeleri
+    kernel_passes = 6
+    kernel_time = timed(lambda: summarize(data), args.repeat)
+
+    print(f'rows              : {args.rows:,}')
+    print(f'legacy passes     : {legacy_passes}  best {legacy_time * 1000:.1f} ms')
+    print(f'kernel passes     : {kernel_passes}  best {kernel_time * 1000:.1f} ms')
+    print(f'speedup           : {legacy_time / kernel_time:.2f}x')
@@ -0,0 +1,314 @@
+"""
+Alerts - Her fiyat güncellemesinde (tick) değerlendirilen alarm kuralları
+
+Kurallar coin ve metrik ('price', 'rsi') bazında iki sıralı eşik dizisinde tutulur:
+  - 'above': değer eşiği aşağıdan yukarı keser (önceki < eşik <= yeni)
+  - 'below': değer eşiği yukarıdan aşağı keser (önceki > eşik >= yeni)
+Yeni değer geldiğinde sadece önceki ve yeni değer arasındaki eşikler bisect ile
+bulunur; kontrol maliyeti kural sayısından bağımsız olarak O(log n + tetiklenen).
+
+Kurallar `alert_rules`, tetiklenen alarmlar `triggered_alerts` koleksiyonunda durur.
+Ingestion süreci bellekteki indeksi artan `seq` alanı ile artımlı olarak senkronize eder;
+silinen kurallar tetiklendiklerinde veritabanında doğrulanarak elenir. `seq` yazımdan önce
+ayrıldığı için eşzamanlı eklemeler sıra dışı görünebilir; senkronizasyon son
+`SYNC_OVERLAP` seq'i yeniden okur ve kuralları rule_id bazında idempotent uygular.
+"""
+import bisect
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+RULES_COLLECTION = "alert_rules"
+TRIGGERED_COLLECTION = "triggered_alerts"
+STATE_COLLECTION = "alert_state"
+SEQ_ID = "rule_seq"
+METRICS = ('price', 'rsi')
+CONDITIONS = ('above', 'below')
+RSI_PERIOD = 14
+SYNC_OVERLAP = int(os.getenv("ALERT_SYNC_OVERLAP", "50"))
+
+
+def rsi_from_window(prices, period=RSI_PERIOD):
+    """calculate_rsi ile aynı (basit ortalamalı) RSI; son `period + 1` fiyattan hesaplanır."""
+    if len(prices) < period + 1:
+        return None
+    window = prices[-(period + 1):]
+    deltas = [b - a for a, b in zip(window, window[1:])]
+    avg_gain = sum(d for d in deltas if d > 0) / period
+    avg_loss = sum(-d for d in deltas if d < 0) / period
+    return 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+
+class ThresholdBook:
+    """Tek yön ('above' veya 'below') için sıralı eşikler ve paralel kural id listesi."""
+
+    __slots__ = ('thresholds', 'rule_ids')
+
+    def __init__(self):
+        self.thresholds = []
+        self.rule_ids = []
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def add(self, threshold, rule_id):
+        i = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.rule_ids.insert(i, rule_id)
+
+    def extend(self, pairs):
+        """Toplu ekleme; tek sıralama ile O(n log n)."""
+        merged = sorted(list(zip(self.thresholds, self.rule_ids)) + list(pairs))
+        self.thresholds = [t for t, _ in merged]
+        self.rule_ids = [r for _, r in merged]
+
+    def remove(self, threshold, rule_id):
+        lo = bisect.bisect_left(self.thresholds, threshold)
+        hi = bisect.bisect_right(self.thresholds, threshold)
+        for i in range(lo, hi):
+            if self.rule_ids[i] == rule_id:
+                del self.thresholds[i]
+                del self.rule_ids[i]
+                return True
+        return False
+
+    def between(self, lo, hi, lo_inclusive, hi_inclusive):
+        start = (bisect.bisect_left if lo_inclusive else bisect.bisect_right)(self.thresholds, lo)
+        end = (bisect.bisect_right if hi_inclusive else bisect.bisect_left)(self.thresholds, hi)
+        return self.rule_ids[start:end]
+
+
+class AlertIndex:
+    """(coin, metrik) başına yukarı/aşağı kesme eşik defterleri."""
+
+    def __init__(self):
+        self.books = {}
+
+    def __len__(self):
+        return sum(len(above) + len(below) for above, below in self.books.values())
+
+    def _books(self, coin_id, metric):
+        books = self.books.get((coin_id, metric))
+        if books is None:
+            books = self.books[(coin_id, metric)] = (ThresholdBook(), ThresholdBook())
+        return books
+
+    def add(self, rule):
+        above, below = self._books(rule["coin_id"], rule["metric"])
+        (above if rule["condition"] == "above" else below).add(rule["threshold"], rule["rule_id"])
+
+    def extend(self, rules):
+        grouped = {}
+        for rule in rules:
+            key = (rule["coin_id"], rule["metric"], rule["condition"])
+            grouped.setdefault(key, []).append((rule["threshold"], rule["rule_id"]))
+        for (coin_id, metric, condition), pairs in grouped.items():
+            above, below = self._books(coin_id, metric)
+            (above if condition == "above" else below).extend(pairs)
+
+    def remove(self, rule):
+        books = self.books.get((rule["coin_id"], rule["metric"]))
+        if books is None:
+            return False
+        above, below = books
+        return (above if rule["condition"] == "above" else below).remove(rule["threshold"], rule["rule_id"])
+
+    def crossed(self, coin_id, metric, previous, value):
+        """previous → value geçişinde kesilen eşiklerin kural id'leri (O(log n + tetiklenen))."""
+        books = self.books.get((coin_id, metric))
+        if books is None or previous is None or value is None or previous == value:
+            return []
+        above, below = books
+        if value > previous:
+            return above.between(previous, value, lo_inclusive=False, hi_inclusive=True)
+        return below.between(value, previous, lo_inclusive=True, hi_inclusive=False)
+
+
+class AlertRuleStore:
+    """Kullanıcı alarm kurallarının ve tetiklenen alarmların kalıcı (MongoDB) tarafı."""
+
+    def __init__(self, database):
+        self.rules_collection = database[RULES_COLLECTION]
+        self.triggered_collection = database[TRIGGERED_COLLECTION]
+        self.state_collection = database[STATE_COLLECTION]
+
+    def add_rule(self, username, coin_id, metric, condition, threshold):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown alert metric. Use one of: {', '.join(METRICS)}")
+        if condition not in CONDITIONS:
+            raise ValueError(f"Unknown alert condition. Use one of: {', '.join(CONDITIONS)}")
+        threshold = float(threshold)
+        if not math.isfinite(threshold):
+            raise ValueError("threshold must be a finite number")
+        if metric == 'rsi' and not 0 <= threshold <= 100:
+            raise ValueError("rsi threshold must be between 0 and 100")
+        seq = self.state_collection.find_one_and_update(
+            {"_id": SEQ_ID}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )["value"]
+        rule = {
+            "rule_id": seq,
+            "seq": seq,
+            "username": username,
+            "coin_id": coin_id,
+            "metric": metric,
+            "condition": condition,
+            "threshold": threshold,
+            "active": True,
+            "created_at": datetime.now(timezone.utc)
+        }
+        self.rules_collection.insert_one(dict(rule))
+        return rule
+
+    def delete_rule(self, username, rule_id):
+        # Silme de yeni bir seq alır; ingestion indeksi bu kaydı görünce kuralı çıkarır
+        seq = self.state_collection.find_one_and_update(
+            {"_id": SEQ_ID}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )["value"]
+        result = self.rules_collection.update_one(
+            {"rule_id": rule_id, "username": username, "active": True}, {"$set": {"active": False, "seq": seq}}
+        )
+        return result.modified_count > 0
+
+    def rules(self, username):
+        return list(self.rules_collection.find({"username": username, "active": True}, {"_id": 0}).sort("rule_id", 1))
+
+    def changes_since(self, seq):
+        return self.rules_collection.find({"seq": {"$gt": seq}}, {"_id": 0}).sort("seq", 1)
+
+    def triggered(self, username, limit=50):
+        cursor = self.triggered_collection.find({"username": username}, {"_id": 0}).sort("triggered_at", -1).limit(limit)
+        return list(cursor)
+
+
+class AlertEngine:
+    """
+    Ingestion tarafı: bellekteki eşik indeksini tutar ve her tick'i değerlendirir.
+    Süreç başına tek örnek (`for_database`) kullanılır; indeks bir kez yüklenir.
+    Ingestion betikleri coinleri iş parçacıklarıyla işlediğinden sync/process kilitle sıralanır.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, database):
+        self.store = AlertRuleStore(database)
+        self.state_collection = database[STATE_COLLECTION]
+        self.index = AlertIndex()
+        self.rules = {}
+        self.last_seq = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_database(cls, database):
+        with cls._instances_lock:
+            engine = cls._instances.get(database.name)
+            if engine is None:
+                return cls._instances.setdefault(database.name, cls(database))
+        with engine._lock:
+            # Her ingestion çağrısı yeni bir istemci açar; koleksiyon referansları yenilenir
+            engine.store = AlertRuleStore(database)
+            engine.state_collection = database[STATE_COLLECTION]
+        return engine
+
+    def sync(self):
+        """
+        Son senkronizasyondan sonra eklenen/silinen kuralları indekse uygular. Geç yazılan
+        düşük seq'ler kaçmasın diye son SYNC_OVERLAP seq yeniden okunur; aynı seq ile zaten
+        uygulanmış kurallar atlanır. Yeni eklenen kural sayısını döndürür.
+        """
+        with self._lock:
+            new_rules = []
+            for rule in self.store.changes_since(max(self.last_seq - SYNC_OVERLAP, 0)):
+                self.last_seq = max(self.last_seq, rule["seq"])
+                known = self.rules.get(rule["rule_id"])
+                if known is not None and known["seq"] == rule["seq"]:
+                    continue
+                if known is not None:
+                    del self.rules[rule["rule_id"]]
+                    self.index.remove(known)
+                if rule.get("active"):
+                    self.rules[rule["rule_id"]] = rule
+                    new_rules.append(rule)
+            if new_rules:
+                self.index.extend(new_rules)
+            return len(new_rules)
+
+    def process(self, coin_id, candles, column="price"):
+        """
+        Mumları zaman sırasıyla tick olarak işler; tetiklenen alarmları yazar ve döndürür.
+        Son (henüz kapanmamış) mum aynı zaman damgasıyla tekrar gelirse pencerenin son
+        elemanı güncellenir, daha eski zaman damgaları atlanır. Coin ilk kez görüldüğünde
+        gelen geçmiş sadece son değerleri tohumlar; geçmişteki kesişimler alarm üretmez.
+        """
+        with self._lock:
+            return self._process(coin_id, candles, column)
+
+    def _process(self, coin_id, candles, column):
+        self.sync()
+        state = self.state_collection.find_one({"_id": f"coin:{coin_id}"})
+        seeding = state is None
+        if seeding:
+            state = {"_id": f"coin:{coin_id}", "last_timestamp": None, "window": [], "price": None, "rsi": None}
+
+        triggered = []
+        for candle in candles:
+            ts = candle.get("timestamp")
+            value = candle.get(column)
+            if ts is None or value is None:
+                continue
+            if state["last_timestamp"] is not None:
+                if ts < state["last_timestamp"] or (ts == state["last_timestamp"] and value == state["price"]):
+                    continue
+                if ts == state["last_timestamp"]:
+                    state["window"][-1] = value
+                else:
+                    state["window"].append(value)
+            else:
+                state["window"].append(value)
+            state["window"] = state["window"][-(RSI_PERIOD + 1):]
+            state["last_timestamp"] = ts
+
+            current = {"price": value, "rsi": rsi_from_window(state["window"])}
+            for metric in METRICS:
+                if not seeding:
+                    for rule_id in self.index.crossed(coin_id, metric, state[metric], current[metric]):
+                        triggered.append((rule_id, metric, ts, current[metric]))
+                state[metric] = current[metric]
+
+        self.state_collection.replace_one({"_id": state["_id"]}, state, upsert=True)
+        return self._record(triggered)
+
+    def _record(self, triggered):
+        if not triggered:
+            return []
+        # Silinmiş ama indekste henüz duran kurallar veritabanında doğrulanarak elenir
+        active = {
+            rule["rule_id"]: rule
+            for rule in self.store.rules_collection.find(
+                {"rule_id": {"$in": list({rule_id for rule_id, _, _, _ in triggered})}, "active": True}, {"_id": 0}
+            )
+        }
+        now = datetime.now(timezone.utc)
+        alerts = [
+            {
+                "rule_id": rule_id,
+                "username": active[rule_id]["username"],
+                "coin_id": active[rule_id]["coin_id"],
+                "metric": metric,
+                "condition": active[rule_id]["condition"],
+                "threshold": active[rule_id]["threshold"],
+                "value": value,
+                "timestamp": ts,
+                "triggered_at": now
+            }
+            for rule_id, metric, ts, value in triggered if rule_id in active
+        ]
+        if alerts:
+            self.store.triggered_collection.insert_many([dict(a) for a in alerts])
+        return alerts
@@ -1,13 +1,40 @@
 """
 Crypto Analysis Engine - Teknik analiz ve risk metrikleri hesaplama modülü
 """
+from functools import partial
+
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+from stats_kernel import summarize, DEFAULT_QUANTILES
+from streaming_detector import RollingMedianMAD
+from chunked_report import ChunkedReportBuilder
+from candle_series import CandleSeries
+import forecasting
+import monte_carlo
+import portfolio
+import scenarios
+import clustering
+import backtest
+import market_anomalies
+
+
+def _as_frame(data, copy=False):
+    """CandleSeries'i DataFrame'e çevirir; DataFrame istenirse kopyalanır."""
+    if isinstance(data, CandleSeries):
+        return data.to_dataframe()
+    return data.copy() if copy else data
+
+
+def _values(data, column='price'):
+    """Sütunu float64 dizi olarak döndürür (CandleSeries için kopyasız)."""
+    if isinstance(data, CandleSeries):
+        return data[column]
+    return data[column].to_numpy(dtype=np.float64)
 
 class CryptoAnalysisEngine:
     """
     Kripto para verileri için teknik analiz ve risk metrikleri hesaplayan ana modül.
+    Rapor, tahmin, risk ve anomali metotları DataFrame yerine CandleSeries de kabul eder.
     """
     
     def calculate_sma(self, df, column='price', periods=[7, 14, 30]):
@@ -166,7 +193,9 @@ class CryptoAnalysisEngine:
         }
     
     def get_full_analysis(self, df, column='price'):
-        """Tüm analizleri birleştirir ve özet tablo döndürür"""
+        """Tüm analizleri birleştirir ve özet tablo döndürür (DataFrame veya CandleSeries)"""
+        if df is not None:
+            df = _as_frame(df)
         if df is None or df.empty or column not in df.columns:
             return {"error": "Invalid or missing dataframe"}
 
@@ -254,22 +283,41 @@ class CryptoAnalysisEngine:
         
         return correlation_matrix.to_dict()
     
-    def detect_anomalies_zscore(self, df, column='price', threshold=3.0):
-        """Z-Score tabanlı anomali tespiti"""
+    def calculate_cluster_map(self, coins, prices, n_clusters=clustering.DEFAULT_CLUSTERS, method='average'):
+        """
+        Zamana hizalı fiyat panelindeki (zaman × coin) tüm coinler için hiyerarşik kümeleme;
+        yeniden dizilmiş korelasyon matrisi ve küme bazında piyasa rejimi özeti döndürür.
+        """
+        return clustering.cluster_map(coins, prices, n_clusters=n_clusters, method=method)
+    
+    def run_backtest(self, df, column='price', strategy='rsi', grid=None, fee=backtest.DEFAULT_FEE,
+                     workers=backtest.DEFAULT_WORKERS, top=None):
+        """
+        Sinyal stratejisini (rsi, sma, bollinger, macd) parametre ızgarası üzerinde geriye dönük
+        test eder; parametre seti başına getiri, Sharpe ve maksimum düşüş (drawdown) döndürür.
+        """
+        return backtest.run(_values(df, column), strategy=strategy, grid=grid, fee=fee, workers=workers, top=top)
+    
+    def detect_anomalies_zscore(self, df, column='price', threshold=3.0, stats=None):
+        """Z-Score tabanlı anomali tespiti (stats: önceden hesaplanmış `summarize` çıktısı)"""
         df = df.copy()
-        mean = df[column].mean()
-        std = df[column].std()
+        if stats is None:
+            stats = summarize(df[column])
+        mean = stats['mean']
+        std = stats['std']
         
         df['zscore'] = (df[column] - mean) / (std + 1e-10)
         df['is_anomaly_zscore'] = abs(df['zscore']) > threshold
         
         return df
     
-    def detect_anomalies_iqr(self, df, column='price', multiplier=1.5):
-        """IQR (Çeyrekler Açıklığı) tabanlı anomali tespiti"""
+    def detect_anomalies_iqr(self, df, column='price', multiplier=1.5, stats=None):
+        """IQR (Çeyrekler Açıklığı) tabanlı anomali tespiti (stats: önceden hesaplanmış `summarize` çıktısı)"""
         df = df.copy()
-        Q1 = df[column].quantile(0.25)
-        Q3 = df[column].quantile(0.75)
+        if stats is None:
+            stats = summarize(df[column])
+        Q1 = stats['quantiles'][0.25]
+        Q3 = stats['quantiles'][0.75]
         IQR = Q3 - Q1
         
         lower_bound = Q1 - multiplier * IQR
@@ -292,6 +340,34 @@ class CryptoAnalysisEngine:
         
         return df
     
+    def detect_anomalies_rolling_mad(self, df, column='price', window=20, threshold=3.5):
+        """
+        Kayan medyan/MAD tabanlı dayanıklı (robust) anomali tespiti.
+        Ingestion'daki akan dedektör ile aynı algoritmayı seri üzerinde çalıştırır.
+        """
+        df = df.copy()
+        detector = RollingMedianMAD(window=window, threshold=threshold)
+        medians, mads, scores, flags = [], [], [], []
+        for value in df[column].tolist():
+            if pd.isna(value):
+                medians.append(np.nan)
+                mads.append(np.nan)
+                scores.append(np.nan)
+                flags.append(False)
+                continue
+            median, mad, score, is_anomaly = detector.update(value)
+            medians.append(np.nan if median is None else median)
+            mads.append(np.nan if mad is None else mad)
+            scores.append(np.nan if score is None else score)
+            flags.append(is_anomaly)
+        
+        df['rolling_median'] = medians
+        df['rolling_mad'] = mads
+        df['robust_zscore'] = scores
+        df['is_anomaly_rolling_mad'] = flags
+        
+        return df
+    
     def detect_price_spikes(self, df, column='price', pct_threshold=0.10):
         """Ani fiyat değişimlerini (Spike) tespit eder"""
         df = df.copy()
@@ -303,13 +379,28 @@ class CryptoAnalysisEngine:
         
         return df
     
-    def get_anomaly_summary(self, df, column='price'):
-        """Tüm anomali tespiti yöntemlerini birleştirir ve özet döndürür"""
-        df = df.copy()
-        df = self.detect_anomalies_zscore(df, column)
-        df = self.detect_anomalies_iqr(df, column)
+    def scan_market_anomalies(self, timestamps, coins, prices, **options):
+        """
+        Zamana hizalı fiyat panelinin (zaman × coin) tamamında z-score, IQR, kayan pencere ve
+        ani değişim dedektörleri; zaman damgası başına anomalili coin sayısı ve piyasa geneli olaylar.
+        """
+        return market_anomalies.scan(timestamps, coins, prices, **options)
+    
+    def get_anomaly_summary(self, df, column='price', stats=None, methods=None):
+        """
+        Tüm anomali tespiti yöntemlerini birleştirir ve özet döndürür.
+        methods: ek yöntemler listesi (ör. ['rolling_mad'])
+        """
+        methods = methods or []
+        df = _as_frame(df, copy=True)
+        if stats is None:
+            stats = summarize(df[column])
+        df = self.detect_anomalies_zscore(df, column, stats=stats)
+        df = self.detect_anomalies_iqr(df, column, stats=stats)
         df = self.detect_anomalies_rolling(df, column)
         df = self.detect_price_spikes(df, column)
+        if 'rolling_mad' in methods:
+            df = self.detect_anomalies_rolling_mad(df, column)
         
         df['is_anomaly_any'] = (
             df['is_anomaly_zscore'] | 
@@ -317,15 +408,19 @@ class CryptoAnalysisEngine:
             df['is_anomaly_rolling'] |
             df['is_spike']
         )
+        if 'rolling_mad' in methods:
+            df['is_anomaly_any'] = df['is_anomaly_any'] | df['is_anomaly_rolling_mad']
         
         total_points = len(df)
         anomaly_counts = {
             'zscore': df['is_anomaly_zscore'].sum(),
             'iqr': df['is_anomaly_iqr'].sum(),
             'rolling': df['is_anomaly_rolling'].sum(),
-            'price_spike': df['is_spike'].sum(),
-            'any_method': df['is_anomaly_any'].sum()
+            'price_spike': df['is_spike'].sum()
         }
+        if 'rolling_mad' in methods:
+            anomaly_counts['rolling_mad'] = df['is_anomaly_rolling_mad'].sum()
+        anomaly_counts['any_method'] = df['is_anomaly_any'].sum()
         
         anomaly_dates = df[df['is_anomaly_any']]['timestamp'].tolist() if 'timestamp' in df.columns else []
         
@@ -335,44 +430,46 @@ class CryptoAnalysisEngine:
             'anomaly_percentage': round((anomaly_counts['any_method'] / total_points) * 100, 2),
             'anomaly_dates': anomaly_dates[-10:],
             'statistics': {
-                'mean': df[column].mean(),
-                'std': df[column].std(),
-                'min': df[column].min(),
-                'max': df[column].max(),
-                'q1': df[column].quantile(0.25),
-                'median': df[column].quantile(0.50),
-                'q3': df[column].quantile(0.75),
-                'iqr': df[column].quantile(0.75) - df[column].quantile(0.25),
-                'skewness': df[column].skew(),
-                'kurtosis': df[column].kurtosis()
+                'mean': stats['mean'],
+                'std': stats['std'],
+                'min': stats['min'],
+                'max': stats['max'],
+                'q1': stats['quantiles'][0.25],
+                'median': stats['quantiles'][0.50],
+                'q3': stats['quantiles'][0.75],
+                'iqr': stats['quantiles'][0.75] - stats['quantiles'][0.25],
+                'skewness': stats['skewness'],
+                'kurtosis': stats['kurtosis']
             },
             'dataframe': df
         }
     
-    def calculate_descriptive_statistics(self, df, column='price'):
-        """Kapsamlı tanımlayıcı istatistikleri (Descriptive Statistics) hesaplar"""
-        data = df[column].dropna()
+    def calculate_descriptive_statistics(self, df, column='price', stats=None):
+        """Kapsamlı tanımlayıcı istatistikleri (Descriptive Statistics) tek geçişli çekirdekle hesaplar"""
+        if stats is None:
+            stats = summarize(_values(df, column))
+        q = stats['quantiles']
         
         return {
-            'count': len(data),
-            'mean': data.mean(),
-            'std': data.std(),
-            'min': data.min(),
-            'max': data.max(),
-            'range': data.max() - data.min(),
-            'variance': data.var(),
-            'q1': data.quantile(0.25),
-            'median': data.quantile(0.50),
-            'q3': data.quantile(0.75),
-            'iqr': data.quantile(0.75) - data.quantile(0.25),
-            'skewness': data.skew(),
-            'kurtosis': data.kurtosis(),
-            'coefficient_of_variation': (data.std() / data.mean()) * 100 if data.mean() != 0 else 0
+            'count': stats['count'],
+            'mean': stats['mean'],
+            'std': stats['std'],
+            'min': stats['min'],
+            'max': stats['max'],
+            'range': stats['max'] - stats['min'],
+            'variance': stats['var'],
+            'q1': q[0.25],
+            'median': q[0.50],
+            'q3': q[0.75],
+            'iqr': q[0.75] - q[0.25],
+            'skewness': stats['skewness'],
+            'kurtosis': stats['kurtosis'],
+            'coefficient_of_variation': (stats['std'] / stats['mean']) * 100 if stats['mean'] != 0 else 0
         }
     
     def calculate_returns_analysis(self, df, column='price'):
         """Getiri analizi - Günlük, haftalık, aylık"""
-        df = df.copy()
+        df = _as_frame(df, copy=True)
         df['daily_return'] = df[column].pct_change()
         df['log_return'] = np.log(df[column] / df[column].shift(1))
         
@@ -393,9 +490,12 @@ class CryptoAnalysisEngine:
             'annualized_volatility': daily_returns.std() * np.sqrt(365) * 100
         }
     
-    def calculate_risk_analysis(self, df, column='price', confidence_level=0.95):
-        """Risk analizi - VaR, CVaR, Maximum Drawdown"""
-        df = df.copy()
+    def calculate_risk_analysis(self, df, column='price', confidence_level=0.95, return_sketch=None):
+        """
+        Risk analizi - VaR, CVaR, Maximum Drawdown
+        return_sketch: verilirse tarihsel VaR, getiri KLL taslağından (yaklaşık) okunur.
+        """
+        df = _as_frame(df, copy=True)
         df['daily_return'] = df[column].pct_change()
         returns = df['daily_return'].dropna()
         
@@ -403,7 +503,10 @@ class CryptoAnalysisEngine:
         std_return = returns.std()
         z_score = 1.645 if confidence_level == 0.95 else 2.326
         var_parametric = mean_return - z_score * std_return
-        var_historic = returns.quantile(1 - confidence_level)
+        if return_sketch is not None:
+            var_historic = return_sketch.quantile(1 - confidence_level)
+        else:
+            var_historic = returns.quantile(1 - confidence_level)
         cvar = returns[returns <= var_historic].mean()
         cumulative = (1 + returns).cumprod()
         rolling_max = cumulative.expanding().max()
@@ -422,16 +525,60 @@ class CryptoAnalysisEngine:
             }
         }
     
-    def generate_scientific_report(self, df, column='price', coin_name='Unknown'):
-        """Kapsamlı bilimsel rapor (Scientific Report) oluşturur"""
-        df = df.copy()
-        descriptive = self.calculate_descriptive_statistics(df, column)
+    def calculate_monte_carlo_risk(self, df, column='price', horizon=1, n_paths=None, method='bootstrap',
+                                   seed=None, confidence_level=0.95, workers=None, fan=False):
+        """
+        Monte Carlo VaR / CVaR - bootstrap veya GBM ile vektörize yol simülasyonu.
+        fan=True ise her gün için yüzdelik fiyat bantları (fan chart) da döner.
+        """
+        return monte_carlo.simulate_risk(
+            _values(df, column),
+            horizon=horizon,
+            n_paths=n_paths or monte_carlo.DEFAULT_PATHS,
+            method=method,
+            seed=seed,
+            confidence_level=confidence_level,
+            workers=workers or monte_carlo.DEFAULT_WORKERS,
+            fan=fan
+        )
+    
+    def generate_scientific_report(self, df, column='price', coin_name='Unknown', sketches=None,
+                                   monte_carlo_options=None):
+        """
+        Kapsamlı bilimsel rapor (Scientific Report) oluşturur.
+        sketches: {'price': KLLSketch, 'return': KLLSketch} verilirse çeyrekler ve
+        tarihsel VaR sıralama yapılmadan taslaklardan yaklaşık olarak hesaplanır.
+        monte_carlo_options: simülasyon seçenekleri sözlüğü verilirse risk analizine Monte Carlo VaR eklenir.
+        """
+        df = _as_frame(df, copy=True)
+        sketches = sketches or {}
+        price_sketch = sketches.get('price')
+        return_sketch = sketches.get('return')
+        if price_sketch is not None:
+            stats = summarize(df[column], quantiles=())
+            stats['quantiles'] = dict(zip(DEFAULT_QUANTILES, price_sketch.quantiles(DEFAULT_QUANTILES)))
+        else:
+            stats = summarize(df[column])
+        descriptive = self.calculate_descriptive_statistics(df, column, stats=stats)
         returns = self.calculate_returns_analysis(df, column)
-        risk = self.calculate_risk_analysis(df, column)
-        anomalies = self.get_anomaly_summary(df, column)
+        risk = self.calculate_risk_analysis(df, column, return_sketch=return_sketch)
+        if monte_carlo_options is not None:
+            risk['monte_carlo'] = self.calculate_monte_carlo_risk(df, column, **monte_carlo_options)
+        anomalies = self.get_anomaly_summary(df, column, stats=stats)
         df_trend = self.detect_trend(df, column)
         trend_counts = df_trend['trend'].value_counts().to_dict()
         
+        approximation = None
+        approx_sketch = price_sketch if price_sketch is not None else return_sketch
+        if approx_sketch is not None:
+            approximation = {
+                'method': 'KLL',
+                'k': approx_sketch.k,
+                'normalized_rank_error': approx_sketch.rank_error(approx_sketch.k),
+                'quantiles_approximate': price_sketch is not None,
+                'var_historic_approximate': return_sketch is not None
+            }
+        
         return {
             'coin': coin_name,
             'analysis_period': {
@@ -454,35 +601,67 @@ class CryptoAnalysisEngine:
             'data_quality': {
                 'missing_values': df[column].isna().sum(),
                 'data_completeness': ((len(df) - df[column].isna().sum()) / len(df)) * 100
-            }
+            },
+            'approximation': approximation
         }
     
+    def generate_scientific_report_chunked(self, chunks, column='price', coin_name='Unknown',
+                                           monte_carlo_options=None):
+        """
+        Bellekten büyük geçmişler için parçalı (chunked) bilimsel rapor.
+        chunks: her çağrıda zaman sırasına göre DataFrame blokları üreten yeni bir iterable
+        döndüren fonksiyon (ör. Mongo imleci açan) ya da tekrar gezilebilir bir blok listesi.
+        Anomali sayımı ilk geçişin sınırlarıyla ikinci bir geçişte yapılır.
+        monte_carlo_options verilirse simülasyon, log getirilerin sabit boyutlu rezervuar
+        örnekleminden (MONTE_CARLO_RETURN_SAMPLE) yapılır. Veri yoksa None döndürür.
+        """
+        if not callable(chunks):
+            if iter(chunks) is chunks:
+                raise TypeError("chunks must be re-iterable or a callable returning a new iterable")
+            chunks = partial(iter, chunks)
+        sample_size = monte_carlo.RETURN_SAMPLE_SIZE if monte_carlo_options is not None else None
+        builder = ChunkedReportBuilder(column=column, return_sample_size=sample_size)
+        for chunk in chunks():
+            builder.add_chunk(chunk)
+        if builder.rows == 0:
+            return None
+        report = builder.build(coin_name=coin_name)
+        counter = builder.anomaly_counter()
+        for chunk in chunks():
+            counter.add_chunk(chunk)
+        report['anomaly_detection'] = counter.summary()
+        if monte_carlo_options is not None:
+            sample = builder.sampled_returns()
+            if len(sample) < 2:
+                raise ValueError("At least two returns are required for simulation")
+            result = monte_carlo.simulate_return_risk(sample, builder.last_price, **monte_carlo_options)
+            result['return_sample_size'] = len(sample)
+            report['risk_analysis']['monte_carlo'] = result
+        return report
+    
     def analyze_user_performance(self, user_data, current_market_prices):
         """
         Kullanıcı portföyünü mevcut piyasa fiyatlarına göre analiz eder.
         current_market_prices: {'bitcoin': 64000, 'ethereum': 3500, ...} şeklinde sözlük bekler.
         """
-        portfolio_report = []
-        total_pnl = 0
+        book = portfolio.TradeBook.from_users([user_data])
+        current, pnl, pnl_percent = portfolio.value_trades(book, current_market_prices)
+        total_pnl = float(pnl.sum())
         
-        for trade in user_data.get('trades', []):
-            coin = trade['coin']
-            buy_price = trade['buy_price']
-            amount = trade['amount']
-            
-            current_price = current_market_prices.get(coin, buy_price)
-            pnl = (current_price - buy_price) * amount
-            pnl_percent = ((current_price - buy_price) / (buy_price + 1e-10)) * 100
-            
-            portfolio_report.append({
-                "coin": coin,
+        portfolio_report = [
+            {
+                "coin": book.coins[code],
                 "amount": amount,
                 "buy_price": buy_price,
-                "current_price": current_price,
-                "pnl": round(pnl, 2),
-                "pnl_percent": round(pnl_percent, 2)
-            })
-            total_pnl += pnl
+                "current_price": price,
+                "pnl": round(trade_pnl, 2),
+                "pnl_percent": round(trade_pnl_percent, 2)
+            }
+            for code, amount, buy_price, price, trade_pnl, trade_pnl_percent in zip(
+                book.coin_codes.tolist(), book.amounts.tolist(), book.buy_prices.tolist(),
+                current.tolist(), pnl.tolist(), pnl_percent.tolist()
+            )
+        ]
             
         return {
             "username": user_data.get('username'),
@@ -492,36 +671,49 @@ class CryptoAnalysisEngine:
             "portfolio_details": portfolio_report
         }
     
+    def calculate_equity_curve(self, user_data, timestamps, coins, prices):
+        """
+        Kullanıcının günlük portföy değeri ve kâr/zararı (equity curve).
+        timestamps/coins/prices: zamana hizalı fiyat paneli (shared_panel.build_price_panel biçimi)
+        """
+        book = portfolio.TradeBook.from_users([user_data], with_times=True)
+        curve = portfolio.equity_curve(book, timestamps, coins, prices)
+        dates = pd.to_datetime(curve['timestamps'], utc=True)
+        
+        return [
+            {
+                "timestamp": date.isoformat(),
+                "value": round(value, 2),
+                "invested": round(invested, 2),
+                "pnl": round(pnl, 2),
+                "pnl_percent": round(pnl_percent, 2)
+            }
+            for date, value, invested, pnl, pnl_percent in zip(
+                dates, curve['value'].tolist(), curve['invested'].tolist(),
+                curve['pnl'].tolist(), curve['pnl_percent'].tolist()
+            )
+        ]
+    
+    def calculate_scenarios(self, users, current_market_prices, mode='uniform', **options):
+        """
+        Kullanıcı(lar)ın portföyü için varsayımsal fiyat şoku (what-if) senaryoları.
+        mode: 'uniform' | 'per_coin' | 'correlated'; seçenekler scenarios.run ile aynıdır.
+        """
+        return scenarios.run(users, current_market_prices, mode=mode, **options)
+    
     def calculate_exchange_overview(self, all_users, current_market_prices):
         """Borsa (Exchange) verilerinin genel bir analizini çıkarır."""
-        total_liquidity = 0
-        user_performances = []
-        coin_counts = {}
-
-        for user in all_users:
-            total_liquidity += user.get('wallet_balance', 0)
-            
-            user_buy_val = 0
-            user_curr_val = 0
-            
-            for trade in user.get('trades', []):
-                coin = trade['coin']
-                amount = trade['amount']
-                buy_p = trade['buy_price']
-                curr_p = current_market_prices.get(coin, buy_p)
-                
-                user_buy_val += buy_p * amount
-                user_curr_val += curr_p * amount
-                coin_counts[coin] = coin_counts.get(coin, 0) + 1
-            
-            pnl_perc = ((user_curr_val - user_buy_val) / (user_buy_val + 1e-10)) * 100
-            user_performances.append({
-                "username": user.get('username'),
-                "pnl_percent": round(pnl_perc, 2)
-            })
-
-        king = max(user_performances, key=lambda x: x['pnl_percent']) if user_performances else None
-        popular = max(coin_counts, key=coin_counts.get) if coin_counts else "N/A"
+        total_liquidity = sum(user.get('wallet_balance', 0) for user in all_users)
+        book = portfolio.TradeBook.from_users(all_users)
+        
+        king = None
+        if all_users:
+            pnl_percent = np.round(portfolio.user_totals(book, current_market_prices)['pnl_percent'], 2)
+            best = int(np.argmax(pnl_percent))
+            king = {"username": book.users[best], "pnl_percent": float(pnl_percent[best])}
+        
+        coin_counts = portfolio.coin_trade_counts(book)
+        popular = book.coins[int(np.argmax(coin_counts))] if len(coin_counts) else "N/A"
 
         return {
             "king": king,
@@ -530,24 +722,22 @@ class CryptoAnalysisEngine:
             "total_investors": len(all_users)
         }
         
-    def predict_future_price(self, df):
-        """Lineer Regresyon (Linear Regression) kullanarak 7 gün sonrası için fiyat tahmini yapar."""
-        from sklearn.linear_model import LinearRegression
-        import numpy as np
+    def fit_forecast_models(self, coin_prices, model='linear'):
+        """
+        Birden çok coin için tahmin modellerini tek vektörize geçişte uydurur.
+        coin_prices: {'bitcoin': fiyat dizisi, ...}
+        """
+        return forecasting.fit_models(coin_prices, model)
+    
+    def predict_future_price(self, df, model='linear', horizon=7, params=None):
+        """
+        Kapalı form Lineer Regresyon (veya Holt / isteğe bağlı Ridge) ile `horizon` gün sonrası
+        için fiyat tahmini ve %95 güven bantları üretir.
+        params: önbellekten gelen uydurulmuş parametreler (verilirse yeniden uydurulmaz)
+        """
+        if params is None:
+            if df.empty or len(df) < 5:
+                return []
+            params = self.fit_forecast_models({'coin': _values(df, 'price')}, model)['coin']
         
-        if df.empty or len(df) < 5:
-            return []
-
-        df = df.copy()
-        df['timestamp_num'] = np.arange(len(df))
-        X = df[['timestamp_num']].values
-        y = df['price'].values
-
-        model = LinearRegression()
-        model.fit(X, y)
-
-        last_idx = len(df)
-        future_steps = np.arange(last_idx, last_idx + 7).reshape(-1, 1)
-        preds = model.predict(future_steps)
-
-        return [{"day": f"+{i+1} Day", "predicted_price": round(float(p), 4)} for i, p in enumerate(preds)]
\ No newline at end of file
+        return forecasting.forecast(params, model, horizon)
\ No newline at end of file
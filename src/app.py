@@ -1,5 +1,8 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from functools import partial, wraps
 import traceback
+import hashlib
+import threading
 from datetime import datetime, timezone, timedelta
 from email.utils import parsedate_to_datetime
 import pandas as pd
@@ -14,7 +17,26 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 from db import database_manager as db
+from db.correlation_store import OnlineCovarianceStore
+from db.data_versions import VersionTracker
 from analysis_engine import CryptoAnalysisEngine
+from streaming_detector import StreamingAnomalyStore
+from quantile_sketch import QuantileSketchStore
+from forecasting import ForecastModelCache, MODEL_TYPES, forecast as build_forecast
+from monte_carlo import METHODS as MONTE_CARLO_METHODS, DEFAULT_PATHS as MONTE_CARLO_DEFAULT_PATHS
+from resampling import RollupStore, base_interval, validate_interval, to_market_records
+from shared_panel import SharedPanelReader, build_price_panel
+from portfolio import EquityCurveCache, trades_fingerprint
+from leaderboard import Leaderboard, MAX_K as LEADERBOARD_MAX_K
+from scenarios import MODES as SCENARIO_MODES
+from alerts import AlertRuleStore
+from similarity import SimilarityIndex, DEFAULT_WINDOW as SIMILARITY_WINDOW
+from clustering import ClusterCache, LINKAGE_METHODS
+from market_anomalies import MarketAnomalyCache
+from screener import ScreenerStore, ScreenerTable, parse_query, INDICATORS as SCREENER_INDICATORS, DEFAULT_LIMIT as SCREENER_LIMIT
+from backtest import STRATEGIES as BACKTEST_STRATEGIES, DEFAULT_GRIDS as BACKTEST_GRIDS, DEFAULT_FEE as BACKTEST_FEE
+from response_cache import ResponseCache
+from json_response import json_response, frame_records
 import time
 
 # Load environment variables from .env file
@@ -45,10 +67,110 @@ limiter = Limiter(
 )
 
 analysis_engine = CryptoAnalysisEngine()
-
-_market_coins_cache = {'data': None, 'timestamp': 0}
+forecast_cache = ForecastModelCache()
+# Yükleyici süreç (src/scripts/publish_price_panel.py) yayınladıysa işçiler paneli paylaşır
+price_panel = SharedPanelReader()
+equity_cache = EquityCurveCache()
+# Pencere uzunluğu başına benzerlik indeksi; sorgu öncesi veri sürümleriyle artımlı yenilenir
+similarity_indexes = {}
+cluster_cache = ClusterCache()
+market_anomaly_cache = MarketAnomalyCache()
+# Ingestion'ın yazdığı gösterge tablosunun bellekteki kopyası; istek başına artımlı senkronize edilir
+screener_table = ScreenerTable()
+# Analiz/anomali/rapor/tahmin yanıtlarının JSON baytları; coin'in veri sürümü değişince geçersizleşir
+response_cache = ResponseCache()
+# Koşullu GET doğrulayıcıları (ETag/Last-Modified) için sürümlerin süreç içi kopyası
+version_tracker = VersionTracker(db.db, max_age=float(os.getenv("VERSION_TRACKER_MAX_AGE", "2")))
+
+_market_coins_cache = {'data': None, 'timestamp': 0, 'etag': None}
+_leaderboard_lock = threading.Lock()
 CACHE_TTL = 300
 
+# Bu satır sayısını aşan geçmişler için rapor parçalı (out-of-core) modda üretilir
+CHUNKED_REPORT_THRESHOLD = int(os.getenv("CHUNKED_REPORT_THRESHOLD", "1000000"))
+REPORT_CHUNK_SIZE = int(os.getenv("REPORT_CHUNK_SIZE", "100000"))
+MONTE_CARLO_MAX_PATHS = int(os.getenv("MONTE_CARLO_MAX_PATHS", "200000"))
+# fan=true tam yol matrisini (paths × horizon) tuttuğu için yol sayısı hücre bütçesiyle sınırlanır
+MONTE_CARLO_FAN_MAX_CELLS = int(os.getenv("MONTE_CARLO_FAN_MAX_CELLS", "2000000"))
+SCENARIO_MAX_COUNT = int(os.getenv("SCENARIO_MAX_COUNT", "100000"))
+BACKTEST_MAX_COMBINATIONS = int(os.getenv("BACKTEST_MAX_COMBINATIONS", "50000"))
+# Analiz için gereken en az satır: ham mumlarda 30 (SMA-30), ?interval= toplamalarında 14 (RSI penceresi);
+# 1w/1M kovaları aylarca geçmiş gerektirdiğinden uzun pencereli göstergeler (SMA-30) null dönebilir
+ANALYSIS_MIN_POINTS = int(os.getenv("ANALYSIS_MIN_POINTS", "30"))
+ANALYSIS_MIN_RESAMPLED_POINTS = int(os.getenv("ANALYSIS_MIN_RESAMPLED_POINTS", "14"))
+
+def cached_response(route):
+    """
+    Coin rotası yanıtını (rota, coin, sorgu parametreleri) anahtarı ve coin'in veri sürümü ile
+    önbelleğe alır. Sadece 200 yanıtları saklanır; hiç sürümü olmayan (ingestion dışı yazılmış)
+    coinler doğrulanamadığı için önbelleğe alınmaz. Sürüm okunamazsa yanıt önbelleksiz üretilir.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(coin_id):
+            try:
+                version = db.get_data_version(coin_id)
+            except Exception as e:
+                logger.warning(f"Data version lookup failed for {coin_id}: {e}")
+                return view(coin_id)
+            key = ResponseCache.key(route, coin_id, request.args.items(multi=True))
+            body = response_cache.get(key, version) if version else None
+            if body is not None:
+                response = Response(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            response = app.make_response(view(coin_id))
+            if version and response.status_code == 200:
+                response_cache.put(key, version, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def _etag(*parts):
+    """Güçlü (strong) ETag: veri sürümü ve sorgu parametrelerinden türetilir."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def _is_not_modified(etag, last_modified):
+    """If-None-Match varsa sadece ona bakılır (RFC 7232); yoksa If-Modified-Since karşılaştırılır."""
+    if request.if_none_match:
+        return request.if_none_match.star_tag or request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+def conditional_response(route):
+    """
+    Coin rotasına coin'in veri sürümünden ETag/Last-Modified ekler. Doğrulayıcı eşleşirse
+    304 döner; sürüm süreç içi izleyiciden okunduğu için Mongo'ya ve motora gidilmez.
+    Sürüm okunamazsa (ör. Mongo erişilemez) rota doğrulayıcısız çalışır ve kendi hatasını döndürür.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(coin_id):
+            try:
+                version, updated_at = version_tracker.get(coin_id)
+            except Exception as e:
+                logger.warning(f"Data version lookup failed for {coin_id}: {e}")
+                return view(coin_id)
+            if not version:
+                return view(coin_id)
+            etag = _etag(route, coin_id, version, sorted(request.args.items(multi=True)))
+            if _is_not_modified(etag, updated_at):
+                return _with_validators(Response(status=304), etag, updated_at)
+            response = app.make_response(view(coin_id))
+            if response.status_code == 200:
+                _with_validators(response, etag, updated_at)
+            return response
+        return wrapper
+    return decorator
+
 # ==========================================
 # AUTHENTICATION & ACCESS CONTROL ENDPOINTS
 # ==========================================
@@ -83,6 +205,10 @@ def register():
         }
 
         db.users_collection.insert_one(new_user)
+        users_version = db.bump_users_version()
+        leaderboard = Leaderboard(db.db)
+        if leaderboard.is_built():
+            leaderboard.upsert_user(new_user, users_version=users_version)
         return jsonify({"message": "User registered successfully"}), 201
     except Exception as e:
         logger.error(f"Registration error: {e}")
@@ -181,52 +307,33 @@ def get_popular_coins():
 def home():
     return "Secure Crypto Analysis API is running! 🚀"
 
+def _resample_market_frame(coin_id, df, interval):
+    """?interval= istenirse mumları saklanan en ince aralıktan OHLCV kovalarına toplar."""
+    base = base_interval(df['timestamp'])
+    validate_interval(interval, base)
+    if interval == base:
+        return df
+    rollups = RollupStore(db.db).get_rollups(coin_id, interval, df)
+    return to_market_records(rollups, coin_id)
+
 @app.route('/api/market/<coin_id>', methods=['GET'])
+@conditional_response('market')
 def get_coin_data(coin_id):
     try:
         df = db.get_market_data(coin_id)
         
         if df.empty:
             return jsonify({"error": "Data not found", "data": []}), 404
+        
+        interval = request.args.get('interval')
+        if interval:
+            try:
+                df = _resample_market_frame(coin_id, df, interval)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
             
-        result = df.to_dict(orient="records")
-
-        sanitized = []
-        for rec in result:
-            out = {}
-            for k, v in rec.items():
-                try:
-                    if pd.isna(v):
-                        out[k] = None
-                        continue
-                except Exception:
-                    pass
-
-                if k == 'timestamp':
-                    if isinstance(v, datetime):
-                        dt = v
-                        if dt.tzinfo is None:
-                            out[k] = dt.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
-                        else:
-                            out[k] = dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
-                        continue
-                    if isinstance(v, str):
-                        try:
-                            dt = parsedate_to_datetime(v)
-                            if dt.tzinfo is None:
-                                out[k] = dt.replace(tzinfo=timezone.utc).isoformat().replace('+00:00', 'Z')
-                            else:
-                                out[k] = dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
-                            continue
-                        except Exception:
-                            out[k] = v
-                            continue
-
-                out[k] = v
-
-            sanitized.append(out)
-
-        return jsonify(sanitized)
+        # Zaman damgası sütunu tek seferde biçimlenir, NaN'lar toplu olarak null olur
+        return json_response(frame_records(df))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -341,14 +448,30 @@ def fetch_market_coins_list():
 def get_market_coins():
     global _market_coins_cache
     try:
-        now = time.time()
-        if _market_coins_cache['data'] is not None and (now - _market_coins_cache['timestamp']) < CACHE_TTL:
-            return jsonify(_market_coins_cache['data'])
+        # Liste sembol kopyası olmayan tüm coinlerin son mumlarından üretilir; ETag onların sürümleridir.
+        # Sürümler okunamazsa doğrulayıcı eklenmez ve önbellek sadece TTL ile geçerli sayılır
+        try:
+            versions = {
+                coin: entry for coin, entry in version_tracker.all().items() if not db.is_symbol_alias(coin)
+            }
+        except Exception as e:
+            logger.warning(f"Data version lookup failed for market coins: {e}")
+            versions = {}
+        etag = _etag('market-coins', sorted((coin, entry['version']) for coin, entry in versions.items())) if versions else None
+        last_modified = max((entry['updated_at'] for entry in versions.values() if entry['updated_at']), default=None)
+        if etag and _is_not_modified(etag, last_modified):
+            return _with_validators(Response(status=304), etag, last_modified)
         
-        coins = fetch_market_coins_list()
-        _market_coins_cache = {'data': coins, 'timestamp': now}
+        now = time.time()
+        cache_valid = (
+            _market_coins_cache['data'] is not None and (now - _market_coins_cache['timestamp']) < CACHE_TTL
+            and (etag is None or _market_coins_cache['etag'] == etag)
+        )
+        if not cache_valid:
+            _market_coins_cache = {'data': fetch_market_coins_list(), 'timestamp': now, 'etag': etag}
         
-        return jsonify(coins)
+        response = jsonify(_market_coins_cache['data'])
+        return _with_validators(response, etag, last_modified) if etag else response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -446,6 +569,8 @@ def get_indexed_series():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/analysis/<coin_id>', methods=['GET'])
+@conditional_response('analysis')
+@cached_response('analysis')
 def get_coin_analysis(coin_id):
     try:
         df = db.get_market_data(coin_id)
@@ -462,58 +587,36 @@ def get_coin_analysis(coin_id):
         df['price'] = pd.to_numeric(df['price'], errors='coerce')
         df = df.dropna(subset=['price'])
         
-        if len(df) < 30:
-            return jsonify({"error": "Insufficient data for analysis", "data_points": len(df)}), 400
+        interval = request.args.get('interval')
+        if interval:
+            try:
+                df = _resample_market_frame(coin_id, df, interval)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        
+        min_points = ANALYSIS_MIN_RESAMPLED_POINTS if interval else ANALYSIS_MIN_POINTS
+        if len(df) < min_points:
+            return jsonify({
+                "error": "Insufficient data for analysis",
+                "data_points": len(df),
+                "min_points": min_points
+            }), 400
         
         analysis = analysis_engine.get_full_analysis(df, column='price')
         
         analysis_df = analysis.pop('dataframe')
         
-        def clean_value(v):
-            if isinstance(v, float) and (np.isnan(v) or np.isinf(v)):
-                return None
-            return v
-        
-        def clean_dict(d):
-            if isinstance(d, dict):
-                return {k: clean_dict(v) for k, v in d.items()}
-            elif isinstance(d, list):
-                return [clean_dict(v) for v in d]
-            else:
-                return clean_value(d)
-        
-        analysis = clean_dict(analysis)
-        
-        recent_df = analysis_df.tail(30).copy()
-        series_data = []
-        for _, row in recent_df.iterrows():
-            ts = row.get('timestamp')
-            if pd.notna(ts):
-                if isinstance(ts, datetime):
-                    ts_str = ts.isoformat()
-                else:
-                    ts_str = str(ts)
-            else:
-                continue
-            
-            series_data.append({
-                'timestamp': ts_str,
-                'price': clean_value(row.get('price')),
-                'sma_7': clean_value(row.get('sma_7')),
-                'sma_30': clean_value(row.get('sma_30')),
-                'rsi': clean_value(row.get('rsi')),
-                'bb_upper': clean_value(row.get('bb_upper')),
-                'bb_middle': clean_value(row.get('bb_middle')),
-                'bb_lower': clean_value(row.get('bb_lower')),
-                'macd': clean_value(row.get('macd')),
-                'macd_signal': clean_value(row.get('macd_signal')),
-                'macd_histogram': clean_value(row.get('macd_histogram'))
-            })
+        recent_df = analysis_df.tail(30)
+        recent_df = recent_df[recent_df['timestamp'].notna()].reindex(columns=[
+            'timestamp', 'price', 'sma_7', 'sma_30', 'rsi', 'bb_upper', 'bb_middle', 'bb_lower',
+            'macd', 'macd_signal', 'macd_histogram'
+        ])
         
-        analysis['series'] = series_data
+        analysis['series'] = frame_records(recent_df, suffix='+00:00')
         analysis['coin_id'] = coin_id
         
-        return jsonify(analysis)
+        # NaN/±inf ve NumPy değerleri serileştiricide null/yerel JSON değerlerine çevrilir
+        return json_response(analysis)
         
     except Exception as e:
         logger.error(f"Error in coin analysis: {e}")
@@ -538,11 +641,8 @@ def get_user_performance(username):
         unique_coins = set(trade['coin'] for trade in user.get('trades', []))
         
         for coin_id in unique_coins:
-            coin_df = db.get_market_data(coin_id)
-            if not coin_df.empty:
-                current_prices[coin_id] = float(coin_df.iloc[-1]['price'])
-            else:
-                current_prices[coin_id] = 0
+            series = db.get_candle_series(coin_id)
+            current_prices[coin_id] = series.last_price if not series.empty else 0
 
         performance_report = analysis_engine.analyze_user_performance(user, current_prices)
 
@@ -552,6 +652,98 @@ def get_user_performance(username):
         logger.error(f"Error in user analysis: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/user-analysis/<username>/equity', methods=['GET'])
+@jwt_required()
+def get_user_equity_curve(username):
+    """Kullanıcının günlük portföy değeri ve kâr/zararı; yeni işlem veya mum gelene kadar önbellekte."""
+    try:
+        current_user = get_jwt_identity()
+        claims = get_jwt()
+        
+        if current_user != username and claims.get("role") != "Admin":
+            return jsonify({"error": "Unauthorized Access"}), 403
+
+        user = db.users_collection.find_one({"username": username}, {"_id": 0, "username": 1, "trades": 1})
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        trades = user.get('trades', [])
+        coins = sorted({trade['coin'] for trade in trades})
+        versions = db.get_data_versions(coins)
+        panel = price_panel.current()
+        use_panel = panel is not None and all(coin in panel for coin in coins)
+        key = (
+            trades_fingerprint(trades),
+            tuple(versions.get(coin, {}).get('version', 0) for coin in coins),
+            panel.version if use_panel else None
+        )
+        
+        curve = equity_cache.get(username, key)
+        if curve is None:
+            if use_panel:
+                timestamps, panel_coins, prices = panel.timestamps, panel.coins, panel.prices
+            else:
+                timestamps, panel_coins, prices = build_price_panel(
+                    {coin: db.get_candle_series(coin) for coin in coins}
+                )
+            curve = analysis_engine.calculate_equity_curve(user, timestamps, panel_coins, prices)
+            equity_cache.put(username, key, curve)
+
+        return jsonify({"username": username, "equity_curve": curve})
+
+    except Exception as e:
+        logger.error(f"Error in equity curve: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/alerts', methods=['GET'])
+@jwt_required()
+def get_alerts():
+    """Kullanıcının aktif alarm kuralları ve son tetiklenen alarmları."""
+    try:
+        store = AlertRuleStore(db.db)
+        username = get_jwt_identity()
+        return jsonify({"rules": store.rules(username), "triggered": store.triggered(username)})
+    except Exception as e:
+        logger.error(f"Error listing alerts: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/alerts', methods=['POST'])
+@jwt_required()
+def create_alert():
+    """Yeni alarm kuralı: {coin_id, metric: price|rsi, condition: above|below, threshold}."""
+    try:
+        data = request.get_json() or {}
+        coin_id = str(data.get('coin_id', '')).strip()
+        if not coin_id or data.get('threshold') is None:
+            return jsonify({"error": "coin_id and threshold are required"}), 400
+        try:
+            rule = AlertRuleStore(db.db).add_rule(
+                get_jwt_identity(), coin_id, data.get('metric', 'price'), data.get('condition', 'above'),
+                float(data['threshold'])
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(rule), 201
+    except Exception as e:
+        logger.error(f"Error creating alert: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/alerts/<int:rule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_alert(rule_id):
+    try:
+        if not AlertRuleStore(db.db).delete_rule(get_jwt_identity(), rule_id):
+            return jsonify({"error": "Alert not found"}), 404
+        return jsonify({"message": "Alert deleted"})
+    except Exception as e:
+        logger.error(f"Error deleting alert: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _correlation_candles(coin_id):
+    """Kovaryans deposunun işlediği biçimde (ham zaman damgası, fiyat) mumlar; açık son mum hariç."""
+    docs = list(db.market_collection.find({"coin_id": coin_id}, {"_id": 0, "timestamp": 1, "price": 1}).sort("timestamp", 1))
+    return docs[:-1]
+
 @app.route('/api/correlation', methods=['GET'])
 def get_correlation():
     try:
@@ -561,6 +753,27 @@ def get_correlation():
         if len(coins) < 2:
             return jsonify({"error": "At least 2 coins required"}), 400
         
+        # Top-N coinler artımlı kovaryans deposundan okunur (geçmiş taranmaz). Eksik çiftler
+        # ilk kullanımda geçmişten tohumlanır; yine de n < 2 kalırsa geçmişten hesaplanır.
+        store = OnlineCovarianceStore(db.db)
+        if store.has_coins(coins) and not store.has_pairs(coins):
+            store.backfill(coins, _correlation_candles)
+        if store.has_pairs(coins):
+            return json_response({
+                "coins": coins,
+                "correlation_matrix": store.get_correlation_matrix(coins)
+            })
+        
+        # Paylaşımlı fiyat paneli tüm coinleri içeriyorsa Mongo'ya gidilmez (zamana hizalı)
+        panel = price_panel.current()
+        if panel is not None and all(coin in panel for coin in coins):
+            coin_dfs = {coin: pd.DataFrame({'price': panel.column(coin, dropna=False)}) for coin in coins}
+            correlation = analysis_engine.calculate_correlation_matrix(coin_dfs)
+            return json_response({
+                "coins": coins,
+                "correlation_matrix": correlation
+            })
+        
         coin_dfs = {}
         for coin in coins:
             df = db.get_market_data(coin)
@@ -578,22 +791,163 @@ def get_correlation():
         
         correlation = analysis_engine.calculate_correlation_matrix(coin_dfs)
         
-        def clean_corr(d):
-            if isinstance(d, dict):
-                return {k: clean_corr(v) for k, v in d.items()}
-            elif isinstance(d, float) and (np.isnan(d) or np.isinf(d)):
-                return None
-            return d
-        
-        return jsonify({
+        return json_response({
             "coins": list(coin_dfs.keys()),
-            "correlation_matrix": clean_corr(correlation)
+            "correlation_matrix": correlation
         })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/clusters', methods=['GET'])
+def get_clusters():
+    """
+    market_data'daki tüm coinler için hiyerarşik kümeleme ve yeniden dizilmiş korelasyon matrisi.
+    ?days= (geriye bakış), ?clusters=, ?method=average|complete|single|ward
+    Sonuç, evrendeki coinlerin veri sürümleri değişene kadar önbellekten döner.
+    """
+    try:
+        try:
+            days = int(request.args.get('days', 180))
+            n_clusters = int(request.args.get('clusters', 8))
+        except ValueError:
+            return jsonify({"error": "days and clusters must be integers"}), 400
+        method = request.args.get('method', 'average')
+        if method not in LINKAGE_METHODS:
+            return jsonify({"error": f"Unknown linkage method. Use one of: {', '.join(LINKAGE_METHODS)}"}), 400
+        if not 30 <= days <= 3650 or not 1 <= n_clusters <= 100:
+            return jsonify({"error": "days must be between 30 and 3650, clusters between 1 and 100"}), 400
+
+        coins = db.get_market_coin_ids(frontend_only=True)
+        versions_key = _versions_key(coins)
+        params = (days, n_clusters, method)
+        result = cluster_cache.get(params, versions_key)
+        if result is None:
+            _, panel_coins, prices = _universe_panel(coins, days)
+            try:
+                result = analysis_engine.calculate_cluster_map(panel_coins, prices, n_clusters=n_clusters, method=method)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            result["days"] = days
+            result["method"] = method
+            cluster_cache.put(params, versions_key, result)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in clustering: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/screener', methods=['GET'])
+def get_screener():
+    """
+    Coin evrenini son göstergelere göre filtreler ve sıralar; ham mumlar okunmaz.
+    ?q=rsi<30 and volatility_30d>50 order by sharpe_ratio [asc|desc] [limit N], ?limit=
+    """
+    try:
+        query = request.args.get('q', '')
+        try:
+            conditions, order_by, descending, limit = parse_query(query)
+            if 'limit' in request.args:
+                limit = int(request.args['limit'])
+            limit = limit or SCREENER_LIMIT
+            if not 1 <= limit <= 1000:
+                raise ValueError("limit must be between 1 and 1000")
+        except ValueError as e:
+            return jsonify({"error": str(e), "fields": list(SCREENER_INDICATORS)}), 400
+
+        store = ScreenerStore(db.db)
+        screener_table.sync(store)
+        if not len(screener_table) and store.is_empty():
+            # Ingestion henüz çalışmadıysa tablo bir kez mevcut mumlardan doldurulur
+            store.backfill(db.get_market_coin_ids(frontend_only=True), db.get_candle_series)
+            screener_table.sync(store)
+
+        matched, results = screener_table.query(conditions, order_by, descending, limit)
+        return jsonify({
+            "query": query,
+            "universe": len(screener_table),
+            "matched": matched,
+            "results": results
+        })
+    except Exception as e:
+        logger.error(f"Error in screener: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/backtest/<coin_id>', methods=['GET'])
+def get_backtest(coin_id):
+    """
+    Sinyal stratejisinin parametre taraması: ?strategy=rsi|sma|bollinger|macd, ?fee=, ?top=
+    Izgara listeleri: rsi → period, lower, upper; sma → short, long;
+    bollinger → period, std_dev; macd → fast, slow
+    """
+    try:
+        strategy = request.args.get('strategy', 'rsi')
+        if strategy not in BACKTEST_STRATEGIES:
+            return jsonify({"error": f"Unknown strategy. Use one of: {', '.join(BACKTEST_STRATEGIES)}"}), 400
+        try:
+            grid = _backtest_grid(strategy, request.args)
+            fee = float(request.args.get('fee', BACKTEST_FEE))
+            top = int(request.args.get('top', 10))
+            if not 0 <= fee < 0.1:
+                raise ValueError("fee must be between 0 and 0.1")
+            if not 1 <= top <= 1000:
+                raise ValueError("top must be between 1 and 1000")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        series = db.get_candle_series(coin_id)
+        if series.empty:
+            return jsonify({"error": "Data not found"}), 404
+        try:
+            result = analysis_engine.run_backtest(series, 'price', strategy=strategy, grid=grid, fee=fee, top=top)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result["coin"] = coin_id
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in backtest: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/anomalies/market', methods=['GET'])
+def get_market_anomalies():
+    """
+    Tüm coin evreninde tek geçişli anomali taraması; gün başına anomalili coin sayısı ve
+    piyasa geneli olaylar. ?days= (geriye bakış), ?share= (olay eşiği, 0-1), ?min_coins=
+    Sonuç, evrendeki coinlerin veri sürümleri değişene kadar önbellekten döner.
+    """
+    try:
+        try:
+            days = int(request.args.get('days', 90))
+            share = float(request.args.get('share', 0.3))
+            min_coins = int(request.args.get('min_coins', 3))
+        except ValueError:
+            return jsonify({"error": "days and min_coins must be integers, share a number"}), 400
+        if not 20 <= days <= 3650:
+            return jsonify({"error": "days must be between 20 and 3650"}), 400
+        if not 0 < share <= 1 or min_coins < 1:
+            return jsonify({"error": "share must be in (0, 1] and min_coins at least 1"}), 400
+        # Serbest ondalıklar ayrı önbellek girdisi açmasın diye eşik binde bire yuvarlanır
+        share = max(round(share, 3), 0.001)
+
+        coins = db.get_market_coin_ids(frontend_only=True)
+        versions_key = _versions_key(coins)
+        params = (days, share, min_coins)
+        result = market_anomaly_cache.get(params, versions_key)
+        if result is None:
+            timestamps, panel_coins, prices = _universe_panel(coins, days)
+            if not len(panel_coins):
+                return jsonify({"error": "Data not found"}), 404
+            result = analysis_engine.scan_market_anomalies(
+                timestamps, panel_coins, prices, event_share=share, min_coins=min_coins
+            )
+            result["days"] = days
+            market_anomaly_cache.put(params, versions_key, result)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in market anomaly scan: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/anomalies/<coin_id>', methods=['GET'])
+@cached_response('anomalies')
 def get_coin_anomalies(coin_id):
     try:
         df = db.get_market_data(coin_id)
@@ -613,136 +967,435 @@ def get_coin_anomalies(coin_id):
         if len(df) < 10:
             return jsonify({"error": "Insufficient data for anomaly detection"}), 400
         
-        anomaly_result = analysis_engine.get_anomaly_summary(df, column='price')
+        methods = [m.strip() for m in request.args.get('methods', '').split(',') if m.strip()]
+        anomaly_result = analysis_engine.get_anomaly_summary(df, column='price', methods=methods)
         anomaly_df = anomaly_result.pop('dataframe')
         
-        def clean_value(v):
-            if isinstance(v, (float, np.floating)) and (np.isnan(v) or np.isinf(v)):
-                return None
-            if isinstance(v, (np.int64, np.int32)):
-                return int(v)
-            if isinstance(v, (np.float64, np.float32)):
-                return float(v)
-            return v
-        
-        def clean_dict(d):
-            if isinstance(d, dict):
-                return {k: clean_dict(v) for k, v in d.items()}
-            elif isinstance(d, list):
-                return [clean_dict(v) for v in d]
-            else:
-                return clean_value(d)
+        recent_df = anomaly_df.tail(30)
+        recent_df = recent_df[recent_df['timestamp'].notna()]
+        columns = ['timestamp', 'price', 'zscore', 'rolling_zscore', 'pct_change']
+        if 'rolling_mad' in methods:
+            columns.append('robust_zscore')
+        series_df = recent_df.reindex(columns=columns)
+        for flag, source in (('is_anomaly', 'is_anomaly_any'), ('is_spike', 'is_spike')):
+            series_df[flag] = recent_df[source].fillna(False).astype(bool) if source in recent_df else False
         
-        anomaly_result = clean_dict(anomaly_result)
-        
-        recent_df = anomaly_df.tail(30).copy()
-        series_data = []
-        for _, row in recent_df.iterrows():
-            ts = row.get('timestamp')
-            if pd.notna(ts):
-                ts_str = ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
-            else:
-                continue
-            
-            series_data.append({
-                'timestamp': ts_str,
-                'price': clean_value(row.get('price')),
-                'zscore': clean_value(row.get('zscore')),
-                'rolling_zscore': clean_value(row.get('rolling_zscore')),
-                'pct_change': clean_value(row.get('pct_change')),
-                'is_anomaly': bool(row.get('is_anomaly_any', False)),
-                'is_spike': bool(row.get('is_spike', False))
-            })
+        if 'rolling_mad' in methods:
+            anomaly_result['streaming_anomalies'] = StreamingAnomalyStore(db.db).recent_anomalies(coin_id)
         
-        anomaly_result['series'] = series_data
+        anomaly_result['series'] = frame_records(series_df, suffix='+00:00')
         anomaly_result['coin_id'] = coin_id
         
-        return jsonify(anomaly_result)
+        return json_response(anomaly_result)
         
     except Exception as e:
         logger.error(f"Error in anomaly detection: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _forecast_params(args):
+    model = args.get('model', 'linear')
+    horizon = int(args.get('horizon', 7))
+    if model not in MODEL_TYPES:
+        raise ValueError(f"Unknown model type. Use one of: {', '.join(MODEL_TYPES)}")
+    if not 1 <= horizon <= 90:
+        raise ValueError("horizon must be between 1 and 90")
+    return model, horizon
+
+def _monte_carlo_params(args, max_paths=MONTE_CARLO_MAX_PATHS):
+    """?paths=, ?method=bootstrap|gbm, ?seed= sorgu parametrelerini doğrular."""
+    method = args.get('method', 'bootstrap')
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Unknown simulation method. Use one of: {', '.join(MONTE_CARLO_METHODS)}")
+    options = {'method': method}
+    if 'paths' in args:
+        options['n_paths'] = int(args['paths'])
+        if not 100 <= options['n_paths'] <= max_paths:
+            raise ValueError(f"paths must be between 100 and {max_paths}")
+    elif MONTE_CARLO_DEFAULT_PATHS > max_paths:
+        options['n_paths'] = max_paths
+    if 'seed' in args:
+        options['seed'] = int(args['seed'])
+    return options
+
 @app.route('/api/forecast/<coin_id>', methods=['GET'])
+@cached_response('forecast')
 def get_coin_forecast(coin_id):
     try:
-        df = db.get_market_data(coin_id)
-        if df.empty:
-            return jsonify({"error": "Data not found"}), 404
+        try:
+            model, horizon = _forecast_params(request.args)
+            fan = request.args.get('fan', 'false').lower() == 'true'
+            fan_max_paths = max(100, min(MONTE_CARLO_MAX_PATHS, MONTE_CARLO_FAN_MAX_CELLS // horizon))
+            mc_options = _monte_carlo_params(request.args, max_paths=fan_max_paths) if fan else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        forecast = analysis_engine.predict_future_price(df)
-        return jsonify({
+        # Parametreler coin + veri sürümü ile önbellekte; isabette (fan istenmedikçe) market_data okunmaz
+        version = db.get_data_version(coin_id)
+        params = forecast_cache.get(coin_id, model, version)
+        series = None
+        if params is None:
+            series = db.get_candle_series(coin_id)
+            if series.empty:
+                return jsonify({"error": "Data not found"}), 404
+            if len(series) < 5:
+                return jsonify({"coin": coin_id, "current_price": series.last_price, "forecast": []})
+            
+            params = analysis_engine.fit_forecast_models({coin_id: series.price}, model)[coin_id]
+            forecast_cache.put(coin_id, model, version, params)
+        
+        response = {
             "coin": coin_id,
-            "current_price": float(df.iloc[-1]['price']),
-            "forecast": forecast
+            "model": model,
+            "current_price": params['last_price'],
+            "forecast": build_forecast(params, model, horizon)
+        }
+        if fan:
+            # fan=true: Monte Carlo yol simülasyonundan yüzdelik bantlar ve ufuk VaR/CVaR
+            if series is None:
+                series = db.get_candle_series(coin_id)
+            response["monte_carlo"] = analysis_engine.calculate_monte_carlo_risk(
+                series, 'price', horizon=horizon, fan=True, **mc_options
+            )
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/forecast', methods=['GET'])
+def get_batch_forecast():
+    """Birden çok coin için tahmin; önbellekte olmayanlar tek panelde birlikte uydurulur."""
+    try:
+        coins = [c.strip() for c in request.args.get('coins', '').split(',') if c.strip()]
+        if not coins:
+            return jsonify({"error": "Missing 'coins' query parameter"}), 400
+        try:
+            model, horizon = _forecast_params(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        versions = db.get_data_versions(coins)
+        params_by_coin = {}
+        to_fit = {}
+        for coin in coins:
+            version = versions.get(coin, {}).get('version', 0)
+            params = forecast_cache.get(coin, model, version)
+            if params is not None:
+                params_by_coin[coin] = params
+                continue
+            series = db.get_candle_series(coin)
+            if len(series) >= 5:
+                to_fit[coin] = series.price
+        
+        if to_fit:
+            fitted = analysis_engine.fit_forecast_models(to_fit, model)
+            for coin, params in fitted.items():
+                forecast_cache.put(coin, model, versions.get(coin, {}).get('version', 0), params)
+                params_by_coin[coin] = params
+        
+        return jsonify({
+            "model": model,
+            "forecasts": {
+                coin: {
+                    "current_price": params['last_price'],
+                    "forecast": build_forecast(params, model, horizon)
+                }
+                for coin, params in params_by_coin.items()
+            }
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _leaderboard():
+    """
+    Artımlı sıralama; kurulmamışsa veya yansıttığı kullanıcı sürümü güncel değilse kullanıcılar
+    taranarak yeniden kurulur. Eşzamanlı istekler kilit altında tek bir yeniden kurulum yapar.
+    """
+    leaderboard = Leaderboard(db.db)
+    users_version = db.get_users_version()
+    if leaderboard.users_version() == users_version:
+        return leaderboard
+    with _leaderboard_lock:
+        users_version = db.get_users_version()
+        if leaderboard.users_version() != users_version:
+            users = list(db.users_collection.find({}, {"_id": 0, "username": 1, "wallet_balance": 1, "trades": 1}))
+            unique_coins = {t['coin'] for u in users for t in u.get('trades', [])}
+            current_prices = {}
+            for c in unique_coins:
+                series = db.get_candle_series(c)
+                if not series.empty:
+                    current_prices[c] = series.last_price
+            leaderboard.rebuild(users, current_prices, users_version=users_version)
+    return leaderboard
+
 @app.route('/api/exchange-overview', methods=['GET'])
 def get_exchange_overview():
     try:
-        users = list(db.users_collection.find({}, {"_id": 0}))
-        unique_coins = {t['coin'] for u in users for t in u.get('trades', [])}
+        return jsonify(_leaderboard().overview())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _scenario_params(args):
+    """?mode=, ?min=, ?max=, ?steps=, ?n=, ?horizon=, ?seed= sorgu parametrelerini doğrular."""
+    mode = args.get('mode', 'uniform')
+    if mode not in SCENARIO_MODES:
+        raise ValueError(f"Unknown scenario mode. Use one of: {', '.join(SCENARIO_MODES)}")
+    options = {
+        'mode': mode,
+        'low': float(args.get('min', -0.5)),
+        'high': float(args.get('max', 0.5)),
+        'steps': int(args.get('steps', 21)),
+        'n_scenarios': int(args.get('n', 1000)),
+        'horizon': int(args.get('horizon', 1)),
+        'max_scenarios': SCENARIO_MAX_COUNT
+    }
+    if not -1 <= options['low'] <= options['high']:
+        raise ValueError("min must be >= -1 and <= max")
+    if not 2 <= options['steps'] <= 1001:
+        raise ValueError("steps must be between 2 and 1001")
+    if not 1 <= options['n_scenarios'] <= SCENARIO_MAX_COUNT:
+        raise ValueError(f"n must be between 1 and {SCENARIO_MAX_COUNT}")
+    if not 1 <= options['horizon'] <= 365:
+        raise ValueError("horizon must be between 1 and 365")
+    if 'seed' in args:
+        options['seed'] = int(args['seed'])
+    return options
+
+def _backtest_grid(strategy, args):
+    """Strateji parametrelerini virgülle ayrılmış listelerden okur (örn. ?period=7,14&lower=25,30)."""
+    grid = {}
+    for name, default in BACKTEST_GRIDS[strategy].items():
+        if name not in args:
+            continue
+        cast = int if isinstance(default[0], int) else float
+        values = [cast(v) for v in args[name].split(',') if v.strip()]
+        if not values or len(values) > 200:
+            raise ValueError(f"{name} must list between 1 and 200 values")
+        grid[name] = sorted(set(values))
+    merged = dict(BACKTEST_GRIDS[strategy], **grid)
+    for name in ('period', 'short', 'long', 'fast', 'slow'):
+        if name in merged and min(merged[name]) < 2:
+            raise ValueError(f"{name} values must be at least 2")
+    for name in ('lower', 'upper'):
+        if name in merged and not all(0 <= v <= 100 for v in merged[name]):
+            raise ValueError(f"{name} values must be between 0 and 100")
+    if 'std_dev' in merged and min(merged['std_dev']) <= 0:
+        raise ValueError("std_dev values must be positive")
+    combinations = int(np.prod([len(v) for v in merged.values()]))
+    if combinations > BACKTEST_MAX_COMBINATIONS:
+        raise ValueError(f"Grid has {combinations} combinations, limit is {BACKTEST_MAX_COMBINATIONS}")
+    return grid
+
+def _versions_key(coins):
+    """Coin evreninin veri sürümlerinden önbellek anahtarı."""
+    versions = db.get_data_versions(coins)
+    return tuple((coin, versions.get(coin, {}).get('version', 0)) for coin in coins)
+
+def _universe_panel(coins, days=None):
+    """
+    Coinlerin zamana hizalı fiyat paneli (timestamps, coins, T × C); paylaşımlı panel
+    tüm coinleri içeriyorsa oradan alınır. days verilirse son `days` güne kırpılır.
+    """
+    panel = price_panel.current()
+    if panel is not None and all(coin in panel for coin in coins):
+        timestamps, panel_coins = panel.timestamps, coins
+        prices = panel.prices[:, [panel.coin_index[coin] for coin in coins]]
+    else:
+        timestamps, panel_coins, prices = build_price_panel({coin: db.get_candle_series(coin) for coin in coins})
+    if days is not None and len(timestamps):
+        rows = timestamps >= timestamps[-1] - days * 86_400 * 10**9
+        timestamps, prices = timestamps[rows], prices[rows]
+    return timestamps, panel_coins, prices
+
+def _log_return_panel(coins):
+    """Coinlerin zamana hizalı log getiri matrisi (T × K); paylaşımlı panel varsa oradan."""
+    panel = price_panel.current()
+    if panel is not None and all(coin in panel for coin in coins):
+        prices = np.column_stack([panel.column(coin, dropna=False) for coin in coins])
+    else:
+        _, panel_coins, panel_prices = build_price_panel({coin: db.get_candle_series(coin) for coin in coins})
+        prices = np.full((len(panel_prices), len(coins)), np.nan)
+        for j, coin in enumerate(panel_coins):
+            prices[:, coins.index(coin)] = panel_prices[:, j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(prices), axis=0)
+
+@app.route('/api/scenarios', methods=['GET'])
+@jwt_required(optional=True)
+def get_scenarios():
+    """
+    Kullanıcının (?username=) veya tüm borsanın P&L'i için varsayımsal fiyat şoku senaryoları.
+    Kullanıcı portföyü sadece kendisi veya Admin tarafından görülebilir.
+    """
+    try:
+        try:
+            options = _scenario_params(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        projection = {"_id": 0, "username": 1, "trades": 1}
+        username = request.args.get('username')
+        if username:
+            current_user = get_jwt_identity()
+            if current_user is None:
+                return jsonify({"error": "Authentication required"}), 401
+            if current_user != username and get_jwt().get("role") != "Admin":
+                return jsonify({"error": "Unauthorized Access"}), 403
+            user = db.users_collection.find_one({"username": username}, projection)
+            if not user:
+                return jsonify({"error": "User not found"}), 404
+            users = [user]
+        else:
+            users = list(db.users_collection.find({}, projection))
+
         current_prices = {}
-        for c in unique_coins:
-            df = db.get_market_data(c)
-            if not df.empty:
-                current_prices[c] = float(df.iloc[-1]['price'])
-        
-        overview = analysis_engine.calculate_exchange_overview(users, current_prices)
-        return jsonify(overview)
+        for coin_id in {t['coin'] for u in users for t in u.get('trades', [])}:
+            series = db.get_candle_series(coin_id)
+            if not series.empty:
+                current_prices[coin_id] = series.last_price
+
+        try:
+            result = analysis_engine.calculate_scenarios(
+                users, current_prices, returns_by_coin=_log_return_panel, **options
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result["scope"] = username or "exchange"
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in scenario analysis: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/similar/<coin_id>', methods=['GET'])
+def get_similar_coins(coin_id):
+    """Son `window` günde coin ile en benzer hareket eden k coin (getiri korelasyonu)."""
+    try:
+        try:
+            window = int(request.args.get('window', SIMILARITY_WINDOW))
+            k = int(request.args.get('k', 5))
+        except ValueError:
+            return jsonify({"error": "window and k must be integers"}), 400
+        if not 5 <= window <= 365:
+            return jsonify({"error": "window must be between 5 and 365"}), 400
+        if not 1 <= k <= 50:
+            return jsonify({"error": "k must be between 1 and 50"}), 400
+        lsh = request.args.get('lsh', 'auto').lower()
+        use_lsh = None if lsh == 'auto' else lsh == 'true'
+
+        index = similarity_indexes.get(window)
+        if index is None:
+            # setdefault atomiktir: eşzamanlı iki istek aynı indeksi paylaşır
+            index = similarity_indexes.setdefault(window, SimilarityIndex(window))
+        # Sembol kopyaları (BTCUSDT) frontend id'leri ile aynı mumları taşır; evrenden çıkarılır
+        versions = {c: v['version'] for c, v in db.get_data_versions().items() if not db.is_symbol_alias(c)}
+        index.refresh(versions, db.get_candle_series)
+
+        if coin_id not in index:
+            return jsonify({"error": "Not enough data for similarity search"}), 404
+        return jsonify({
+            "coin": coin_id,
+            "window": window,
+            "similar": [
+                {"coin": coin, "correlation": round(score, 4)}
+                for coin, score in index.query(coin_id, k, use_lsh=use_lsh)
+            ]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cache/metrics', methods=['GET'])
+def get_cache_metrics():
+    """Yanıt önbelleğinin isabet oranı, boyutu ve rota bazında sayaçları."""
+    return jsonify(response_cache.metrics())
+
+@app.route('/api/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """pnl_percent'e göre ilk K yatırımcı (k: 1-100, varsayılan 10)."""
+    try:
+        try:
+            k = int(request.args.get('k', 10))
+        except ValueError:
+            return jsonify({"error": "k must be an integer"}), 400
+        if not 1 <= k <= LEADERBOARD_MAX_K:
+            return jsonify({"error": f"k must be between 1 and {LEADERBOARD_MAX_K}"}), 400
+        return jsonify({"k": k, "leaderboard": _leaderboard().top(k)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/report/<coin_id>', methods=['GET'])
+@cached_response('report')
 def get_scientific_report(coin_id):
     try:
-        df = db.get_market_data(coin_id)
+        client = db.client
+        details_coll = client["crypto_project_db"]["all_coins_details"]
         
-        if df.empty:
-            return jsonify({"error": "Data not found"}), 404
+        try:
+            mc_options = None
+            if request.args.get('monte_carlo', 'false').lower() == 'true':
+                mc_options = _monte_carlo_params(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        if 'price' not in df.columns:
-            if 'close' in df.columns:
-                df['price'] = df['close']
-            elif 'c' in df.columns:
-                df['price'] = df['c']
+        # approx=true: kalıcı KLL taslakları varsa geçmiş tek DataFrame'e alınmaz, rapor bloklar
+        # halinde akıtılarak (KLL çeyrekleriyle) hesaplanır. Taslakların kapsadığı aralık canlı
+        # veriden farklı olabildiği için onların çeyrek/VaR değerleri ayrı ve etiketli döner
+        approx = request.args.get('approx', 'false').lower() == 'true'
+        persisted_sketches = QuantileSketchStore(db.db).summary(coin_id) if approx else None
         
-        df['price'] = pd.to_numeric(df['price'], errors='coerce')
-        df = df.dropna(subset=['price'])
+        chunked = request.args.get('chunked', 'false').lower() == 'true' or persisted_sketches is not None
+        if not chunked:
+            chunked = db.market_collection.count_documents({"coin_id": coin_id}) > CHUNKED_REPORT_THRESHOLD
         
-        if len(df) < 30:
-            return jsonify({"error": "Insufficient data for scientific report"}), 400
+        if chunked:
+            # Geçmiş tek DataFrame'e alınmaz; Mongo imlecinden bloklar halinde işlenir
+            # (anomali sayımı için imleç ikinci kez açılır)
+            coin_info = details_coll.find_one({"id": coin_id}, {"_id": 0, "name": 1})
+            coin_name = coin_info.get('name', coin_id) if coin_info else coin_id
+            chunks = partial(db.iter_market_data_chunks, coin_id, chunk_size=REPORT_CHUNK_SIZE)
+            report = analysis_engine.generate_scientific_report_chunked(
+                chunks, column='price', coin_name=coin_name, monte_carlo_options=mc_options
+            )
+            if report is None:
+                return jsonify({"error": "Data not found"}), 404
+            if report['analysis_period']['total_days'] < 30:
+                return jsonify({"error": "Insufficient data for scientific report"}), 400
+        else:
+            df = db.get_market_data(coin_id)
+            
+            if df.empty:
+                return jsonify({"error": "Data not found"}), 404
+            
+            if 'price' not in df.columns:
+                if 'close' in df.columns:
+                    df['price'] = df['close']
+                elif 'c' in df.columns:
+                    df['price'] = df['c']
+            
+            df['price'] = pd.to_numeric(df['price'], errors='coerce')
+            df = df.dropna(subset=['price'])
+            
+            if len(df) < 30:
+                return jsonify({"error": "Insufficient data for scientific report"}), 400
+            
+            coin_info = details_coll.find_one({"id": coin_id}, {"_id": 0, "name": 1})
+            coin_name = coin_info.get('name', coin_id) if coin_info else coin_id
+            
+            report = analysis_engine.generate_scientific_report(
+                df, column='price', coin_name=coin_name, monte_carlo_options=mc_options
+            )
         
-        client = db.client
-        details_coll = client["crypto_project_db"]["all_coins_details"]
-        coin_info = details_coll.find_one({"id": coin_id}, {"_id": 0, "name": 1})
-        coin_name = coin_info.get('name', coin_id) if coin_info else coin_id
-        
-        report = analysis_engine.generate_scientific_report(df, column='price', coin_name=coin_name)
-        
-        def clean_value(v):
-            if isinstance(v, (float, np.floating)) and (np.isnan(v) or np.isinf(v)):
-                return None
-            if isinstance(v, (np.int64, np.int32)):
-                return int(v)
-            if isinstance(v, (np.float64, np.float32)):
-                return float(v)
-            return v
-        
-        def clean_dict(d):
-            if isinstance(d, dict):
-                return {k: clean_dict(v) for k, v in d.items()}
-            elif isinstance(d, list):
-                return [clean_dict(v) for v in d]
+        if approx:
+            if persisted_sketches is None:
+                # Taslak yoksa tam hesaba düşüldüğü açıkça bildirilir
+                report['approximation'] = {
+                    'method': None,
+                    'fallback': 'exact',
+                    'reason': 'No persisted quantile sketches for this coin'
+                }
             else:
-                return clean_value(d)
+                report['approximation']['persisted_sketches'] = persisted_sketches
         
-        report = clean_dict(report)
         report['coin_id'] = coin_id
         
-        return jsonify(report)
+        return json_response(report)
         
     except Exception as e:
         logger.error(f"Error generating report: {e}")
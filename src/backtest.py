@@ -0,0 +1,248 @@
+"""
+Backtest - Motorun sinyalleri için vektörize parametre taraması (parameter sweep)
+
+Her strateji, parametre ızgarasının tamamı için pozisyon matrisini (parametre seti × zaman)
+NumPy yayınlama (broadcasting) ile tek seferde üretir; iç içe döngü yoktur:
+  - 'rsi'      : RSI < lower iken al, RSI > upper iken çık (periods × lower × upper)
+  - 'sma'      : kısa SMA > uzun SMA iken pozisyonda kal (short × long, short < long)
+  - 'bollinger': fiyat alt bandın altına inince al, orta bandın üstüne çıkınca çık (periods × std)
+  - 'macd'     : MACD histogramı > 0 iken pozisyonda kal (fast × slow, signal sabit)
+
+Göstergeler analysis_engine ile aynı tanımlarla (basit hareketli ortalamalı RSI,
+adjust=False EMA) kümülatif toplam ve doğrusal filtre (lfilter) üzerinden hesaplanır.
+Pozisyon bir sonraki mumun getirisine uygulanır (look-ahead yok); işlem maliyeti
+pozisyon değişimi başına `fee` oranıdır. Izgara ilk eksene göre bloklara bölünüp
+isteğe bağlı olarak süreç havuzunda (process pool) değerlendirilir.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.signal import lfilter
+
+STRATEGIES = ('rsi', 'sma', 'bollinger', 'macd')
+DEFAULT_GRIDS = {
+    'rsi': {'period': [7, 14, 21], 'lower': [20, 25, 30, 35], 'upper': [65, 70, 75, 80]},
+    'sma': {'short': [5, 7, 10, 20], 'long': [30, 50, 100, 200]},
+    'bollinger': {'period': [10, 20, 30], 'std_dev': [1.5, 2.0, 2.5]},
+    'macd': {'fast': [8, 12, 16], 'slow': [21, 26, 34]},
+}
+# Pencere uzunluğu olan parametreler; geçmişten uzun pencereler hiç pozisyon üretemez
+WINDOW_PARAMS = {'rsi': ('period',), 'sma': ('short', 'long'), 'bollinger': ('period',), 'macd': ()}
+MACD_SIGNAL = 9
+DEFAULT_WORKERS = int(os.getenv("BACKTEST_WORKERS", "1"))
+DEFAULT_FEE = float(os.getenv("BACKTEST_FEE", "0.001"))
+TRADING_DAYS = 365
+
+
+def rolling_mean(values, windows):
+    """Pencere başına kayan ortalama (W × T); ilk `w - 1` değer NaN."""
+    windows = np.asarray(windows, dtype=np.int64)
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    t = np.arange(len(values))
+    start = t[None, :] - windows[:, None] + 1
+    means = (csum[t + 1][None, :] - csum[np.clip(start, 0, None)]) / windows[:, None]
+    means[start < 0] = np.nan
+    return means
+
+
+def rolling_std(values, windows):
+    """Pencere başına kayan örneklem standart sapması (ddof=1, W × T)."""
+    windows = np.asarray(windows, dtype=np.int64)
+    # Sayısal kararlılık için seri ortalamasına göre merkezlenir
+    centered = values - values.mean()
+    mean = rolling_mean(centered, windows)
+    mean_sq = rolling_mean(centered ** 2, windows)
+    n = windows[:, None]
+    variance = np.clip(mean_sq - mean ** 2, 0, None) * n / (n - 1)
+    return np.sqrt(variance)
+
+
+def rsi_matrix(prices, periods):
+    """calculate_rsi ile aynı tanım; periyot başına RSI (P × T)."""
+    delta = np.diff(prices, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    rs = rolling_mean(gain, periods) / (rolling_mean(loss, periods) + 1e-10)
+    return 100 - (100 / (1 + rs))
+
+
+def ema(values, span):
+    """ewm(span, adjust=False).mean() eşdeğeri; son eksen boyunca (satır başına) EMA."""
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (span + 1)
+    zi = (1 - alpha) * values[..., :1]
+    return lfilter([alpha], [1, alpha - 1], values, axis=-1, zi=zi)[0]
+
+
+def ema_matrix(values, spans):
+    """Span başına EMA (S × T)."""
+    return np.vstack([ema(values, span) for span in spans])
+
+
+def hold_positions(entries, exits):
+    """
+    Giriş/çıkış olaylarından pozisyon (0/1); son olay ileri taşınır (son eksen zaman).
+    Aynı mumda ikisi birden varsa çıkış önceliklidir.
+    """
+    events = np.where(exits, 0.0, np.where(entries, 1.0, np.nan))
+    t = np.arange(events.shape[-1])
+    last = np.where(np.isnan(events), 0, t)
+    np.maximum.accumulate(last, axis=-1, out=last)
+    held = np.take_along_axis(events, last, axis=-1)
+    return np.nan_to_num(held, nan=0.0)
+
+
+def _rsi_positions(prices, grid):
+    rsi = rsi_matrix(prices, grid['period'])[:, None, None, :]
+    lower = np.asarray(grid['lower'], dtype=np.float64)[None, :, None, None]
+    upper = np.asarray(grid['upper'], dtype=np.float64)[None, None, :, None]
+    with np.errstate(invalid='ignore'):
+        positions = hold_positions(rsi < lower, rsi > upper)
+    params = [
+        {'period': p, 'lower': lo, 'upper': up}
+        for p, lo, up in itertools.product(grid['period'], grid['lower'], grid['upper'])
+    ]
+    return params, positions.reshape(len(params), -1)
+
+
+def _sma_positions(prices, grid):
+    pairs = [(s, l) for s, l in itertools.product(grid['short'], grid['long']) if s < l]
+    if not pairs:
+        return [], np.empty((0, len(prices)))
+    windows = sorted({w for pair in pairs for w in pair})
+    means = rolling_mean(prices, windows)
+    row = {w: i for i, w in enumerate(windows)}
+    short = means[[row[s] for s, _ in pairs]]
+    long = means[[row[l] for _, l in pairs]]
+    with np.errstate(invalid='ignore'):
+        positions = (short > long).astype(np.float64)
+    return [{'short': s, 'long': l} for s, l in pairs], positions
+
+
+def _bollinger_positions(prices, grid):
+    middle = rolling_mean(prices, grid['period'])[:, None, :]
+    std = rolling_std(prices, grid['period'])[:, None, :]
+    std_dev = np.asarray(grid['std_dev'], dtype=np.float64)[None, :, None]
+    with np.errstate(invalid='ignore'):
+        entries = prices < middle - std * std_dev
+        positions = hold_positions(entries, np.broadcast_to(prices > middle, entries.shape))
+    params = [{'period': p, 'std_dev': s} for p, s in itertools.product(grid['period'], grid['std_dev'])]
+    return params, positions.reshape(len(params), -1)
+
+
+def _macd_positions(prices, grid):
+    pairs = [(f, s) for f, s in itertools.product(grid['fast'], grid['slow']) if f < s]
+    if not pairs:
+        return [], np.empty((0, len(prices)))
+    spans = sorted({span for pair in pairs for span in pair})
+    emas = ema_matrix(prices, spans)
+    row = {span: i for i, span in enumerate(spans)}
+    macd = emas[[row[f] for f, _ in pairs]] - emas[[row[s] for _, s in pairs]]
+    histogram = macd - ema(macd, MACD_SIGNAL)
+    return [{'fast': f, 'slow': s} for f, s in pairs], (histogram > 0).astype(np.float64)
+
+
+POSITION_BUILDERS = {
+    'rsi': _rsi_positions,
+    'sma': _sma_positions,
+    'bollinger': _bollinger_positions,
+    'macd': _macd_positions,
+}
+
+
+def evaluate_positions(positions, prices, fee=DEFAULT_FEE):
+    """
+    Pozisyon matrisini (N × T) değerler; t anındaki pozisyon t+1 getirisini alır.
+    Dönüş: {'total_return', 'sharpe_ratio', 'max_drawdown', 'trades', 'exposure'} dizileri (N)
+    """
+    returns = prices[1:] / prices[:-1] - 1
+    held = positions[:, :-1]
+    turnover = np.abs(np.diff(held, axis=1, prepend=0.0))
+    strategy = held * returns - turnover * fee
+
+    equity = np.cumprod(1 + strategy, axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    std = strategy.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, strategy.mean(axis=1) / std * np.sqrt(TRADING_DAYS), 0.0)
+    return {
+        'total_return': (equity[:, -1] - 1) * 100,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': np.minimum((equity / peak - 1).min(axis=1), 0) * 100,
+        'trades': (np.diff(held, axis=1, prepend=0.0) > 0).sum(axis=1),
+        'exposure': held.mean(axis=1) * 100
+    }
+
+
+def _evaluate_block(task):
+    strategy, prices, grid, fee = task
+    params, positions = POSITION_BUILDERS[strategy](prices, grid)
+    if not params:
+        return [], {}
+    return params, evaluate_positions(positions, prices, fee)
+
+
+def _split_grid(strategy, grid):
+    """
+    Izgarayı ilk parametre eksenindeki her değer için bir bloğa böler; böylece
+    ara matrislerin boyutu (kalan eksenler × zaman) ızgara büyüdükçe sınırlı kalır.
+    """
+    first = next(iter(DEFAULT_GRIDS[strategy]))
+    return [dict(grid, **{first: [value]}) for value in grid[first]]
+
+
+def _metrics_row(metrics, i):
+    row = {name: round(float(values[i]), 4) for name, values in metrics.items()}
+    row['trades'] = int(metrics['trades'][i])
+    return row
+
+
+def run(prices, strategy='rsi', grid=None, fee=DEFAULT_FEE, workers=DEFAULT_WORKERS, top=None):
+    """
+    Stratejiyi parametre ızgarası üzerinde test eder; sonuçlar Sharpe oranına göre azalan sırada.
+    grid: {parametre: değer listesi}; verilmeyen parametreler DEFAULT_GRIDS'ten alınır.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy. Use one of: {', '.join(STRATEGIES)}")
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[np.isfinite(prices) & (prices > 0)]
+    if len(prices) < 3:
+        raise ValueError("At least 3 prices are required for backtesting")
+    unknown = set(grid or {}) - set(DEFAULT_GRIDS[strategy])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+    grid = dict(DEFAULT_GRIDS[strategy], **(grid or {}))
+    if not all(grid.values()):
+        raise ValueError("Parameter lists must not be empty")
+    # Pencere en az bir getiriye pozisyon uygulayabilecek kadar kısa olmalı
+    grid = {
+        name: [v for v in values if v < len(prices) - 1] if name in WINDOW_PARAMS[strategy] else values
+        for name, values in grid.items()
+    }
+    if not all(grid.values()):
+        raise ValueError(f"Not enough history ({len(prices)} prices) for the requested windows")
+
+    tasks = [(strategy, prices, block, fee) for block in _split_grid(strategy, grid)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_evaluate_block, tasks))
+    else:
+        blocks = list(map(_evaluate_block, tasks))
+
+    results = []
+    for params, metrics in blocks:
+        for i, param_set in enumerate(params):
+            results.append({'params': param_set, **_metrics_row(metrics, i)})
+    results.sort(key=lambda r: r['sharpe_ratio'], reverse=True)
+
+    baseline = evaluate_positions(np.ones((1, len(prices))), prices, fee=0.0)
+    return {
+        'strategy': strategy,
+        'observations': len(prices),
+        'fee': fee,
+        'evaluated': len(results),
+        'buy_and_hold': _metrics_row(baseline, 0),
+        'results': results[:top] if top else results
+    }
@@ -0,0 +1,119 @@
+"""
+Candle Series - Sıcak yollar (hot paths) için kompakt, dizi tabanlı mum serisi
+
+Karışık object sütunlu DataFrame yerine bitişik (contiguous) int64 zaman damgası
+(UTC nanosaniye) ve float64 OHLCV dizileri tutulur. Zamana göre dilimleme
+searchsorted + NumPy görünümleri (view) ile kopyasız (zero-copy) yapılır.
+"""
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class CandleSeries:
+    """int64 zaman damgaları ve float64 OHLCV dizilerinden oluşan değişmez mum serisi."""
+
+    __slots__ = ('timestamps', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, timestamps, open, high, low, close, volume):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @property
+    def price(self):
+        """Kapanış fiyatı (market_data'daki `price` alanı ile aynı)."""
+        return self.close
+
+    @property
+    def empty(self):
+        return len(self.timestamps) == 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, key):
+        """Pozisyonel dilim (görünüm) veya sütun adı ile dizi döndürür."""
+        if isinstance(key, str):
+            return self.close if key == 'price' else getattr(self, key)
+        if not isinstance(key, slice):
+            raise TypeError("CandleSeries supports slices and column names only")
+        return CandleSeries(*(getattr(self, name)[key] for name in self.__slots__))
+
+    def between(self, start=None, end=None):
+        """[start, end] zaman aralığını kopyasız görünüm olarak döndürür."""
+        lo = 0 if start is None else np.searchsorted(self.timestamps, _to_ns(start), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.timestamps, _to_ns(end), side='right')
+        return self[lo:hi]
+
+    def tail(self, n):
+        return self[max(len(self) - n, 0):]
+
+    @property
+    def last_price(self):
+        return float(self.close[-1]) if len(self) else None
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    @classmethod
+    def empty_series(cls):
+        return cls(*(np.empty(0) for _ in cls.__slots__))
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """market_data DataFrame'inden seri üretir; eksik OHLC sütunları fiyattan türetilir."""
+        if df is None or df.empty:
+            return cls.empty_series()
+        df = df.sort_values('timestamp') if 'timestamp' in df.columns else df
+        close = _numeric(df, 'close') if 'close' in df.columns else _numeric(df, 'price')
+        return cls(
+            pd.to_datetime(df['timestamp'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64),
+            _numeric(df, 'open') if 'open' in df.columns else close,
+            _numeric(df, 'high') if 'high' in df.columns else close,
+            _numeric(df, 'low') if 'low' in df.columns else close,
+            close,
+            _numeric(df, 'volume') if 'volume' in df.columns else np.zeros(len(df))
+        )
+
+    @classmethod
+    def from_documents(cls, docs):
+        """Mongo belgelerinden DataFrame ara adımı olmadan seri üretir (zaman sırasında gelmelidir)."""
+        if not docs:
+            return cls.empty_series()
+        close = np.fromiter((d.get('close', d.get('price')) for d in docs), dtype=np.float64, count=len(docs))
+        timestamps = pd.to_datetime([d['timestamp'] for d in docs], utc=True).as_unit('ns').asi8
+
+        def column(name):
+            if name not in docs[0]:
+                return close
+            return np.fromiter((d.get(name, np.nan) for d in docs), dtype=np.float64, count=len(docs))
+
+        volume = column('volume') if 'volume' in docs[0] else np.zeros(len(docs))
+        return cls(timestamps, column('open'), column('high'), column('low'), close, volume)
+
+    def to_dataframe(self):
+        """Analiz motorunun beklediği `timestamp` + `price` + OHLCV sütunlu DataFrame."""
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.timestamps, utc=True),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'price': self.close,
+            'volume': self.volume
+        })
+
+
+def _numeric(df, column):
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _to_ns(value):
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize('UTC') if ts.tzinfo is None else ts).value
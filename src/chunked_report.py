@@ -0,0 +1,314 @@
+"""
+Chunked Report - Bellekten büyük (out-of-core) geçmişler için parçalı bilimsel rapor
+
+Mumlar sabit boyutlu bloklar halinde işlenir. Bloklar arasında taşınan durum:
+moment toplamları, getiri istatistikleri, kümülatif getiri ve zirve (drawdown),
+SMA pencerelerinin son `long_period - 1` fiyatı ve KLL çeyreklik taslakları.
+Bellek kullanımı blok boyutu + O(k) ile sınırlıdır.
+
+Tanımlayıcı momentler, getiri analizi, parametrik VaR, maksimum düşüş ve trend
+dağılımı `generate_scientific_report` ile aynı sonucu verir; çeyrekler, tarihsel
+VaR ve CVaR KLL taslağından yaklaşık olarak okunur (bkz. quantile_sketch).
+
+Monte Carlo istenirse log getirilerden sabit boyutlu bir rezervuar örneklemi
+(reservoir sampling, Algorithm R) tutulur; bootstrap bu örneklemden çekilir.
+
+Anomali sayımı ikinci bir akış geçişi (ChunkedAnomalyCounter) ister: z-score ve IQR
+sınırları ilk geçişin momentlerinden ve KLL çeyreklerinden gelir.
+"""
+import numpy as np
+import pandas as pd
+
+from stats_kernel import central_moments, merge_moments, shape_statistics, DEFAULT_QUANTILES
+from quantile_sketch import KLLSketch
+
+
+class ChunkedReportBuilder:
+    """Blok blok beslenen ve sonunda rapor sözlüğü üreten durum nesnesi."""
+
+    def __init__(self, column='price', short_period=7, long_period=30, confidence_level=0.95, k=None,
+                 return_sample_size=None):
+        self.column = column
+        self.short_period = short_period
+        self.long_period = long_period
+        self.confidence_level = confidence_level
+
+        sketch_args = {'k': k} if k else {}
+        self.price_sketch = KLLSketch(seed=0, **sketch_args)
+        self.return_sketch = KLLSketch(seed=1, **sketch_args)
+
+        self.price_moments = (0, 0.0, 0.0, 0.0, 0.0)
+        self.price_min = np.inf
+        self.price_max = -np.inf
+        self.missing = 0
+        self.rows = 0
+
+        self.return_moments = (0, 0.0, 0.0, 0.0, 0.0)
+        self.return_min = np.inf
+        self.return_max = -np.inf
+        self.positive_days = 0
+        self.negative_days = 0
+
+        self.first_price = None
+        self.last_price = None
+        self.cumulative = 1.0
+        self.cumulative_peak = -np.inf
+        self.max_drawdown = 0.0
+
+        self.tail = np.empty(0, dtype=np.float64)
+        self.trend_counts = {}
+        self.current_trend = 'neutral'
+
+        self.start = None
+        self.end = None
+
+        self.return_sample_size = return_sample_size
+        self.return_sample = np.empty(return_sample_size or 0, dtype=np.float64)
+        self.return_sample_seen = 0
+        self._sample_rng = np.random.default_rng(2)
+
+    def add_chunk(self, chunk):
+        """Bir DataFrame bloğunu işler (zaman sırasına göre gelmelidir)."""
+        if chunk is None or len(chunk) == 0:
+            return self
+        raw = chunk[self.column].to_numpy(dtype=np.float64)
+        self.rows += len(raw)
+        valid = ~np.isnan(raw)
+        self.missing += int(len(raw) - valid.sum())
+        prices = raw[valid]
+
+        if 'timestamp' in chunk.columns:
+            if self.start is None:
+                self.start = chunk['timestamp'].iloc[0]
+            self.end = chunk['timestamp'].iloc[-1]
+
+        if len(prices) == 0:
+            return self
+
+        self._update_descriptive(prices)
+        self._update_returns(prices)
+        self._update_trend(raw)
+        return self
+
+    def _update_descriptive(self, prices):
+        self.price_moments = merge_moments(self.price_moments, central_moments(prices))
+        self.price_min = min(self.price_min, float(prices.min()))
+        self.price_max = max(self.price_max, float(prices.max()))
+        self.price_sketch.update_many(prices)
+
+    def _update_returns(self, prices):
+        if self.first_price is None:
+            self.first_price = float(prices[0])
+        previous = prices[:-1] if self.last_price is None else np.concatenate([[self.last_price], prices[:-1]])
+        current = prices[1:] if self.last_price is None else prices
+        self.last_price = float(prices[-1])
+        if len(current) == 0:
+            return
+
+        returns = current / previous - 1
+        self.return_moments = merge_moments(self.return_moments, central_moments(returns))
+        self.return_min = min(self.return_min, float(returns.min()))
+        self.return_max = max(self.return_max, float(returns.max()))
+        self.positive_days += int((returns > 0).sum())
+        self.negative_days += int((returns < 0).sum())
+        self.return_sketch.update_many(returns)
+        if self.return_sample_size:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_returns = np.log(current / previous)
+            self._update_sample(log_returns[np.isfinite(log_returns)])
+
+        cumulative = self.cumulative * np.cumprod(1 + returns)
+        peaks = np.maximum(np.maximum.accumulate(cumulative), self.cumulative_peak)
+        self.max_drawdown = min(self.max_drawdown, float(((cumulative - peaks) / peaks).min()))
+        self.cumulative = float(cumulative[-1])
+        self.cumulative_peak = float(peaks[-1])
+
+    def _update_sample(self, log_returns):
+        """Rezervuar örneklemi: i. getiri (0 tabanlı) R/(i+1) olasılıkla rastgele bir yuvaya yazılır."""
+        size = self.return_sample_size
+        seen = self.return_sample_seen
+        fill = min(max(size - seen, 0), len(log_returns))
+        self.return_sample[seen:seen + fill] = log_returns[:fill]
+        rest = log_returns[fill:]
+        if len(rest):
+            slots = self._sample_rng.integers(0, np.arange(seen + fill, seen + len(log_returns)) + 1)
+            keep = slots < size
+            # Aynı yuvaya düşen getirilerden sıradaki son yazım kalır (sıralı algoritma ile aynı)
+            self.return_sample[slots[keep]] = rest[keep]
+        self.return_sample_seen = seen + len(log_returns)
+
+    def sampled_returns(self):
+        """Monte Carlo için log getiri örneklemi (görülen getiri sayısı R'den azsa tamamı, sırasıyla)."""
+        return self.return_sample[:min(self.return_sample_seen, self.return_sample_size or 0)]
+
+    def _update_trend(self, raw):
+        # SMA pencereleri blok sınırını aşabilsin diye önceki bloğun son fiyatları eklenir
+        window = np.concatenate([self.tail, raw])
+        series = pd.Series(window)
+        sma_short = series.rolling(window=self.short_period).mean().to_numpy()[len(self.tail):]
+        sma_long = series.rolling(window=self.long_period).mean().to_numpy()[len(self.tail):]
+
+        bullish = sma_short > sma_long * 1.02
+        bearish = sma_short < sma_long * 0.98
+        counts = {
+            'bullish': int(bullish.sum()),
+            'bearish': int(bearish.sum()),
+            'neutral': int(len(raw) - bullish.sum() - bearish.sum())
+        }
+        for trend, count in counts.items():
+            if count:
+                self.trend_counts[trend] = self.trend_counts.get(trend, 0) + count
+        self.current_trend = 'bullish' if bullish[-1] else ('bearish' if bearish[-1] else 'neutral')
+        self.tail = window[-(self.long_period - 1):] if self.long_period > 1 else np.empty(0)
+
+    def build(self, coin_name='Unknown'):
+        """Biriken durumdan rapor sözlüğünü üretir."""
+        n, mean, _, _, _ = self.price_moments
+        var, skewness, kurtosis = shape_statistics(self.price_moments)
+        std = float(np.sqrt(var))
+        q1, median, q3 = self.price_sketch.quantiles(DEFAULT_QUANTILES)
+
+        rn, r_mean, _, _, _ = self.return_moments
+        r_var, _, _ = shape_statistics(self.return_moments)
+        r_std = float(np.sqrt(r_var))
+
+        z_score = 1.645 if self.confidence_level == 0.95 else 2.326
+        var_parametric = r_mean - z_score * r_std
+        var_historic = self.return_sketch.quantile(1 - self.confidence_level)
+        cvar = self.return_sketch.mean_below(var_historic)
+
+        return {
+            'coin': coin_name,
+            'analysis_period': {
+                'start': self.start.isoformat() if self.start is not None else None,
+                'end': self.end.isoformat() if self.end is not None else None,
+                'total_days': self.rows - self.missing
+            },
+            'descriptive_statistics': {
+                'count': n,
+                'mean': mean,
+                'std': std,
+                'min': self.price_min,
+                'max': self.price_max,
+                'range': self.price_max - self.price_min,
+                'variance': var,
+                'q1': q1,
+                'median': median,
+                'q3': q3,
+                'iqr': q3 - q1,
+                'skewness': skewness,
+                'kurtosis': kurtosis,
+                'coefficient_of_variation': (std / mean) * 100 if mean != 0 else 0
+            },
+            'returns_analysis': {
+                'daily_returns': {
+                    'mean': r_mean * 100,
+                    'std': r_std * 100,
+                    'min': self.return_min * 100,
+                    'max': self.return_max * 100,
+                    'positive_days': self.positive_days,
+                    'negative_days': self.negative_days,
+                    'win_rate': (self.positive_days / rn) * 100 if rn else np.nan
+                },
+                'cumulative_return': ((self.last_price / self.first_price) - 1) * 100,
+                'annualized_return': ((1 + r_mean) ** 365 - 1) * 100,
+                'annualized_volatility': r_std * np.sqrt(365) * 100
+            },
+            'risk_analysis': {
+                'var_parametric_95': var_parametric * 100,
+                'var_historic_95': var_historic * 100,
+                'cvar_95': cvar * 100 if not np.isnan(cvar) else None,
+                'max_drawdown': self.max_drawdown * 100,
+                'confidence_level': self.confidence_level * 100,
+                'interpretation': {
+                    'var_meaning': f"With {self.confidence_level*100}% confidence, max daily loss of {abs(var_historic)*100:.2f}%",
+                    'max_drawdown_meaning': f"Peak to trough decline of {abs(self.max_drawdown)*100:.2f}%"
+                }
+            },
+            'anomaly_detection': None,
+            'trend_analysis': {
+                'current_trend': self.current_trend,
+                'trend_distribution': self.trend_counts
+            },
+            'data_quality': {
+                'missing_values': self.missing,
+                'data_completeness': ((self.rows - self.missing) / self.rows) * 100 if self.rows else 0
+            },
+            'approximation': {
+                'method': 'KLL',
+                'k': self.price_sketch.k,
+                'normalized_rank_error': KLLSketch.rank_error(self.price_sketch.k),
+                'quantiles_approximate': True,
+                'var_historic_approximate': True
+            },
+            'execution_mode': 'chunked'
+        }
+
+    def anomaly_counter(self, **options):
+        """İlk geçişte biriken ortalama/std ve KLL çeyrekleriyle ikinci geçiş sayacını kurar."""
+        n, mean, _, _, _ = self.price_moments
+        var, _, _ = shape_statistics(self.price_moments)
+        q1, _, q3 = self.price_sketch.quantiles(DEFAULT_QUANTILES)
+        return ChunkedAnomalyCounter(mean, float(np.sqrt(var)), q1, q3, column=self.column, **options)
+
+
+class ChunkedAnomalyCounter:
+    """
+    `get_anomaly_summary` yöntemlerinin (z-score, IQR, kayan pencere, ani değişim) blok blok
+    sayımı. Kayan pencere ve yüzde değişim blok sınırını aşabilsin diye önceki bloğun son
+    fiyatları taşınır; IQR sınırları taslak çeyreklerinden geldiği için yaklaşıktır.
+    """
+
+    def __init__(self, mean, std, q1, q3, column='price', zscore_threshold=3.0, iqr_multiplier=1.5,
+                 window=20, rolling_threshold=2.5, spike_threshold=0.10):
+        self.column = column
+        self.mean = mean
+        self.std = std
+        self.zscore_threshold = zscore_threshold
+        iqr = q3 - q1
+        self.lower_bound = q1 - iqr_multiplier * iqr
+        self.upper_bound = q3 + iqr_multiplier * iqr
+        self.window = window
+        self.rolling_threshold = rolling_threshold
+        self.spike_threshold = spike_threshold
+
+        self.tail = np.empty(0, dtype=np.float64)
+        self.rows = 0
+        self.counts = {'zscore': 0, 'iqr': 0, 'rolling': 0, 'price_spike': 0, 'any_method': 0}
+
+    def add_chunk(self, chunk):
+        """Bir DataFrame bloğundaki anomalileri sayar (zaman sırasına göre gelmelidir)."""
+        if chunk is None or len(chunk) == 0:
+            return self
+        raw = chunk[self.column].to_numpy(dtype=np.float64)
+        self.rows += len(raw)
+        window = np.concatenate([self.tail, raw])
+        offset = len(self.tail)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zscore = np.abs((raw - self.mean) / (self.std + 1e-10)) > self.zscore_threshold
+            iqr = (raw < self.lower_bound) | (raw > self.upper_bound)
+
+            series = pd.Series(window)
+            rolling_mean = series.rolling(window=self.window).mean().to_numpy()[offset:]
+            rolling_std = series.rolling(window=self.window).std().to_numpy()[offset:]
+            rolling = np.abs((raw - rolling_mean) / (rolling_std + 1e-10)) > self.rolling_threshold
+
+            previous = np.concatenate([[np.nan], window[:-1]])[offset:]
+            spike = np.abs(raw / previous - 1) > self.spike_threshold
+
+        for method, flags in (('zscore', zscore), ('iqr', iqr), ('rolling', rolling), ('price_spike', spike)):
+            self.counts[method] += int(flags.sum())
+        self.counts['any_method'] += int((zscore | iqr | rolling | spike).sum())
+
+        keep = max(self.window - 1, 1)
+        self.tail = window[-keep:]
+        return self
+
+    def summary(self):
+        """Rapordaki `anomaly_detection` bölümü."""
+        return {
+            'total_anomalies': self.counts['any_method'],
+            'anomaly_percentage': round((self.counts['any_method'] / self.rows) * 100, 2) if self.rows else 0,
+            'by_method': dict(self.counts)
+        }
@@ -0,0 +1,153 @@
+"""
+Clustering - Coin evreni için hiyerarşik kümeleme ve piyasa rejimi haritası
+
+Zamana hizalı fiyat panelinden (zaman × coin) günlük getiriler alınır ve çiftli tam
+gözlem (pairwise-complete) korelasyon matrisi birkaç matris çarpımıyla hesaplanır;
+1000 coin için bile eksik günler satır atmadan ele alınır. Korelasyon, Mantegna
+uzaklığına d = sqrt((1 - ρ) / 2) çevrilir ve scipy ile hiyerarşik kümeleme yapılır.
+
+Çıktı, dendrogram yaprak sırasına göre yeniden dizilmiş matris (ısı haritası için),
+küme etiketleri ve küme bazında rejim özetidir (ortalama iç korelasyon, getiri, oynaklık).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+LINKAGE_METHODS = ('average', 'complete', 'single', 'ward')
+DEFAULT_CLUSTERS = 8
+MIN_OVERLAP = 20
+CACHE_MAX_ENTRIES = int(os.getenv("CLUSTER_CACHE_MAX_ENTRIES", "16"))
+
+
+def pairwise_correlation(returns, min_overlap=MIN_OVERLAP):
+    """
+    Eksik değer (NaN) içeren T × C getiri matrisinden çiftli tam gözlem korelasyonu.
+    Her çift sadece ikisinin de gözlendiği satırları kullanır; örtüşmesi `min_overlap`
+    altında kalan çiftler NaN olur.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    mask = (~np.isnan(returns)).astype(np.float64)
+    x = np.where(mask > 0, returns, 0.0)
+
+    n = mask.T @ mask
+    sum_x = x.T @ mask
+    sum_xx = (x * x).T @ mask
+    sum_xy = x.T @ x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[n < min_overlap] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def correlation_distance(corr):
+    """Mantegna uzaklığı; korelasyonu bilinmeyen çiftler ilişkisiz (ρ = 0) sayılır."""
+    corr = np.where(np.isnan(corr), 0.0, corr)
+    distance = np.sqrt(np.clip((1.0 - corr) / 2.0, 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    return distance
+
+
+def cluster_map(coins, prices, n_clusters=DEFAULT_CLUSTERS, method='average', min_overlap=MIN_OVERLAP):
+    """
+    coins: panel sütunları, prices: T × C fiyat paneli (eksik NaN).
+    Dönüş: {'coins' (yaprak sırası), 'clusters', 'matrix' (yeniden dizilmiş), 'regimes'}
+    """
+    if method not in LINKAGE_METHODS:
+        raise ValueError(f"Unknown linkage method. Use one of: {', '.join(LINKAGE_METHODS)}")
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+
+    # Yeterli gözlemi olmayan coinler kümelemeye alınmaz
+    observed = (~np.isnan(returns)).sum(axis=0) >= min_overlap
+    coins = [coin for coin, keep in zip(coins, observed) if keep]
+    returns = returns[:, observed]
+    if len(coins) < 2:
+        raise ValueError("At least 2 coins with enough history are required")
+
+    corr = pairwise_correlation(returns, min_overlap)
+    tree = linkage(squareform(correlation_distance(corr), checks=False), method=method)
+    order = leaves_list(tree)
+    labels = fcluster(tree, t=min(n_clusters, len(coins)), criterion='maxclust')
+
+    # Küme numaraları yaprak sırasındaki ilk görünüme göre 1..K olarak yeniden adlandırılır
+    renumber = {}
+    for label in labels[order]:
+        renumber.setdefault(label, len(renumber) + 1)
+    labels = np.array([renumber[label] for label in labels])
+
+    mean_return = np.nanmean(returns, axis=0)
+    volatility = np.nanstd(returns, axis=0, ddof=1)
+    regimes = []
+    for cluster in range(1, len(renumber) + 1):
+        members = np.flatnonzero(labels == cluster)
+        block = corr[np.ix_(members, members)]
+        off_diagonal = block[~np.eye(len(members), dtype=bool)]
+        regimes.append({
+            "cluster": cluster,
+            "size": len(members),
+            "coins": [coins[i] for i in members],
+            "mean_correlation": _round(np.nanmean(off_diagonal)) if off_diagonal.size else None,
+            "mean_daily_return": _round(np.nanmean(mean_return[members]), 6),
+            "mean_volatility": _round(np.nanmean(volatility[members]), 6)
+        })
+
+    reordered = corr[np.ix_(order, order)]
+    return {
+        "coins": [coins[i] for i in order],
+        "clusters": labels[order].tolist(),
+        "matrix": [[_round(v) for v in row] for row in reordered.tolist()],
+        "regimes": regimes
+    }
+
+
+def _round(value, digits=4):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+class ClusterCache:
+    """
+    Parametre seti başına son kümeleme sonucunu veri sürümleri anahtarı ile saklar;
+    evrendeki hiçbir coin'in sürümü değişmedikçe yeniden hesaplanmaz.
+    Parametreleri istemci seçtiği için en fazla `max_entries` set tutulur (LRU).
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, params, versions_key):
+        with self._lock:
+            entry = self._entries.get(params)
+            if entry is None:
+                return None
+            if entry[0] != versions_key:
+                # Eski sürümün sonucu bir daha istenmez; yer tutmasın
+                del self._entries[params]
+                return None
+            self._entries.move_to_end(params)
+            return entry[1]
+
+    def put(self, params, versions_key, result):
+        with self._lock:
+            self._entries[params] = (versions_key, result)
+            self._entries.move_to_end(params)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
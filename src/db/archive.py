@@ -0,0 +1,132 @@
+"""
+Market Archive - Soğuk (eski) mumlar için sıkıştırılmış Parquet arşiv katmanı
+
+Kesim tarihinden (cutoff) eski mumlar `market_data` koleksiyonundan coin ve ay
+bazında bölümlenmiş (partitioned) Parquet dosyalarına taşınır:
+
+    <dizin>/coin_id=<coin>/month=<YYYY-MM>/data.parquet
+
+Coin başına arşiv durumu (`archive_state`) hangi ayların ve hangi tarihe kadar
+arşivlendiğini tutar; okuma tarafı sadece istenen aralıkla kesişen ayları açar.
+Mumlar önce Parquet'e yazılır, ancak yazım başarılı olursa Mongo'dan silinir.
+
+Parquet için isteğe bağlı `pyarrow` bağımlılığı gerekir; sadece arşiv kullanılırken import edilir.
+"""
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+ARCHIVE_DIR = os.environ.get("MARKET_ARCHIVE_DIR", os.path.join("data", "market_archive"))
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
+STATE_COLLECTION = "archive_state"
+COMPRESSION = "zstd"
+DELETE_BATCH = 5000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the Parquet market archive (pip install pyarrow)") from e
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _partition_path(directory, coin_id, month):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in coin_id)
+    return os.path.join(directory, f"coin_id={safe}", f"month={month}", "data.parquet")
+
+
+class MarketArchive:
+    """market_data için Parquet arşivi: taşıma (archive) ve aralık okuma (read)."""
+
+    def __init__(self, database, directory=ARCHIVE_DIR):
+        self.market_collection = database["market_data"]
+        self.state_collection = database[STATE_COLLECTION]
+        self.directory = directory
+
+    def state(self, coin_id):
+        return self.state_collection.find_one({"coin_id": coin_id}, {"_id": 0})
+
+    def archive_coin(self, coin_id, cutoff):
+        """`cutoff` öncesindeki mumları arşive taşır; taşınan mum sayısını döndürür."""
+        _require_pyarrow()
+        cutoff = _utc(cutoff)
+        stamps = pd.DataFrame(list(self.market_collection.find({"coin_id": coin_id}, {"_id": 1, "timestamp": 1})))
+        if stamps.empty:
+            return 0
+        stamps["ts"] = pd.to_datetime(stamps["timestamp"], utc=True, errors="coerce")
+        cold_ids = stamps.loc[stamps["ts"] < cutoff, "_id"].tolist()
+        if not cold_ids:
+            return 0
+
+        cold = pd.DataFrame(list(self.market_collection.find({"_id": {"$in": cold_ids}})))
+        cold = cold.drop(columns=["_id"])
+        cold["timestamp"] = pd.to_datetime(cold["timestamp"], utc=True)
+        cold["month"] = cold["timestamp"].dt.strftime("%Y-%m")
+
+        months = []
+        for month, part in cold.groupby("month"):
+            self._write_partition(coin_id, month, part.drop(columns=["month"]))
+            months.append(month)
+
+        state = self.state(coin_id) or {"coin_id": coin_id, "months": [], "rows": 0, "archived_through": None}
+        state["months"] = sorted(set(state["months"]) | set(months))
+        state["rows"] = state.get("rows", 0) + len(cold)
+        last = cold["timestamp"].max()
+        if state["archived_through"] is None or _utc(state["archived_through"]) < last:
+            state["archived_through"] = last.to_pydatetime()
+        state["updated_at"] = datetime.now(timezone.utc)
+        self.state_collection.replace_one({"coin_id": coin_id}, state, upsert=True)
+
+        for i in range(0, len(cold_ids), DELETE_BATCH):
+            self.market_collection.delete_many({"_id": {"$in": cold_ids[i:i + DELETE_BATCH]}})
+        return len(cold_ids)
+
+    def _write_partition(self, coin_id, month, part):
+        path = _partition_path(self.directory, coin_id, month)
+        if os.path.exists(path):
+            # Aynı ay tekrar arşivlenirse mevcut bölümle birleştirilir (zaman damgasına göre tekil)
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+            part = part.drop_duplicates(subset="timestamp", keep="last")
+        part = part.sort_values("timestamp").reset_index(drop=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        part.to_parquet(tmp_path, engine="pyarrow", compression=COMPRESSION, index=False)
+        os.replace(tmp_path, path)
+
+    def read(self, coin_id, start=None, end=None):
+        """
+        [start, end] aralığıyla kesişen arşiv aylarını okur; arşiv yoksa boş DataFrame.
+        Sadece ilgili ay bölümleri açılır (partition pruning).
+        """
+        state = self.state(coin_id)
+        if not state or not state.get("months"):
+            return pd.DataFrame()
+        if start is not None and _utc(start) > _utc(state["archived_through"]):
+            return pd.DataFrame()
+
+        frames = list(self.iter_months(coin_id, start, end, state=state))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_months(self, coin_id, start=None, end=None, state=None):
+        """Aralıkla kesişen arşiv aylarını zaman sırasıyla birer DataFrame olarak üretir."""
+        state = state or self.state(coin_id)
+        if not state or not state.get("months"):
+            return
+        _require_pyarrow()
+        first = _utc(start).strftime("%Y-%m") if start is not None else None
+        last = _utc(end).strftime("%Y-%m") if end is not None else None
+        for month in state["months"]:
+            if (first is None or month >= first) and (last is None or month <= last):
+                yield pd.read_parquet(_partition_path(self.directory, coin_id, month), engine="pyarrow")
+
+    def has_archive(self, coin_id):
+        state = self.state(coin_id)
+        return bool(state and state.get("months"))
@@ -0,0 +1,251 @@
+"""
+Online Covariance Store - Korelasyon ısı haritası için artımlı (incremental) kovaryans deposu
+
+Her coin çifti için Welford tarzı ortak moment (co-moment) birikimleri tutulur.
+Yeni mum (candle) geldiğinde sadece ilgili çiftler güncellenir; /api/correlation
+geçmiş veriyi taramadan N×N matrisi O(N²) sürede okur.
+
+Takip edilen bir coin ilk kez işlendiğinde diğer coinlerin sadece son getiri penceresi
+eşleşebildiği için bazı çiftler eksik (n < 2) kalabilir; bu çiftler ilk kullanımda
+canlı geçmişten (backfill) tohumlanır.
+
+Durum ve çift dokümanları oku-değiştir-yaz ile güncellenir. Ingestion betikleri coinleri
+iş parçacığı havuzunda işlediği için süreç içindeki güncellemeler tek kilitle sıralanır
+(ingestion tek süreçte çalışır). API sürecindeki backfill sadece eksik çiftleri ekler ve
+mevcut bir çifti ancak okuduğu `n` değişmediyse değiştirir.
+"""
+import os
+import logging
+import threading
+from itertools import combinations
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_TOP_N = int(os.environ.get("CORRELATION_TOP_N", "20"))
+# Bir coin için saklanan son getiri sayısı; diğer coinlerin aynı zaman damgasına
+# ait mumları bu pencere içinde gelirse çift güncellenebilir.
+RECENT_RETURNS_LIMIT = 64
+
+STATE_COLLECTION = "correlation_state"
+PAIRS_COLLECTION = "correlation_pairs"
+
+_WRITE_LOCK = threading.Lock()
+
+
+def pair_key(coin_a, coin_b):
+    """Çift anahtarını sıralı biçimde üretir ('bitcoin|ethereum')."""
+    a, b = sorted((coin_a, coin_b))
+    return f"{a}|{b}"
+
+
+def empty_pair(coin_a, coin_b):
+    a, b = sorted((coin_a, coin_b))
+    return {
+        "pair": pair_key(a, b),
+        "coin_a": a,
+        "coin_b": b,
+        "n": 0,
+        "mean_a": 0.0,
+        "mean_b": 0.0,
+        "m2_a": 0.0,
+        "m2_b": 0.0,
+        "c_ab": 0.0
+    }
+
+
+def update_pair(doc, return_a, return_b):
+    """Tek bir (x, y) gözlemi ile Welford ortak moment güncellemesi yapar."""
+    n = doc["n"] + 1
+    delta_a = return_a - doc["mean_a"]
+    mean_a = doc["mean_a"] + delta_a / n
+    mean_b = doc["mean_b"] + (return_b - doc["mean_b"]) / n
+
+    doc["c_ab"] += delta_a * (return_b - mean_b)
+    doc["m2_a"] += delta_a * (return_a - mean_a)
+    doc["m2_b"] += (return_b - doc["mean_b"]) * (return_b - mean_b)
+    doc["mean_a"] = mean_a
+    doc["mean_b"] = mean_b
+    doc["n"] = n
+    return doc
+
+
+def pair_correlation(doc):
+    """Birikimlerden Pearson korelasyonunu hesaplar (yetersiz veri için None)."""
+    if doc["n"] < 2:
+        return None
+    denom = (doc["m2_a"] * doc["m2_b"]) ** 0.5
+    if denom == 0:
+        return None
+    return doc["c_ab"] / denom
+
+
+class OnlineCovarianceStore:
+    """
+    Top-N coin kümesi için kalıcı (persistent) çiftli kovaryans birikimleri.
+    database: pymongo Database nesnesi (test için mongomock da olabilir).
+    coins: takip edilecek coin id listesi.
+    """
+
+    def __init__(self, database, coins=None):
+        self.state_collection = database[STATE_COLLECTION]
+        self.pairs_collection = database[PAIRS_COLLECTION]
+        self.coins = list(coins) if coins is not None else []
+
+    def is_tracked(self, coin_id):
+        return coin_id in self.coins
+
+    def _load_state(self, coin_id):
+        state = self.state_collection.find_one({"coin_id": coin_id}, {"_id": 0})
+        if not state:
+            state = {"coin_id": coin_id, "last_timestamp": None, "last_price": None, "recent_returns": []}
+        return state
+
+    def update(self, coin_id, candles, column="price"):
+        """
+        Yeni kapanmış mumları işler. Daha önce işlenmiş zaman damgaları atlanır,
+        bu yüzden aynı mumların tekrar gönderilmesi birikimleri bozmaz.
+        candles: zaman sırasına göre {'timestamp': ..., 'price': ...} sözlükleri
+        """
+        if not self.is_tracked(coin_id) or not candles:
+            return 0
+        with _WRITE_LOCK:
+            return self._update(coin_id, candles, column)
+
+    def _update(self, coin_id, candles, column):
+        state = self._load_state(coin_id)
+        new_returns = []
+        for candle in candles:
+            ts = candle.get("timestamp")
+            price = candle.get(column)
+            if ts is None or price is None:
+                continue
+            if state["last_timestamp"] is not None and ts <= state["last_timestamp"]:
+                continue
+            last_price = state["last_price"]
+            if last_price:
+                new_returns.append((ts, price / last_price - 1))
+            state["last_timestamp"] = ts
+            state["last_price"] = price
+
+        if new_returns:
+            others = [c for c in self.coins if c != coin_id]
+            other_states = {
+                doc["coin_id"]: dict(doc["recent_returns"])
+                for doc in self.state_collection.find({"coin_id": {"$in": others}}, {"_id": 0})
+            }
+            pair_docs = {
+                doc["pair"]: doc
+                for doc in self.pairs_collection.find({"$or": [{"coin_a": coin_id}, {"coin_b": coin_id}]}, {"_id": 0})
+            }
+
+            touched = set()
+            for other, other_returns in other_states.items():
+                key = pair_key(coin_id, other)
+                doc = pair_docs.get(key) or empty_pair(coin_id, other)
+                for ts, ret in new_returns:
+                    other_ret = other_returns.get(ts)
+                    if other_ret is None:
+                        continue
+                    if doc["coin_a"] == coin_id:
+                        update_pair(doc, ret, other_ret)
+                    else:
+                        update_pair(doc, other_ret, ret)
+                    touched.add(key)
+                pair_docs[key] = doc
+
+            for key in touched:
+                self.pairs_collection.replace_one({"pair": key}, pair_docs[key], upsert=True)
+
+            recent = state["recent_returns"] + [[ts, ret] for ts, ret in new_returns]
+            state["recent_returns"] = recent[-RECENT_RETURNS_LIMIT:]
+
+        self.state_collection.replace_one({"coin_id": coin_id}, state, upsert=True)
+        return len(new_returns)
+
+    def has_coins(self, coins):
+        """Verilen tüm coinler depoda takip ediliyor ve veri almış mı?"""
+        count = self.state_collection.count_documents({"coin_id": {"$in": list(coins)}})
+        return count == len(set(coins))
+
+    def has_pairs(self, coins, min_n=2):
+        """Verilen coinlerin tüm çiftlerinde en az `min_n` ortak getiri birikmiş mi?"""
+        coins = list(set(coins))
+        count = self.pairs_collection.count_documents(
+            {"coin_a": {"$in": coins}, "coin_b": {"$in": coins}, "n": {"$gte": min_n}}
+        )
+        return count == len(coins) * (len(coins) - 1) // 2
+
+    def backfill(self, coins, load_candles, column="price"):
+        """
+        Depoda durumu olan coinler arasında eksik (n < 2) çiftleri geçmiş mumlardan tohumlar.
+        Her coin'in geçmişi durumundaki son zaman damgasına kadar kullanılır; sonraki mumlar
+        artımlı güncellemeye kalır, böylece hiçbir getiri iki kez sayılmaz.
+        load_candles(coin_id): zaman sırasına göre {'timestamp', 'price'} sözlükleri
+        Dönüş: tohumlanan çift sayısı
+        """
+        with _WRITE_LOCK:
+            return self._backfill(coins, load_candles, column)
+
+    def _backfill(self, coins, load_candles, column):
+        coins = list(dict.fromkeys(coins))
+        states = {
+            doc["coin_id"]: doc
+            for doc in self.state_collection.find({"coin_id": {"$in": coins}}, {"_id": 0, "recent_returns": 0})
+        }
+        coins = sorted(coin for coin in coins if coin in states)
+        existing = {
+            doc["pair"]: doc.get("n", 0)
+            for doc in self.pairs_collection.find({"coin_a": {"$in": coins}, "coin_b": {"$in": coins}}, {"_id": 0})
+        }
+        missing = [(a, b) for a, b in combinations(coins, 2) if existing.get(pair_key(a, b), 0) < 2]
+        if not missing:
+            return 0
+
+        returns = {}
+        for coin in {coin for pair in missing for coin in pair}:
+            last_timestamp = states[coin]["last_timestamp"]
+            coin_returns, last_price = {}, None
+            for candle in load_candles(coin):
+                ts = candle.get("timestamp")
+                price = candle.get(column)
+                if ts is None or price is None:
+                    continue
+                if last_timestamp is None or ts > last_timestamp:
+                    break
+                if last_price:
+                    coin_returns[ts] = price / last_price - 1
+                last_price = price
+            returns[coin] = coin_returns
+
+        seeded = 0
+        for a, b in missing:
+            doc = empty_pair(a, b)
+            for ts in sorted(returns[a].keys() & returns[b].keys()):
+                update_pair(doc, returns[a][ts], returns[b][ts])
+            if not doc["n"]:
+                continue
+            # Okunduktan sonra başka bir süreç çifti güncellediyse tohum yazılmaz
+            if doc["pair"] in existing:
+                result = self.pairs_collection.replace_one({"pair": doc["pair"], "n": existing[doc["pair"]]}, doc)
+                written = result.modified_count
+            else:
+                result = self.pairs_collection.update_one({"pair": doc["pair"]}, {"$setOnInsert": doc}, upsert=True)
+                written = result.upserted_id is not None
+            seeded += 1 if written else 0
+        return seeded
+
+    def get_correlation_matrix(self, coins):
+        """
+        N×N korelasyon matrisini pandas `to_dict()` biçiminde döndürür
+        ({kolon: {satır: değer}}). Geçmiş veri taranmaz.
+        """
+        coins = list(dict.fromkeys(coins))
+        matrix = {a: {b: (1.0 if a == b else None) for b in coins} for a in coins}
+        cursor = self.pairs_collection.find(
+            {"coin_a": {"$in": coins}, "coin_b": {"$in": coins}}, {"_id": 0}
+        )
+        for doc in cursor:
+            corr = pair_correlation(doc)
+            matrix[doc["coin_a"]][doc["coin_b"]] = corr
+            matrix[doc["coin_b"]][doc["coin_a"]] = corr
+        return matrix
@@ -0,0 +1,85 @@
+"""
+Data Versions - Coin bazında veri sürümü (data version) sayaçları
+
+Her ingestion veya kayıt işlemi coin'in sürümünü bir artırır. Önbellekler
+(model, yanıt, panel) anahtarlarına bu sürümü ekleyerek veri değişmedikçe
+yeniden hesaplama yapmaz.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+
+COLLECTION = "data_versions"
+
+
+def bump(database, coin_id):
+    """Coin sürümünü artırır ve yeni sürüm numarasını döndürür (artırma ve okuma tek atomik işlem)."""
+    now = datetime.now(timezone.utc)
+    doc = database[COLLECTION].find_one_and_update(
+        {"coin_id": coin_id},
+        {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+        projection={"_id": 0, "version": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+
+def get(database, coin_id):
+    """Coin'in güncel sürümü (hiç yazılmamışsa 0)."""
+    doc = database[COLLECTION].find_one({"coin_id": coin_id}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+
+def get_many(database, coin_ids=None):
+    """{coin_id: {'version': int, 'updated_at': datetime}} sözlüğü döndürür."""
+    query = {"coin_id": {"$in": list(coin_ids)}} if coin_ids is not None else {}
+    return {
+        doc["coin_id"]: {"version": doc.get("version", 0), "updated_at": doc.get("updated_at")}
+        for doc in database[COLLECTION].find(query, {"_id": 0})
+    }
+
+
+class VersionTracker:
+    """
+    Tüm coinlerin sürümlerinin süreç içi kopyası; en fazla `max_age` saniyede bir tek sorguyla
+    yenilenir. Koşullu GET (ETag/Last-Modified) kontrolleri her istekte Mongo'ya gitmeden
+    bu kopyadan yapılır; kopya en fazla `max_age` saniye geride kalabilir.
+    """
+
+    def __init__(self, database, max_age=2.0):
+        self.database = database
+        self.max_age = max_age
+        self._versions = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is None or now - self._loaded_at >= self.max_age:
+                versions = get_many(self.database)
+                for entry in versions.values():
+                    updated_at = entry["updated_at"]
+                    if updated_at is not None and updated_at.tzinfo is None:
+                        entry["updated_at"] = updated_at.replace(tzinfo=timezone.utc)
+                self._versions = versions
+                self._loaded_at = now
+            return self._versions
+
+    def get(self, coin_id):
+        """(sürüm, güncellenme zamanı UTC); hiç yazılmamış coin için (0, None)."""
+        entry = self._refresh().get(coin_id)
+        if entry is None:
+            return 0, None
+        return entry["version"], entry["updated_at"]
+
+    def all(self):
+        """{coin_id: {'version', 'updated_at'}}; değiştirilmemelidir."""
+        return self._refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
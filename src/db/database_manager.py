@@ -2,11 +2,16 @@ import pymongo
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import re
 import random
 import logging
 from faker import Faker
 from werkzeug.security import generate_password_hash
 from cryptography.fernet import Fernet
+from db import data_versions
+from db.snapshot import MarketSnapshot, SNAPSHOT_DIR, SNAPSHOT_FORMAT
+from db.archive import MarketArchive, ARCHIVE_DIR
+from candle_series import CandleSeries
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -53,13 +58,102 @@ def save_market_data(coin_id, df):
         logger.info(f"Data for {coin_id} saved successfully.")
     else:
         logger.warning(f"No data found for {coin_id}.")
+    data_versions.bump(db, coin_id)
 
-def get_market_data(coin_id):
+def get_data_version(coin_id):
+    """Coin'in güncel veri sürümü; önbellek anahtarlarında kullanılır."""
+    return data_versions.get(db, coin_id)
+
+def get_data_versions(coin_ids=None):
+    return data_versions.get_many(db, coin_ids)
+
+# Ingestion her coin'i Binance sembolü (BTCUSDT) ve frontend id'si (bitcoin) altında
+# iki kez saklar; coin evreni üzerinde çalışan analizler sembol kopyalarını atlar
+SYMBOL_ID_PATTERN = re.compile(r"(USDT|BUSD|USDC|BTC|ETH)$")
+
+def is_symbol_alias(coin_id):
+    return bool(SYMBOL_ID_PATTERN.search(coin_id or ""))
+
+# Kullanıcı koleksiyonunun sürümü; her kullanıcı yazımında artar, sıralama (leaderboard) buna bağlıdır
+COLLECTION_VERSIONS = "collection_versions"
+USERS_VERSION_ID = "users"
+
+def bump_users_version():
+    doc = db[COLLECTION_VERSIONS].find_one_and_update(
+        {"_id": USERS_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True, return_document=pymongo.ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+def get_users_version():
+    doc = db[COLLECTION_VERSIONS].find_one({"_id": USERS_VERSION_ID})
+    return doc["version"] if doc else 0
+
+def get_market_coin_ids(frontend_only=False):
+    """market_data'da mumu bulunan coin id'leri (sıralı); frontend_only ile sembol kopyaları atlanır."""
+    coin_ids = sorted(market_collection.distinct("coin_id"))
+    if frontend_only:
+        coin_ids = [coin_id for coin_id in coin_ids if not is_symbol_alias(coin_id)]
+    return coin_ids
+
+# Okuma modu (read-through): snapshot güncelse (manifest sürümü == veri sürümü)
+# mumlar Mongo yerine yerel bellek eşlemeli snapshot'tan okunur
+_snapshot = None
+
+def enable_snapshot_read_through(directory=None):
+    global _snapshot
+    _snapshot = MarketSnapshot(directory or SNAPSHOT_DIR)
+    return _snapshot
+
+def disable_snapshot_read_through():
+    global _snapshot
+    _snapshot = None
+
+if os.environ.get("MARKET_SNAPSHOT_READ_THROUGH", "0") == "1":
+    enable_snapshot_read_through()
+
+def _snapshot_series(coin_id):
+    if _snapshot is None:
+        return None
+    try:
+        if _snapshot.is_fresh(coin_id, get_data_version(coin_id)):
+            return _snapshot.load(coin_id)
+    except Exception as e:
+        logger.warning(f"Snapshot read failed for {coin_id}: {e}")
+    return None
+
+def refresh_snapshot(coin_ids=None, directory=None, force=False, file_format=None):
+    """
+    Sürümü değişen coinlerin mumlarını snapshot dizinine yazar; yenilenen coinleri döndürür.
+    coin_ids verilmezse veri sürümü kaydı olan tüm coinler kullanılır.
+    file_format: 'npy' veya 'arrow' (varsayılan MARKET_SNAPSHOT_FORMAT)
+    """
+    versions = {c: v["version"] for c, v in get_data_versions(coin_ids).items()}
+    for coin_id in coin_ids or []:
+        versions.setdefault(coin_id, 0)
+    snapshot = MarketSnapshot(directory or SNAPSHOT_DIR, file_format=file_format or SNAPSHOT_FORMAT)
+    return snapshot.refresh(versions, _query_candle_series, force=force)
+
+def get_market_data(coin_id, start=None, end=None):
+    """
+    Coin mumlarını zaman sırasıyla döndürür. Arşivlenmiş (Parquet) eski mumlar, istenen
+    aralık (start/end, verilmezse tüm geçmiş) arşive uzanıyorsa canlı veriyle birleştirilir.
+    Arşiv sadece tam coin_id ile aranır; sembol/regex geri dönüşleri yalnızca coin'in ne canlı
+    mumu ne de arşivi varsa denenir ve bulunan (başka coin_id'li) veriye arşiv eklenmez.
+    """
+    series = _snapshot_series(coin_id)
+    if series is not None:
+        df = series.between(start, end).to_dataframe()
+        df.insert(0, "coin_id", coin_id)
+        return df
     try:
         cursor = market_collection.find({"coin_id": coin_id}, {"_id": 0})
         df = pd.DataFrame(list(cursor))
+        # Arşiv durumu bir kez okunur; hem tam eşleşme kararı hem birleştirme bunu kullanır
+        archive = MarketArchive(db, ARCHIVE_DIR)
+        archived = archive.has_archive(coin_id)
+        exact = not df.empty or archived
 
-        if df.empty:
+        if not exact:
             details_col = db["all_coins_details"]
             doc = details_col.find_one({"id": coin_id}, {"symbol": 1, "_id": 0})
             candidates = []
@@ -92,10 +186,122 @@ def get_market_data(coin_id):
             df["timestamp"] = pd.to_datetime(df["timestamp"])
             df = df.sort_values("timestamp")
 
+        if archived:
+            df = _merge_archive(archive, coin_id, df, start, end)
+        if (start is not None or end is not None) and not df.empty and "timestamp" in df.columns:
+            ts = pd.to_datetime(df["timestamp"], utc=True)
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= ts >= _as_utc(start)
+            if end is not None:
+                mask &= ts <= _as_utc(end)
+            df = df[mask]
+
         return df
     except Exception:
         return pd.DataFrame()
 
+def _as_utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+def archive_market_data(coin_ids=None, cutoff=None, directory=None):
+    """
+    Kesim tarihinden eski mumları Parquet arşivine taşır; {coin_id: taşınan mum} döndürür.
+    coin_ids verilmezse market_data'daki tüm coinler işlenir.
+    """
+    archive = MarketArchive(db, directory or ARCHIVE_DIR)
+    coin_ids = coin_ids or get_market_coin_ids()
+    moved = {}
+    for coin_id in coin_ids:
+        count = archive.archive_coin(coin_id, cutoff)
+        if count:
+            moved[coin_id] = count
+            logger.info(f"Archived {count} candles for {coin_id}.")
+    return moved
+
+def _merge_archive(archive, coin_id, live, start, end):
+    """
+    Arşivdeki eski mumları canlı veriyle birleştirir; çakışan zaman damgalarında canlı kayıt kalır.
+    Çağıran, coin'in arşivi olduğunu (has_archive) önceden doğrulamış olmalıdır.
+    """
+    try:
+        cold = archive.read(coin_id, start, end)
+    except ImportError as e:
+        logger.error(f"Archived candles for {coin_id} skipped: {e}")
+        return live
+    if cold.empty:
+        return live
+    if not live.empty and "timestamp" in live.columns and live["timestamp"].dt.tz is None:
+        cold["timestamp"] = cold["timestamp"].dt.tz_convert(None)
+    merged = pd.concat([cold, live], ignore_index=True)
+    merged = merged.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    return merged.reset_index(drop=True)
+
+def get_candle_series(coin_id):
+    """
+    Mumları DataFrame yerine dizi tabanlı CandleSeries olarak döndürür.
+    Sadece OHLCV alanları okunur; coin_id eşleşmezse get_market_data geri dönüşleri kullanılır.
+    """
+    series = _snapshot_series(coin_id)
+    if series is not None:
+        return series
+    return _query_candle_series(coin_id)
+
+def _query_candle_series(coin_id):
+    if MarketArchive(db, ARCHIVE_DIR).has_archive(coin_id):
+        return CandleSeries.from_dataframe(get_market_data(coin_id))
+    projection = {"_id": 0, "timestamp": 1, "price": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+    try:
+        docs = list(market_collection.find(
+            {"coin_id": coin_id, "price": {"$nin": [None, 0]}}, projection
+        ).sort("timestamp", 1))
+        if docs:
+            return CandleSeries.from_documents(docs)
+        return CandleSeries.from_dataframe(get_market_data(coin_id))
+    except Exception:
+        return CandleSeries.empty_series()
+
+def iter_market_data_chunks(coin_id, chunk_size=100000, fields=("timestamp", "price")):
+    """
+    Mongo imlecinden (cursor) mumları zaman sırasıyla sabit boyutlu DataFrame blokları
+    halinde akıtır. Tüm geçmiş belleğe alınmaz; bellek kullanımı chunk_size ile sınırlıdır.
+    Arşivlenmiş aylar varsa önce onlar (ay ay) okunur.
+    """
+    archive = MarketArchive(db, ARCHIVE_DIR)
+    state = archive.state(coin_id)
+    archived_through = None
+    if state and state.get("months"):
+        archived_through = _as_utc(state["archived_through"])
+        for month in archive.iter_months(coin_id, state=state):
+            month = month[[f for f in fields if f in month.columns]]
+            for offset in range(0, len(month), chunk_size):
+                yield month.iloc[offset:offset + chunk_size].reset_index(drop=True)
+
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in fields})
+    cursor = market_collection.find(
+        {"coin_id": coin_id, "price": {"$nin": [None, 0]}}, projection
+    ).sort("timestamp", 1).batch_size(min(chunk_size, 10000))
+
+    rows = []
+    for doc in cursor:
+        rows.append(doc)
+        if len(rows) >= chunk_size:
+            yield _chunk_frame(rows, archived_through)
+            rows = []
+    if rows:
+        yield _chunk_frame(rows, archived_through)
+
+def _chunk_frame(rows, archived_through=None):
+    df = pd.DataFrame(rows)
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        if archived_through is not None:
+            # Arşivde de bulunan (tekrar ingest edilmiş) mumlar atlanır
+            df = df[pd.to_datetime(df["timestamp"], utc=True) > archived_through].reset_index(drop=True)
+    return df
+
 fake = Faker()
 
 def seed_users_into_code(count=25):
@@ -130,6 +336,7 @@ def seed_users_into_code(count=25):
             fake_users.append(user)
         
         users_collection.insert_many(fake_users)
+        bump_users_version()
         logger.info("Secure initial database ready!")
 
 def initialize_database():
@@ -149,6 +356,7 @@ def initialize_database():
             "last_active": datetime.now()
         }
         users_collection.insert_one(admin_user)
+        bump_users_version()
         logger.info("Admin 'admin_zeynep' successfully injected into database!")
 
     seed_users_into_code(25) 
@@ -0,0 +1,172 @@
+"""
+Market Snapshot - market_data'nın yerel, bellek eşlemeli (memory-mapped) anlık görüntüsü
+
+Her coin için OHLCV sütunları ayrı `.npy` dosyalarına yazılır ve `np.load(mmap_mode='r')`
+ile kopyalanmadan okunur. İsteğe bağlı `arrow` biçiminde sütunlar tek bir sıkıştırılmamış
+Arrow IPC dosyasına yazılır ve `pyarrow.memory_map` ile yine kopyalanmadan okunur (pyarrow
+sadece bu biçim kullanılırken import edilir). `manifest.json` her coin'in veri sürümünü
+(data version) ve dosya biçimini tutar; yenileme sadece sürümü veya biçimi değişen coinleri
+yeniden yazar.
+
+Dizin yapısı:
+    <dizin>/manifest.json
+    <dizin>/<coin_id>/v<sürüm>/{timestamps,open,high,low,close,volume}.npy   (npy)
+    <dizin>/<coin_id>/v<sürüm>/candles.arrow                                (arrow)
+
+Yeni sürüm önce ayrı bir alt dizine yazılır, ardından manifest atomik olarak
+(os.replace) değiştirilir; eski sürüm dizini en son silinir.
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+from candle_series import CandleSeries
+
+SNAPSHOT_DIR = os.environ.get(
+    "MARKET_SNAPSHOT_DIR", os.path.join(os.environ.get("ANALYSIS_DATA_DIR", "analysis"), "market_snapshot")
+)
+SNAPSHOT_FORMAT = os.environ.get("MARKET_SNAPSHOT_FORMAT", "npy")
+FILE_FORMATS = ("npy", "arrow")
+MANIFEST_NAME = "manifest.json"
+ARROW_FILE = "candles.arrow"
+FORMAT_VERSION = 1
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the Arrow snapshot format (pip install pyarrow)") from e
+    return pyarrow
+
+
+class MarketSnapshot:
+    """Snapshot dizinini okuyan ve artımlı (incremental) yenileyen sınıf."""
+
+    def __init__(self, directory=SNAPSHOT_DIR, file_format=SNAPSHOT_FORMAT):
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {file_format}. Use one of: {', '.join(FILE_FORMATS)}")
+        self.directory = directory
+        self.file_format = file_format
+        self._manifest = None
+        self._manifest_mtime = None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def manifest(self):
+        """Manifest içeriği; dosya değişmedikçe önbellekten döner."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return {"format": FORMAT_VERSION, "coins": {}}
+        if self._manifest is None or mtime != self._manifest_mtime:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def entry(self, coin_id):
+        return self.manifest()["coins"].get(coin_id)
+
+    def is_fresh(self, coin_id, version):
+        """Snapshot'taki coin, verilen veri sürümüyle aynıysa True."""
+        entry = self.entry(coin_id)
+        return entry is not None and entry["version"] == version
+
+    def load(self, coin_id):
+        """Coin'in mumlarını bellek eşlemeli CandleSeries olarak döndürür; yoksa None."""
+        entry = self.entry(coin_id)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry["path"])
+        if entry.get("format", "npy") == "arrow":
+            return _load_arrow(os.path.join(path, ARROW_FILE))
+        return CandleSeries(*(
+            np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in CandleSeries.__slots__
+        ))
+
+    def write(self, coin_id, version, series):
+        """Coin'in yeni sürümünü yazar (manifest güncellenmez); göreli yolu döndürür."""
+        relative = os.path.join(_safe_name(coin_id), f"v{version}")
+        path = os.path.join(self.directory, relative)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        if self.file_format == "arrow":
+            _write_arrow(os.path.join(path, ARROW_FILE), series)
+            return relative
+        for name in CandleSeries.__slots__:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(series, name)))
+        return relative
+
+    def refresh(self, versions, load_series, force=False):
+        """
+        Sürümü değişen coinleri yeniden yazar.
+        versions: {coin_id: veri sürümü}, load_series: coin_id -> CandleSeries (Mongo'dan)
+        Dönüş: yenilenen coin listesi
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = json.loads(json.dumps(self.manifest()))
+        stale_paths = []
+        refreshed = []
+
+        for coin_id, version in versions.items():
+            entry = manifest["coins"].get(coin_id)
+            if (not force and entry is not None and entry["version"] == version
+                    and entry.get("format", "npy") == self.file_format):
+                continue
+            series = load_series(coin_id)
+            if series is None or series.empty:
+                continue
+            relative = self.write(coin_id, version, series)
+            if entry is not None and entry["path"] != relative:
+                stale_paths.append(entry["path"])
+            manifest["coins"][coin_id] = {
+                "version": version,
+                "path": relative,
+                "format": self.file_format,
+                "rows": len(series),
+                "first_timestamp": int(series.timestamps[0]),
+                "last_timestamp": int(series.timestamps[-1]),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            refreshed.append(coin_id)
+
+        if refreshed:
+            self._write_manifest(manifest)
+            for relative in stale_paths:
+                shutil.rmtree(os.path.join(self.directory, relative), ignore_errors=True)
+        return refreshed
+
+    def _write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def _write_arrow(path, series):
+    """Sütunları tek kayıt bloğu (record batch) olarak sıkıştırmasız Arrow IPC dosyasına yazar."""
+    pa = _require_pyarrow()
+    table = pa.table({name: np.ascontiguousarray(getattr(series, name)) for name in CandleSeries.__slots__})
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _load_arrow(path):
+    """Arrow IPC dosyasını bellek eşlemeli açar; NumPy sütunları dosyanın üzerine kopyasız görünümdür."""
+    pa = _require_pyarrow()
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all().combine_chunks()
+    return CandleSeries(*(
+        table.column(name).chunk(0).to_numpy(zero_copy_only=True) for name in CandleSeries.__slots__
+    ))
+
+
+def _safe_name(coin_id):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in coin_id)
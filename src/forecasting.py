@@ -0,0 +1,197 @@
+"""
+Forecasting - Kapalı form (closed-form) toplu fiyat tahmini ve model önbelleği
+
+Tüm coinler tek bir fiyat paneli (satır: zaman indeksi, sütun: coin) üzerinde
+vektörize olarak modellenir:
+  - 'linear': zaman indeksine karşı kapalı form OLS (sklearn gerekmez)
+  - 'holt'  : Holt doğrusal üstel düzeltme (exponential smoothing)
+  - 'ridge' : isteğe bağlı sklearn Ridge modeli (sadece bu tipte import edilir)
+Tahminler %95 güven bantları (confidence bands) ile döner. Uydurulan parametreler
+coin, model ve veri sürümü (data version) anahtarıyla önbelleğe alınır.
+"""
+import numpy as np
+
+MODEL_TYPES = ('linear', 'holt', 'ridge')
+DEFAULT_HORIZON = 7
+Z_95 = 1.96
+HOLT_ALPHA = 0.5
+HOLT_BETA = 0.1
+
+
+def build_panel(series_by_coin):
+    """
+    {coin: fiyat dizisi} sözlüğünden sola hizalı panel üretir.
+    Dönüş: (coins, panel[T×C], lengths[C]); kısa seriler NaN ile doldurulur.
+    """
+    coins = list(series_by_coin)
+    lengths = np.array([len(series_by_coin[c]) for c in coins], dtype=np.int64)
+    panel = np.full((int(lengths.max()) if len(coins) else 0, len(coins)), np.nan)
+    for j, coin in enumerate(coins):
+        panel[:lengths[j], j] = np.asarray(series_by_coin[coin], dtype=np.float64)
+    return coins, panel, lengths
+
+
+def fit_linear_panel(panel):
+    """
+    Her sütun için y = a + b·t kapalı form OLS çözümü (tek vektörize geçiş).
+    Dönüş sözlüğü sütun başına dizi içerir: intercept, slope, sigma, n, t_mean, sxx, last_price.
+    """
+    mask = ~np.isnan(panel)
+    y = np.where(mask, panel, 0.0)
+    t = np.arange(panel.shape[0], dtype=np.float64)[:, None]
+    tm = np.where(mask, t, 0.0)
+
+    n = mask.sum(axis=0).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = tm.sum(axis=0) / n
+        y_mean = y.sum(axis=0) / n
+        dt = np.where(mask, t - t_mean, 0.0)
+        dy = np.where(mask, y - y_mean, 0.0)
+        sxx = (dt * dt).sum(axis=0)
+        slope = (dt * dy).sum(axis=0) / sxx
+        intercept = y_mean - slope * t_mean
+        residuals = np.where(mask, y - (intercept + slope * t), 0.0)
+        sigma = np.sqrt((residuals * residuals).sum(axis=0) / np.maximum(n - 2, 1))
+
+    return {
+        'intercept': intercept,
+        'slope': slope,
+        'sigma': sigma,
+        'n': n,
+        't_mean': t_mean,
+        'sxx': sxx,
+        'last_price': _last_valid(panel, mask)
+    }
+
+
+def fit_holt_panel(panel, alpha=HOLT_ALPHA, beta=HOLT_BETA):
+    """
+    Holt doğrusal üstel düzeltme; zaman üzerinde tek döngü, coinler üzerinde vektörize.
+    Dönüş: level, trend, sigma (bir adım tahmin hatası std), n, last_price
+    """
+    mask = ~np.isnan(panel)
+    n = mask.sum(axis=0)
+    level = np.where(mask[0], panel[0], np.nan) if len(panel) else np.empty(0)
+    trend = np.zeros(panel.shape[1])
+    if len(panel) > 1:
+        trend = np.where(mask[1], panel[1] - panel[0], 0.0)
+
+    sq_errors = np.zeros(panel.shape[1])
+    for i in range(1, panel.shape[0]):
+        active = mask[i]
+        forecast = level + trend
+        error = np.where(active, panel[i] - forecast, 0.0)
+        new_level = alpha * panel[i] + (1 - alpha) * forecast
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+        sq_errors += error * error
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma = np.sqrt(sq_errors / np.maximum(n - 1, 1))
+
+    return {
+        'level': level,
+        'trend': trend,
+        'sigma': sigma,
+        'n': n.astype(np.float64),
+        'alpha': alpha,
+        'beta': beta,
+        'last_price': _last_valid(panel, mask)
+    }
+
+
+def fit_ridge(prices, alpha=1.0):
+    """sklearn Ridge modeli (isteğe bağlı bağımlılık; sadece bu model tipinde import edilir)."""
+    from sklearn.linear_model import Ridge
+
+    prices = np.asarray(prices, dtype=np.float64)
+    t = np.arange(len(prices), dtype=np.float64).reshape(-1, 1)
+    model = Ridge(alpha=alpha).fit(t, prices)
+    residuals = prices - model.predict(t)
+    sigma = float(np.sqrt((residuals ** 2).sum() / max(len(prices) - 2, 1)))
+    return {
+        'intercept': float(model.intercept_),
+        'slope': float(model.coef_[0]),
+        'sigma': sigma,
+        'n': float(len(prices)),
+        't_mean': float(t.mean()),
+        'sxx': float(((t - t.mean()) ** 2).sum()),
+        'last_price': float(prices[-1])
+    }
+
+
+def _last_valid(panel, mask):
+    if panel.size == 0:
+        return np.empty(0)
+    last_idx = mask.sum(axis=0) - 1
+    return panel[np.maximum(last_idx, 0), np.arange(panel.shape[1])]
+
+
+def column_params(params, j):
+    """Panel parametrelerinden tek coin'in skaler parametrelerini çıkarır."""
+    return {k: (float(v[j]) if isinstance(v, np.ndarray) else v) for k, v in params.items()}
+
+
+def forecast(params, model='linear', horizon=DEFAULT_HORIZON):
+    """Tek coin parametrelerinden `horizon` adımlık tahmin ve %95 bantları üretir."""
+    steps = np.arange(1, horizon + 1, dtype=np.float64)
+    if model == 'holt':
+        predicted = params['level'] + steps * params['trend']
+        alpha, beta = params['alpha'], params['beta']
+        # Holt tahmin varyansı: σ²·(1 + Σ_{j<h} α²(1 + jβ)²)
+        j = np.arange(1, horizon, dtype=np.float64)
+        increments = np.concatenate([[0.0], np.cumsum((alpha * (1 + j * beta)) ** 2)])
+        se = params['sigma'] * np.sqrt(1 + increments)
+    else:
+        t_future = params['n'] - 1 + steps
+        predicted = params['intercept'] + params['slope'] * t_future
+        leverage = (t_future - params['t_mean']) ** 2 / params['sxx'] if params['sxx'] else 0.0
+        se = params['sigma'] * np.sqrt(1 + 1 / params['n'] + leverage)
+
+    return [
+        {
+            "day": f"+{i+1} Day",
+            "predicted_price": round(float(p), 4),
+            "lower_bound": round(float(p - Z_95 * s), 4),
+            "upper_bound": round(float(p + Z_95 * s), 4)
+        }
+        for i, (p, s) in enumerate(zip(predicted, se))
+    ]
+
+
+def fit_models(series_by_coin, model='linear'):
+    """Tüm coinleri tek panelde uydurur; {coin: parametreler} döndürür."""
+    if model not in MODEL_TYPES:
+        raise ValueError(f"Unknown model type: {model}")
+    if model == 'ridge':
+        return {coin: fit_ridge(prices) for coin, prices in series_by_coin.items()}
+
+    coins, panel, _ = build_panel(series_by_coin)
+    params = fit_holt_panel(panel) if model == 'holt' else fit_linear_panel(panel)
+    return {coin: column_params(params, j) for j, coin in enumerate(coins)}
+
+
+class ForecastModelCache:
+    """
+    (coin, model) başına son uydurulan parametreleri veri sürümü ile saklar.
+    Sürüm değişince eski kayıt geçersiz sayılır ve yeniden uydurulur.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, coin_id, model, version):
+        entry = self._entries.get((coin_id, model))
+        if entry and entry[0] == version:
+            return entry[1]
+        return None
+
+    def put(self, coin_id, model, version, params):
+        self._entries[(coin_id, model)] = (version, params)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,106 @@
+"""
+JSON Response - Vektörize DataFrame serileştirme ve hızlı JSON yanıtları
+
+Rotalar kayıt başına `pd.isna`/isinstance kontrolleri yerine bu modülü kullanır:
+  - frame_records: zaman damgası sütunu tek seferde ISO-8601 UTC metnine çevrilir,
+    NaN/NaT değerleri sütun bazında toplu olarak None (null) yapılır
+  - dumps: orjson kuruluysa NumPy skalerleri/dizileri doğrudan kodlanır (NaN/inf → null);
+    yoksa standart json modülüne, değerler temizlenerek düşülür
+  - json_response: serileştirilmiş baytlarla Flask yanıtı
+
+Çıktı jsonify ile uyumludur: anahtarlar sıralanır, gömülü datetime değerleri HTTP tarih
+biçiminde (Flask varsayılanı) kodlanır.
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from flask import Response
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # isteğe bağlı hızlı kodlayıcı
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (
+        orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+def format_timestamps(values, suffix='Z'):
+    """
+    Zaman damgası sütununu tek geçişte ISO-8601 UTC metnine çevirir (saat dilimsiz değerler UTC sayılır).
+    Metin sütunlarında çözümlenemeyen değerler olduğu gibi, eksikler None kalır.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        parsed = values.dt.tz_localize('UTC') if values.dt.tz is None else values.dt.tz_convert('UTC')
+    elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+        parsed = pd.to_datetime(values, utc=True, errors='coerce', format='mixed')
+    else:
+        return values.astype(object).where(values.notna(), None)
+
+    # strftime yerine NumPy'nin ISO biçimleyicisi; mikrosaniye sadece sıfır değilse yazılır
+    utc = parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[us]')
+    text = np.datetime_as_string(utc, unit='s')
+    fractional = (utc.astype(np.int64) % 1_000_000) != 0
+    if fractional.any():
+        text = np.where(fractional, np.datetime_as_string(utc, unit='us'), text)
+    text = pd.Series(np.char.add(text.astype(str), suffix), index=values.index, dtype=object)
+    fallback = values.astype(object).where(values.notna(), None)
+    return text.where(parsed.notna(), fallback)
+
+
+def frame_records(df, timestamp_column='timestamp', suffix='Z'):
+    """DataFrame → kayıt listesi; NaN/NaT → None, zaman damgaları ISO-8601 UTC (sütun bazında)."""
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        if name == timestamp_column:
+            values = format_timestamps(values, suffix)
+        else:
+            values = values.astype(object).where(values.notna(), None)
+        columns.append(values.tolist())
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _default(value):
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _sanitize(value):
+    """Standart json yolu için: NaN/inf → None, NumPy değerleri → Python değerleri."""
+    if isinstance(value, dict):
+        return {key: _sanitize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)) or value is pd.NaT:
+        return _sanitize(_default(value))
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def dumps(payload):
+    """JSON baytları; NaN/±inf null olarak kodlanır."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(_sanitize(payload), default=_default, sort_keys=True, allow_nan=False).encode()
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,268 @@
+"""
+Leaderboard - Artımlı (incremental) güncellenen yatırımcı sıralaması
+
+Her kullanıcı için pozisyonlar (coin başına miktar ve maliyet), güncel portföy değeri
+ve kâr/zarar yüzdesi (pnl_percent) `leaderboard` koleksiyonunda tutulur. pnl_percent
+üzerindeki azalan indeks ilk K kullanıcıyı O(K) sürede verir (top-K).
+
+Güncellemeler tam tarama yapmaz:
+  - Kullanıcı eklenince/değişince sadece o kullanıcının kaydı yeniden hesaplanır.
+  - Bir coin'in fiyatı değişince `coin_ids` çok anahtarlı indeksi (coin → holders)
+    ile sadece o coin'i tutan kullanıcıların değeri fark (delta) ile güncellenir.
+    Her pozisyon hangi fiyatla değerlendiğini (`price`) taşır; yazım okunan kayda
+    karşı koşulludur (compare-and-set), araya giren bir upsert_user ezilmez.
+
+Fiyatı bilinmeyen coinler maliyetinden (alış fiyatı) değerlenir.
+"""
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+from portfolio import TradeBook, user_totals
+
+logger = logging.getLogger(__name__)
+
+USERS_COLLECTION = "leaderboard"
+COINS_COLLECTION = "leaderboard_coins"
+SUMMARY_COLLECTION = "leaderboard_summary"
+SUMMARY_ID = "summary"
+MAX_K = 100
+MAX_WRITE_ATTEMPTS = 5
+
+
+def _pnl_percent(buy_value, current_value):
+    return (current_value - buy_value) / (buy_value + 1e-10) * 100
+
+
+def _holding_value(holding, price):
+    return holding["amount"] * price if price is not None else holding["cost"]
+
+
+class Leaderboard:
+    """
+    Kalıcı (persistent) yatırımcı sıralaması.
+    database: pymongo Database nesnesi (test için mongomock da olabilir).
+    """
+
+    def __init__(self, database):
+        self.users_collection = database[USERS_COLLECTION]
+        self.coins_collection = database[COINS_COLLECTION]
+        self.summary_collection = database[SUMMARY_COLLECTION]
+
+    def is_built(self):
+        return self.summary_collection.find_one({"_id": SUMMARY_ID}) is not None
+
+    def users_version(self):
+        """Sıralamanın yansıttığı kullanıcı koleksiyonu sürümü; kurulmamışsa None."""
+        summary = self.summary_collection.find_one({"_id": SUMMARY_ID}, {"users_version": 1})
+        return summary.get("users_version") if summary else None
+
+    def _ensure_indexes(self):
+        self.users_collection.create_index("username", unique=True)
+        self.users_collection.create_index([("pnl_percent", -1), ("username", 1)])
+        self.users_collection.create_index("coin_ids")
+        self.coins_collection.create_index("coin_id", unique=True)
+        self.coins_collection.create_index([("trade_count", -1), ("coin_id", 1)])
+
+    def _prices(self, coin_ids):
+        docs = self.coins_collection.find({"coin_id": {"$in": list(coin_ids)}}, {"_id": 0, "coin_id": 1, "price": 1})
+        return {doc["coin_id"]: doc.get("price") for doc in docs}
+
+    def rebuild(self, users, current_prices, users_version=None):
+        """Tüm sıralamayı kullanıcı belgelerinden vektörize olarak yeniden kurar."""
+        self._ensure_indexes()
+        book = TradeBook.from_users(users)
+        totals = user_totals(book, current_prices)
+        n_coins = len(book.coins)
+
+        # (kullanıcı, coin) hücreleri başına miktar ve maliyet (bincount ile groupby)
+        cells = book.user_codes * n_coins + book.coin_codes
+        size = len(users) * n_coins
+        amounts = np.bincount(cells, weights=book.amounts, minlength=size).reshape(len(users), n_coins)
+        costs = np.bincount(cells, weights=book.amounts * book.buy_prices, minlength=size).reshape(len(users), n_coins)
+        cell_counts = np.bincount(cells, minlength=size).reshape(len(users), n_coins)
+
+        self.users_collection.delete_many({})
+        docs = []
+        for i, user in enumerate(users):
+            columns = np.flatnonzero(cell_counts[i])
+            docs.append({
+                "username": user.get("username"),
+                "wallet_balance": user.get("wallet_balance", 0),
+                "holdings": [
+                    {"coin": book.coins[j], "amount": float(amounts[i, j]), "cost": float(costs[i, j]),
+                     "price": current_prices.get(book.coins[j])}
+                    for j in columns
+                ],
+                "coin_ids": [book.coins[j] for j in columns],
+                "trades_by_coin": [{"coin": book.coins[j], "count": int(cell_counts[i, j])} for j in columns],
+                "trade_count": int(totals["trade_count"][i]),
+                "buy_value": float(totals["buy_value"][i]),
+                "current_value": float(totals["current_value"][i]),
+                "pnl_percent": float(totals["pnl_percent"][i])
+            })
+        if docs:
+            self.users_collection.insert_many(docs)
+
+        self.coins_collection.delete_many({})
+        counts = np.bincount(book.coin_codes, minlength=n_coins)
+        coin_docs = [
+            {"coin_id": coin, "price": current_prices.get(coin), "trade_count": int(counts[j])}
+            for j, coin in enumerate(book.coins)
+        ]
+        if coin_docs:
+            self.coins_collection.insert_many(coin_docs)
+
+        self.summary_collection.replace_one({"_id": SUMMARY_ID}, {
+            "_id": SUMMARY_ID,
+            "total_liquidity": float(sum(user.get("wallet_balance", 0) for user in users)),
+            "total_investors": len(users),
+            "users_version": users_version,
+            "updated_at": datetime.now(timezone.utc)
+        }, upsert=True)
+        return len(docs)
+
+    def upsert_user(self, user, users_version=None):
+        """
+        Tek kullanıcının kaydını (ör. kayıt sonrası) yeniden hesaplar. users_version verilirse
+        sıralama bir önceki sürümü yansıtıyorsa yeni sürüme ilerletilir; arada başka bir yazım
+        olduysa sürüm eski kalır ve bir sonraki okuma tam yeniden kurar.
+        """
+        username = user.get("username")
+        old = self.users_collection.find_one({"username": username}, {"_id": 0})
+
+        holdings = {}
+        for trade in user.get("trades", []):
+            holding = holdings.setdefault(trade["coin"], {"coin": trade["coin"], "amount": 0.0, "cost": 0.0})
+            holding["amount"] += trade["amount"]
+            holding["cost"] += trade["amount"] * trade["buy_price"]
+        doc = self._entry(username, user.get("wallet_balance", 0), list(holdings.values()),
+                          len(user.get("trades", [])))
+
+        # Coin işlem sayıları ve özet, eski kaydın katkısı çıkarılarak güncellenir
+        old_counts = self._trade_counts(old.get("trades_by_coin", []) if old else [])
+        new_counts = {trade["coin"]: 0 for trade in user.get("trades", [])}
+        for trade in user.get("trades", []):
+            new_counts[trade["coin"]] += 1
+        for coin in set(old_counts) | set(new_counts):
+            delta = new_counts.get(coin, 0) - old_counts.get(coin, 0)
+            if delta:
+                self.coins_collection.update_one({"coin_id": coin}, {"$inc": {"trade_count": delta}}, upsert=True)
+        doc["trades_by_coin"] = [{"coin": coin, "count": count} for coin, count in new_counts.items()]
+
+        self.users_collection.replace_one({"username": username}, doc, upsert=True)
+        self.summary_collection.update_one({"_id": SUMMARY_ID}, {
+            "$inc": {
+                "total_liquidity": doc["wallet_balance"] - (old["wallet_balance"] if old else 0),
+                "total_investors": 0 if old else 1
+            },
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        }, upsert=True)
+        if users_version is not None:
+            self.summary_collection.update_one(
+                {"_id": SUMMARY_ID, "users_version": users_version - 1},
+                {"$set": {"users_version": users_version}}
+            )
+        return doc
+
+    def _entry(self, username, wallet_balance, holdings, trade_count):
+        prices = self._prices(h["coin"] for h in holdings)
+        for holding in holdings:
+            holding["price"] = prices.get(holding["coin"])
+        buy_value = sum(h["cost"] for h in holdings)
+        current_value = sum(_holding_value(h, prices.get(h["coin"])) for h in holdings)
+        return {
+            "username": username,
+            "wallet_balance": wallet_balance,
+            "holdings": holdings,
+            "coin_ids": [h["coin"] for h in holdings],
+            "trade_count": trade_count,
+            "buy_value": buy_value,
+            "current_value": current_value,
+            "pnl_percent": _pnl_percent(buy_value, current_value)
+        }
+
+    @staticmethod
+    def _trade_counts(trades_by_coin):
+        return {item["coin"]: item["count"] for item in trades_by_coin}
+
+    def update_price(self, coin_id, price):
+        """
+        Coin'in son fiyatını işler; sadece coin'i tutan kullanıcılar (coin → holders) güncellenir.
+        Dönüş: güncellenen kullanıcı sayısı
+        """
+        if price is None:
+            return 0
+        price = float(price)
+        coin = self.coins_collection.find_one({"coin_id": coin_id})
+        old_price = coin.get("price") if coin else None
+        if old_price == price:
+            return 0
+        self.coins_collection.update_one({"coin_id": coin_id}, {"$set": {"price": price}}, upsert=True)
+
+        projection = {"_id": 0, "username": 1, "holdings": 1, "buy_value": 1, "current_value": 1}
+        updated = 0
+        for doc in self.users_collection.find({"coin_ids": coin_id}, projection):
+            updated += self._revalue(doc, coin_id, price, old_price, projection)
+        return updated
+
+    def _revalue(self, doc, coin_id, price, old_price, projection):
+        """Kullanıcının coin pozisyonunu yeni fiyata taşır; kayıt araya giren yazımla değiştiyse yeniden okunur."""
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            holding = next((h for h in doc["holdings"] if h["coin"] == coin_id), None)
+            if holding is None:
+                return 0
+            # Eski kayıtlarda pozisyon fiyatı yoksa coin'in önceki fiyatından değerlenmiştir
+            valued_at = holding.get("price", old_price)
+            if valued_at == price:
+                return 0
+            current_value = doc["current_value"] + _holding_value(holding, price) - _holding_value(holding, valued_at)
+            holdings = [dict(h, price=price) if h["coin"] == coin_id else h for h in doc["holdings"]]
+            result = self.users_collection.update_one(
+                {"username": doc["username"], "holdings": doc["holdings"], "current_value": doc["current_value"]},
+                {"$set": {
+                    "holdings": holdings,
+                    "current_value": current_value,
+                    "pnl_percent": _pnl_percent(doc["buy_value"], current_value)
+                }}
+            )
+            if result.matched_count:
+                return 1
+            doc = self.users_collection.find_one({"username": doc["username"]}, projection)
+            if doc is None:
+                return 0
+        logger.warning(f"Leaderboard entry for {doc['username']} kept changing; {coin_id} price not applied")
+        return 0
+
+    def top(self, k=10):
+        """pnl_percent'e göre ilk K kullanıcı (indeksli sıralı okuma)."""
+        k = max(1, min(int(k), MAX_K))
+        cursor = self.users_collection.find(
+            {}, {"_id": 0, "username": 1, "pnl_percent": 1, "current_value": 1, "buy_value": 1, "trade_count": 1}
+        ).sort([("pnl_percent", -1), ("username", 1)]).limit(k)
+        return [
+            {
+                "rank": rank,
+                "username": doc["username"],
+                "pnl_percent": round(doc["pnl_percent"], 2),
+                "portfolio_value": round(doc["current_value"], 2),
+                "pnl": round(doc["current_value"] - doc["buy_value"], 2),
+                "trade_count": doc["trade_count"]
+            }
+            for rank, doc in enumerate(cursor, start=1)
+        ]
+
+    def overview(self):
+        """calculate_exchange_overview ile aynı biçimde borsa özeti; tam tarama yapılmaz."""
+        summary = self.summary_collection.find_one({"_id": SUMMARY_ID}) or {}
+        leader = self.top(1)
+        popular = self.coins_collection.find_one(
+            {"trade_count": {"$gt": 0}}, {"_id": 0, "coin_id": 1}, sort=[("trade_count", -1), ("coin_id", 1)]
+        )
+        return {
+            "king": {"username": leader[0]["username"], "pnl_percent": leader[0]["pnl_percent"]} if leader else None,
+            "total_liquidity": round(summary.get("total_liquidity", 0), 2),
+            "most_popular_coin": popular["coin_id"].upper() if popular else "N/A",
+            "total_investors": summary.get("total_investors", 0)
+        }
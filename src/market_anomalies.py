@@ -0,0 +1,154 @@
+"""
+Market Anomalies - Tüm fiyat paneli üzerinde tek geçişte anomali taraması
+
+get_anomaly_summary'deki dört dedektör (z-score, IQR, kayan pencere, ani değişim)
+zaman × coin panelinin tamamına sütun bazında vektörize uygulanır:
+  - zscore : |(p - ortalama) / std| > eşik (coin başına tüm geçmiş)
+  - iqr    : p < Q1 - k·IQR veya p > Q3 + k·IQR
+  - rolling: kayan ortalama/std (kümülatif toplamlar) ile |z| > eşik
+  - spike  : bir önceki gözleme göre |değişim| > yüzde eşiği
+Panelde eksik günler NaN'dır; kayan pencere sadece `window` ardışık gözlemde tanımlıdır.
+
+Her zaman damgası için anomali görülen coin sayısı hesaplanır; gözlenen coinlerin
+`event_share` oranını (ve en az `min_coins`) aşan günler piyasa geneli olay sayılır.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('zscore', 'iqr', 'rolling', 'price_spike')
+DEFAULT_EVENT_SHARE = 0.3
+DEFAULT_MIN_COINS = 3
+CACHE_MAX_ENTRIES = int(os.getenv("MARKET_ANOMALY_CACHE_MAX_ENTRIES", "16"))
+
+
+def _rolling_zscore(prices, window):
+    """Sütun başına kayan z-skoru (T × C); pencerede eksik gözlem varsa NaN."""
+    observed = ~np.isnan(prices)
+    # Sayısal kararlılık için sütun ortalamasına göre merkezlenir
+    centered = np.where(observed, prices - np.nanmean(prices, axis=0), 0.0)
+    zeros = np.zeros((1, prices.shape[1]))
+    s1 = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+    s2 = np.concatenate([zeros, np.cumsum(centered ** 2, axis=0)])
+    count = np.concatenate([zeros, np.cumsum(observed, axis=0)])
+
+    z = np.full(prices.shape, np.nan)
+    if len(prices) < window:
+        return z
+    sum1 = s1[window:] - s1[:-window]
+    sum2 = s2[window:] - s2[:-window]
+    full = (count[window:] - count[:-window]) == window
+    mean = sum1 / window
+    std = np.sqrt(np.clip((sum2 - sum1 * mean) / (window - 1), 0, None))
+    with np.errstate(invalid='ignore'):
+        z[window - 1:] = np.where(full, (centered[window - 1:] - mean) / (std + 1e-10), np.nan)
+    return z
+
+
+def detect(prices, zscore_threshold=3.0, iqr_multiplier=1.5, window=20, rolling_threshold=2.5,
+           spike_threshold=0.10):
+    """Dört dedektörün T × C bayrak matrisleri: {yöntem: bool dizisi}."""
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(prices, axis=0)
+        std = np.nanstd(prices, axis=0, ddof=1)
+        q1, q3 = np.nanquantile(prices, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+
+        # Ani değişim bir önceki gözleme göre ölçülür (eksik günler atlanır)
+        previous = pd.DataFrame(prices).ffill().shift(1).to_numpy()
+        change = prices / previous - 1
+
+        flags = {
+            'zscore': np.abs((prices - mean) / (std + 1e-10)) > zscore_threshold,
+            'iqr': (prices < q1 - iqr_multiplier * iqr) | (prices > q3 + iqr_multiplier * iqr),
+            'rolling': np.abs(_rolling_zscore(prices, window)) > rolling_threshold,
+            'price_spike': np.abs(change) > spike_threshold
+        }
+    return flags
+
+
+def scan(timestamps, coins, prices, event_share=DEFAULT_EVENT_SHARE, min_coins=DEFAULT_MIN_COINS, **options):
+    """
+    Panelin tamamını tarar. timestamps: int64 UTC ns [T], prices: T × C (eksik NaN)
+    Dönüş: coin ve yöntem bazında toplamlar, anomali görülen günlerin zaman çizelgesi ve
+    piyasa geneli olaylar (events)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    flags = detect(prices, **options)
+    observed = ~np.isnan(prices)
+    any_flag = np.zeros(prices.shape, dtype=bool)
+    for values in flags.values():
+        any_flag |= values
+
+    observed_count = observed.sum(axis=1)
+    anomalous = any_flag.sum(axis=1)
+    method_counts = {method: values.sum(axis=1) for method, values in flags.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.where(observed_count > 0, anomalous / observed_count, 0.0)
+    is_event = (anomalous >= min_coins) & (share >= event_share)
+
+    iso = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), utc=True)
+    timeline = [
+        {
+            "timestamp": iso[t].isoformat(),
+            "observed": int(observed_count[t]),
+            "anomalous": int(anomalous[t]),
+            "share": round(float(share[t]), 4),
+            "methods": {method: int(counts[t]) for method, counts in method_counts.items()},
+            "market_event": bool(is_event[t])
+        }
+        for t in np.flatnonzero(anomalous)
+    ]
+    per_coin = any_flag.sum(axis=0)
+    return {
+        "coins": len(coins),
+        "timestamps": len(timestamps),
+        "method_totals": {method: int(values.sum()) for method, values in flags.items()},
+        "most_anomalous": [
+            {"coin": coins[j], "anomalies": int(per_coin[j])}
+            for j in np.argsort(-per_coin, kind='stable')[:10] if per_coin[j]
+        ],
+        "events": [row for row in timeline if row["market_event"]],
+        "timeline": timeline
+    }
+
+
+class MarketAnomalyCache:
+    """
+    Parametre seti başına son tarama sonucunu evrenin veri sürümleri anahtarı ile saklar.
+    Parametreleri istemci seçtiği için en fazla `max_entries` set tutulur (LRU).
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, params, versions_key):
+        with self._lock:
+            entry = self._entries.get(params)
+            if entry is None:
+                return None
+            if entry[0] != versions_key:
+                del self._entries[params]
+                return None
+            self._entries.move_to_end(params)
+            return entry[1]
+
+    def put(self, params, versions_key, result):
+        with self._lock:
+            self._entries[params] = (versions_key, result)
+            self._entries.move_to_end(params)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,166 @@
+"""
+Monte Carlo - Vektörize yol simülasyonu ile VaR, CVaR ve tahmin yelpazesi (fan chart)
+
+Her blok, `chunk_size × horizon` boyutunda tek bir NumPy dizi işlemiyle üretilir:
+  - 'bootstrap': geçmiş log getirilerinden iadeli örnekleme (bootstrap)
+  - 'gbm'      : geometrik Brown hareketi (Geometric Brownian Motion), log getiri
+                 ortalaması ve std'sinden normal dağılımlı adımlar
+Her bloğun üreteci SeedSequence(seed).spawn ile türetilir; böylece aynı seed ve
+blok boyutu ile sonuç, işçi (process) sayısından bağımsız olarak tekrarlanabilir.
+
+VaR/CVaR için sadece ilk adım ve ufuk sonu getirileri gerekir; bloklar bu iki sütuna
+indirgenir ve bellek `n_paths × 2` ile sınırlı kalır. Tam `n_paths × horizon` matrisi
+yalnızca fan bantları istendiğinde tutulur.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+METHODS = ('bootstrap', 'gbm')
+DEFAULT_PATHS = int(os.getenv("MONTE_CARLO_PATHS", "10000"))
+DEFAULT_CHUNK_SIZE = int(os.getenv("MONTE_CARLO_CHUNK_SIZE", "10000"))
+DEFAULT_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "1"))
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+# Parçalı raporda bootstrap için tutulan log getiri örnekleminin boyutu
+RETURN_SAMPLE_SIZE = int(os.getenv("MONTE_CARLO_RETURN_SAMPLE", "100000"))
+
+
+def log_returns(prices):
+    """Fiyat dizisinden sonlu log getirileri."""
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[np.isfinite(prices) & (prices > 0)]
+    return np.diff(np.log(prices))
+
+
+def _simulate_chunk(task):
+    """Bir blok yol üretir; kümülatif log getiri matrisi (size × horizon) döndürür."""
+    seed_seq, size, horizon, method, returns, mu, sigma = task
+    rng = np.random.default_rng(seed_seq)
+    if method == 'bootstrap':
+        steps = returns[rng.integers(0, len(returns), size=(size, horizon))]
+    else:
+        steps = rng.normal(mu - 0.5 * sigma ** 2, sigma, size=(size, horizon))
+    return np.cumsum(steps, axis=1, out=steps)
+
+
+def _terminal_chunk(task):
+    """Bloğu üretip sadece ilk adım ve ufuk sonu kümülatif log getirilerini (size × 2) tutar."""
+    return _simulate_chunk(task)[:, [0, -1]]
+
+
+def _tasks(returns, horizon, n_paths, method, seed, chunk_size):
+    if method not in METHODS:
+        raise ValueError(f"Unknown simulation method: {method}")
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        raise ValueError("At least two returns are required for simulation")
+
+    mu = float(returns.mean())
+    sigma = float(returns.std(ddof=1))
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(s, size, horizon, method, returns, mu, sigma) for s, size in zip(seeds, sizes)]
+
+
+def _run(chunk_fn, tasks, out, workers):
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _fill(out, pool.map(chunk_fn, tasks))
+    else:
+        _fill(out, map(chunk_fn, tasks))
+    return np.expm1(out, out=out)
+
+
+def simulate_paths(returns, horizon=1, n_paths=DEFAULT_PATHS, method='bootstrap', seed=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    `n_paths × horizon` kümülatif basit getiri matrisi (fiyat / son fiyat - 1) üretir.
+    returns: geçmiş log getiriler; chunk_size geçici bellek kullanımını sınırlar,
+    workers > 1 ise bloklar süreç havuzunda (process pool) paralel üretilir.
+    """
+    tasks = _tasks(returns, horizon, n_paths, method, seed, chunk_size)
+    return _run(_simulate_chunk, tasks, np.empty((n_paths, horizon), dtype=np.float64), workers)
+
+
+def simulate_terminal(returns, horizon=1, n_paths=DEFAULT_PATHS, method='bootstrap', seed=None,
+                      chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    simulate_paths ile aynı yolların sadece ilk gün ve ufuk sonu basit getirileri (n_paths × 2).
+    Bellek blok başına `chunk_size × horizon` ile sınırlıdır.
+    """
+    tasks = _tasks(returns, horizon, n_paths, method, seed, chunk_size)
+    return _run(_terminal_chunk, tasks, np.empty((n_paths, 2), dtype=np.float64), workers)
+
+
+def _fill(paths, blocks):
+    offset = 0
+    for block in blocks:
+        paths[offset:offset + len(block)] = block
+        offset += len(block)
+
+
+def value_at_risk(path_returns, confidence_level=0.95):
+    """Simüle getirilerden (VaR, CVaR); tek np.partition geçişi ile."""
+    values = np.asarray(path_returns, dtype=np.float64)
+    k = int(np.floor((1 - confidence_level) * (len(values) - 1)))
+    part = np.partition(values, k)
+    var = float(part[k])
+    cvar = float(part[:k + 1].mean())
+    return var, cvar
+
+
+def fan_bands(paths, last_price, percentiles=FAN_PERCENTILES, overwrite=False):
+    """
+    Her gün için yüzdelik fiyat bantları (fan chart).
+    overwrite=True ise `paths` yerinde kısmi sıralanır; matrisin ikinci kopyası açılmaz.
+    """
+    bands = np.percentile(paths, percentiles, axis=0, overwrite_input=overwrite)
+    return [
+        {
+            "day": f"+{i+1} Day",
+            **{f"p{p}": round(float(last_price * (1 + bands[j, i])), 4) for j, p in enumerate(percentiles)}
+        }
+        for i in range(paths.shape[1])
+    ]
+
+
+def simulate_risk(prices, horizon=1, n_paths=DEFAULT_PATHS, method='bootstrap', seed=None,
+                  confidence_level=0.95, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, fan=False):
+    """
+    Fiyat geçmişinden Monte Carlo VaR / CVaR (yüzde) ve istenirse fan bantları üretir.
+    VaR günlük (1 adım) ve ufuk sonu (horizon) için ayrı raporlanır.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[np.isfinite(prices) & (prices > 0)]
+    return simulate_return_risk(log_returns(prices), prices[-1], horizon, n_paths, method, seed,
+                                confidence_level, workers, chunk_size, fan)
+
+
+def simulate_return_risk(returns, last_price, horizon=1, n_paths=DEFAULT_PATHS, method='bootstrap', seed=None,
+                         confidence_level=0.95, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, fan=False):
+    """simulate_risk'in log getirilerden çalışan hali (ör. parçalı raporun getiri örneklemi)."""
+    if fan:
+        paths = simulate_paths(returns, horizon, n_paths, method, seed, chunk_size, workers)
+        first, last = paths[:, 0], paths[:, -1]
+    else:
+        ends = simulate_terminal(returns, horizon, n_paths, method, seed, chunk_size, workers)
+        first, last = ends[:, 0], ends[:, 1]
+    daily_var, daily_cvar = value_at_risk(first, confidence_level)
+    horizon_var, horizon_cvar = value_at_risk(last, confidence_level)
+
+    result = {
+        'method': method,
+        'n_paths': n_paths,
+        'horizon': horizon,
+        'seed': seed,
+        'confidence_level': confidence_level * 100,
+        'var_daily': daily_var * 100,
+        'cvar_daily': daily_cvar * 100,
+        'var_horizon': horizon_var * 100,
+        'cvar_horizon': horizon_cvar * 100
+    }
+    if fan:
+        # VaR/CVaR yukarıda hesaplandı; yol matrisi artık bantlar için yerinde kullanılabilir
+        result['fan_chart'] = fan_bands(paths, last_price, overwrite=True)
+    return result
@@ -0,0 +1,217 @@
+"""
+Portfolio - Vektörize (columnar) portföy kâr/zarar (P&L) motoru
+
+İşlemler (trades) sütunlu dizilere dönüştürülür: kullanıcı kodu, coin kodu, miktar
+ve alış fiyatı. Coin adları tamsayı kodlara (pd.factorize) eşlenir; güncel fiyatlar
+coin kodu ile indekslenen tek bir dizi üzerinden tüm işlemlere dağıtılır. Kullanıcı
+ve coin bazındaki toplamlar np.bincount ile (groupby benzeri) tek geçişte hesaplanır.
+
+Tarihsel özkaynak eğrisi (equity curve), işlem defterinin coin fiyat paneline
+searchsorted ile as-of birleştirilmesiyle gün döngüsü olmadan hesaplanır.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10**9
+
+
+class TradeBook:
+    """Sütunlu işlem defteri; milyonlarca işlem tek dizi işlemiyle değerlenir."""
+
+    __slots__ = ('user_codes', 'coin_codes', 'amounts', 'buy_prices', 'users', 'coins', 'times')
+
+    def __init__(self, user_codes, coin_codes, amounts, buy_prices, users, coins, times=None):
+        self.user_codes = np.asarray(user_codes, dtype=np.int64)
+        self.coin_codes = np.asarray(coin_codes, dtype=np.int64)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.buy_prices = np.asarray(buy_prices, dtype=np.float64)
+        self.users = list(users)
+        self.coins = list(coins)
+        # İşlem zamanı (UTC nanosaniye); tarihi olmayan işlemler için NaT (int64 minimum)
+        self.times = None if times is None else np.asarray(times, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.coin_codes)
+
+    @classmethod
+    def from_arrays(cls, coins, amounts, buy_prices, user_ids=None, users=None):
+        """
+        Ham sütunlardan defter üretir. user_ids verilmezse tüm işlemler tek kullanıcıya aittir.
+        users: kullanıcı sırasını sabitlemek için (işlemi olmayan kullanıcılar dahil) tam liste
+        """
+        coin_codes, coin_index = pd.factorize(np.asarray(coins, dtype=object), sort=False)
+        if user_ids is None:
+            user_codes = np.zeros(len(coin_codes), dtype=np.int64)
+            users = users if users is not None else [None]
+        elif users is not None:
+            user_codes = pd.Index(users).get_indexer(np.asarray(user_ids, dtype=object))
+        else:
+            user_codes, users = pd.factorize(np.asarray(user_ids, dtype=object), sort=False)
+        return cls(user_codes, coin_codes, amounts, buy_prices, users, coin_index)
+
+    @classmethod
+    def from_users(cls, users, with_times=False):
+        """
+        MongoDB kullanıcı belgelerindeki `trades` listelerinden defter üretir.
+        with_times=True ise işlem tarihleri (`date`) de okunur (özkaynak eğrisi için).
+        """
+        usernames = [u.get('username') for u in users]
+        counts = np.fromiter((len(u.get('trades', [])) for u in users), dtype=np.int64, count=len(users))
+        trades = [t for u in users for t in u.get('trades', [])]
+        n = len(trades)
+        coin_codes, coins = pd.factorize(np.array([t['coin'] for t in trades], dtype=object), sort=False)
+        times = None
+        if with_times:
+            times = pd.to_datetime([t.get('date') for t in trades], utc=True, errors='coerce').as_unit('ns').asi8
+        return cls(
+            np.repeat(np.arange(len(users)), counts),
+            coin_codes,
+            np.fromiter((t['amount'] for t in trades), dtype=np.float64, count=n),
+            np.fromiter((t['buy_price'] for t in trades), dtype=np.float64, count=n),
+            usernames,
+            coins,
+            times
+        )
+
+    def price_vector(self, current_prices):
+        """Coin kodu ile indekslenen güncel fiyat dizisi; fiyatı bilinmeyen coinler NaN."""
+        return np.array([current_prices.get(coin, np.nan) for coin in self.coins], dtype=np.float64)
+
+    def current_prices(self, current_prices):
+        """İşlem başına güncel fiyat; fiyatı bilinmeyen coinlerde alış fiyatı kullanılır."""
+        if not len(self):
+            return np.empty(0)
+        prices = self.price_vector(current_prices)[self.coin_codes]
+        missing = np.isnan(prices)
+        prices[missing] = self.buy_prices[missing]
+        return prices
+
+
+def value_trades(book, current_prices):
+    """
+    İşlem başına değerleme.
+    Dönüş: (current_price, pnl, pnl_percent) dizileri
+    """
+    current = book.current_prices(current_prices)
+    pnl = (current - book.buy_prices) * book.amounts
+    pnl_percent = (current - book.buy_prices) / (book.buy_prices + 1e-10) * 100
+    return current, pnl, pnl_percent
+
+
+def user_totals(book, current_prices):
+    """
+    Kullanıcı bazında toplamlar (np.bincount ile groupby).
+    Dönüş: {'buy_value', 'current_value', 'pnl', 'pnl_percent', 'trade_count'} dizileri (kullanıcı sırası)
+    """
+    n_users = len(book.users)
+    current = book.current_prices(current_prices)
+    buy_value = np.bincount(book.user_codes, weights=book.buy_prices * book.amounts, minlength=n_users)
+    current_value = np.bincount(book.user_codes, weights=current * book.amounts, minlength=n_users)
+    return {
+        'buy_value': buy_value,
+        'current_value': current_value,
+        'pnl': current_value - buy_value,
+        'pnl_percent': (current_value - buy_value) / (buy_value + 1e-10) * 100,
+        'trade_count': np.bincount(book.user_codes, minlength=n_users)
+    }
+
+
+def coin_trade_counts(book):
+    """Coin kodu başına işlem sayısı."""
+    return np.bincount(book.coin_codes, minlength=len(book.coins))
+
+
+def _forward_fill(prices):
+    """Sütun bazında son geçerli fiyatı ileri taşır (as-of); ilk fiyattan öncesi NaN kalır."""
+    rows = np.where(np.isnan(prices), 0, np.arange(len(prices))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(prices, rows, axis=0)
+
+
+def equity_curve(book, timestamps, coins, prices, daily=True):
+    """
+    Defterin zaman içindeki portföy değeri ve kâr/zararı.
+    timestamps: int64[T] (UTC ns, artan), coins: panel sütunları, prices: float64[T × C] (eksik NaN)
+
+    Her işlem, zamanı ile panel ekseninde searchsorted ile konumlanır; pozisyon ve maliyet
+    değişimleri (satır, coin) hücrelerine bincount ile yazılıp kümülatif toplanır.
+    Fiyatı henüz bilinmeyen coinler maliyetinden (alış fiyatı) değerlenir.
+    Dönüş: {'timestamps', 'value', 'invested', 'pnl', 'pnl_percent'} dizileri
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    n_rows, n_coins = len(timestamps), len(book.coins)
+    empty = np.empty(0)
+    if not len(book) or not n_rows:
+        return {'timestamps': np.empty(0, dtype=np.int64), 'value': empty, 'invested': empty,
+                'pnl': empty, 'pnl_percent': empty}
+
+    # Panel sütunlarını defterin coin kodlarına hizala; panelde olmayan coin fiyatsız (NaN)
+    column_of = {coin: j for j, coin in enumerate(coins)}
+    coin_prices = np.full((n_rows, n_coins), np.nan)
+    for k, coin in enumerate(book.coins):
+        if coin in column_of:
+            coin_prices[:, k] = prices[:, column_of[coin]]
+    coin_prices = _forward_fill(coin_prices)
+
+    times = book.times if book.times is not None else np.full(len(book), np.iinfo(np.int64).min)
+    start = np.searchsorted(timestamps, times, side='left')
+    cells = start * n_coins + book.coin_codes
+    size = (n_rows + 1) * n_coins
+    quantity = np.bincount(cells, weights=book.amounts, minlength=size).reshape(n_rows + 1, n_coins)
+    cost = np.bincount(cells, weights=book.amounts * book.buy_prices, minlength=size).reshape(n_rows + 1, n_coins)
+    quantity = np.cumsum(quantity, axis=0)[:n_rows]
+    cost = np.cumsum(cost, axis=0)[:n_rows]
+
+    value = np.where(np.isnan(coin_prices), cost, quantity * coin_prices).sum(axis=1)
+    invested = cost.sum(axis=1)
+
+    # İlk işlemden önceki satırlar atılır; daily=True ise her UTC gününün son satırı tutulur
+    keep = np.zeros(n_rows, dtype=bool)
+    keep[min(int(start.min()), n_rows):] = True
+    if daily:
+        day = timestamps // NS_PER_DAY
+        keep &= np.append(day[1:] != day[:-1], True)
+
+    value, invested = value[keep], invested[keep]
+    pnl = value - invested
+    return {
+        'timestamps': timestamps[keep],
+        'value': value,
+        'invested': invested,
+        'pnl': pnl,
+        'pnl_percent': pnl / (invested + 1e-10) * 100
+    }
+
+
+def trades_fingerprint(trades):
+    """İşlem listesinin özeti; yeni işlem eklendiğinde değişir (önbellek anahtarı)."""
+    blob = json.dumps(trades, default=str, sort_keys=True).encode()
+    return hashlib.sha1(blob).hexdigest()
+
+
+class EquityCurveCache:
+    """
+    Kullanıcı başına son hesaplanan özkaynak eğrisini anahtarı ile saklar.
+    Anahtar işlem özeti + coin veri sürümlerinden oluşur; yeni işlem veya mum gelince değişir.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, username, key):
+        entry = self._entries.get(username)
+        if entry and entry[0] == key:
+            return entry[1]
+        return None
+
+    def put(self, username, key, curve):
+        self._entries[username] = (key, curve)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
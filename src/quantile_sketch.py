@@ -0,0 +1,275 @@
+"""
+Quantile Sketch - Uzun geçmişler için birleştirilebilir (mergeable) KLL çeyreklik taslağı
+
+KLL (Karnin-Lang-Liberty) taslağı, her biri 2^h ağırlıklı elemanlar tutan
+kompaktör seviyelerinden oluşur. Bellek O(k) civarındadır ve taslaklar zaman
+dilimleri (ör. aylık) arasında birleştirilebilir.
+
+Hata sınırı: normalize sıra hatası (normalized rank error), yani
+|tahmini_sıra - gerçek_sıra| / n, k=200 için tipik olarak %0.5'in altında,
+%99 olasılıkla yaklaşık 1.7/k (k=200 → ~%0.85) değerini aşmaz. `rank_error()`
+bu üst sınırı döndürür.
+"""
+import math
+import numpy as np
+
+DEFAULT_K = 200
+CAPACITY_DECAY = 2.0 / 3.0
+
+STATE_COLLECTION = "quantile_sketch_state"
+SKETCHES_COLLECTION = "quantile_sketches"
+
+
+class KLLSketch:
+    """Birleştirilebilir KLL çeyreklik taslağı (numpy dizileri ile vektörize)."""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def rank_error(k=DEFAULT_K):
+        """%99 olasılıklı normalize sıra hatası üst sınırı (yaklaşık)."""
+        return 1.7 / k
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _size(self):
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() > self._max_size():
+            for h, items in enumerate(self.levels):
+                if len(items) <= self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                keep = np.empty(0, dtype=np.float64)
+                if len(items) % 2:
+                    keep, items = items[:1], items[1:]
+                offset = int(self._rng.integers(0, 2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+                self.levels[h] = keep
+                break
+
+    def update(self, value):
+        self.update_many([value])
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Başka bir taslağı bu taslağa birleştirir (k değerleri aynı olmalıdır)."""
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** h, dtype=np.float64) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """Birden çok çeyreği tek sıralama ile döndürür."""
+        if self.n == 0:
+            return [np.nan for _ in qs]
+        values, cumulative = self._weighted_items()
+        total = cumulative[-1]
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                idx = int(np.searchsorted(cumulative, q * total, side='left'))
+                result.append(float(values[min(idx, len(values) - 1)]))
+        return result
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def rank(self, value):
+        """`value` değerinden küçük veya eşit elemanların tahmini oranı."""
+        if self.n == 0:
+            return np.nan
+        values, cumulative = self._weighted_items()
+        idx = int(np.searchsorted(values, value, side='right'))
+        return float(cumulative[idx - 1] / cumulative[-1]) if idx else 0.0
+
+    def mean_below(self, value):
+        """`value` değerine eşit veya küçük elemanların tahmini ortalaması (CVaR için)."""
+        if self.n == 0:
+            return np.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** h, dtype=np.float64) for h, items in enumerate(self.levels)])
+        mask = values <= value
+        if not mask.any():
+            return np.nan
+        return float((values[mask] * weights[mask]).sum() / weights[mask].sum())
+
+    def to_dict(self):
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+            'levels': [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(k=data.get('k', DEFAULT_K), seed=seed)
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in data.get('levels', [[]])] or [np.empty(0)]
+        sketch.n = data.get('n', 0)
+        if sketch.n:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def month_bucket(timestamp):
+    """'2024-03-15T00:00:00Z' -> '2024-03'"""
+    return str(timestamp)[:7]
+
+
+class QuantileSketchStore:
+    """
+    Coin başına aylık (zaman dilimi) fiyat ve günlük getiri taslaklarını MongoDB'de saklar.
+    Ingestion yeni mumları ilgili ayın taslağına ekler; okuma tarafı dilimleri birleştirir.
+    """
+
+    FIELDS = ('price', 'return')
+
+    def __init__(self, database, k=DEFAULT_K):
+        self.state_collection = database[STATE_COLLECTION]
+        self.sketches_collection = database[SKETCHES_COLLECTION]
+        self.k = k
+
+    def _load(self, coin_id, bucket, field):
+        doc = self.sketches_collection.find_one({'coin_id': coin_id, 'bucket': bucket, 'field': field}, {'_id': 0})
+        return KLLSketch.from_dict(doc['sketch']) if doc else KLLSketch(k=self.k)
+
+    def _save(self, coin_id, bucket, field, sketch):
+        self.sketches_collection.replace_one(
+            {'coin_id': coin_id, 'bucket': bucket, 'field': field},
+            {'coin_id': coin_id, 'bucket': bucket, 'field': field, 'sketch': sketch.to_dict()},
+            upsert=True
+        )
+
+    def update(self, coin_id, candles, column='price'):
+        """Daha önce işlenmemiş mumları aylık taslaklara ekler; eklenen mum sayısını döndürür."""
+        state = self.state_collection.find_one({'coin_id': coin_id}, {'_id': 0}) or {
+            'coin_id': coin_id, 'last_timestamp': None, 'last_price': None
+        }
+
+        batches = {}
+        processed = 0
+        for candle in candles:
+            ts = candle.get('timestamp')
+            price = candle.get(column)
+            if ts is None or price is None:
+                continue
+            if state['last_timestamp'] is not None and ts <= state['last_timestamp']:
+                continue
+            bucket = month_bucket(ts)
+            batch = batches.setdefault(bucket, {'price': [], 'return': []})
+            batch['price'].append(price)
+            if state['last_price']:
+                batch['return'].append(price / state['last_price'] - 1)
+            state['last_timestamp'] = ts
+            state['last_price'] = price
+            processed += 1
+
+        for bucket, batch in batches.items():
+            for field in self.FIELDS:
+                if batch[field]:
+                    sketch = self._load(coin_id, bucket, field)
+                    sketch.update_many(batch[field])
+                    self._save(coin_id, bucket, field, sketch)
+
+        self.state_collection.replace_one({'coin_id': coin_id}, state, upsert=True)
+        return processed
+
+    def get_sketch(self, coin_id, field='price', start_bucket=None, end_bucket=None):
+        """Belirtilen aralıktaki aylık taslakları birleştirir; taslak yoksa None döndürür."""
+        query = {'coin_id': coin_id, 'field': field}
+        if start_bucket or end_bucket:
+            query['bucket'] = {}
+            if start_bucket:
+                query['bucket']['$gte'] = start_bucket
+            if end_bucket:
+                query['bucket']['$lte'] = end_bucket
+        merged = None
+        for doc in self.sketches_collection.find(query, {'_id': 0}):
+            sketch = KLLSketch.from_dict(doc['sketch'])
+            merged = sketch if merged is None else merged.merge(sketch)
+        return merged
+
+    def coverage(self, coin_id, field='price'):
+        """Kalıcı taslakların kapsadığı aylar, eleman sayısı ve son işlenen mum; taslak yoksa None."""
+        docs = list(self.sketches_collection.find(
+            {'coin_id': coin_id, 'field': field}, {'_id': 0, 'bucket': 1, 'sketch.n': 1}
+        ).sort('bucket', 1))
+        if not docs:
+            return None
+        state = self.state_collection.find_one({'coin_id': coin_id}, {'_id': 0, 'last_timestamp': 1}) or {}
+        return {
+            'start_bucket': docs[0]['bucket'],
+            'end_bucket': docs[-1]['bucket'],
+            'buckets': len(docs),
+            'items': sum(doc['sketch'].get('n', 0) for doc in docs),
+            'last_timestamp': state.get('last_timestamp')
+        }
+
+    def summary(self, coin_id, confidence_level=0.95):
+        """
+        Kalıcı taslakların özeti; taslak yoksa None. Alan başına kapsama (bkz. coverage) ile
+        taslaktan okunan çeyrekler (price) ve tarihsel VaR/CVaR yüzdesi (return) döner.
+        Taslaklar takibin başladığı andan beri tüm geçmişi kapsar; canlı penceredeki
+        istatistiklerle aynı aralığı temsil etmez.
+        """
+        out = {}
+        price_sketch = self.get_sketch(coin_id, 'price')
+        if price_sketch is not None:
+            q1, median, q3 = price_sketch.quantiles((0.25, 0.5, 0.75))
+            out['price'] = {**self.coverage(coin_id, 'price'), 'q1': q1, 'median': median, 'q3': q3}
+        return_sketch = self.get_sketch(coin_id, 'return')
+        if return_sketch is not None:
+            var_historic = return_sketch.quantile(1 - confidence_level)
+            cvar = return_sketch.mean_below(var_historic)
+            out['return'] = {
+                **self.coverage(coin_id, 'return'),
+                'confidence_level': confidence_level * 100,
+                'var_historic': var_historic * 100,
+                'cvar': cvar * 100 if not math.isnan(cvar) else None
+            }
+        return out or None
@@ -0,0 +1,327 @@
+"""
+Resampling - Çoklu zaman dilimi (multi-timeframe) OHLCV toplamaları (rollup)
+
+Saklanan en ince aralıktaki mumlardan doğru OHLCV toplamaları üretilir:
+open=ilk, high=en büyük, low=en küçük, close=son, volume=toplam.
+Kova (bucket) başlangıçları veri başlangıcından bağımsızdır (epoch / takvim
+hizalı); bu sayede toplamalar birleştirilebilir (mergeable) ve yeni mumlar
+geldikçe sadece etkilenen son kova güncellenir.
+"""
+import pandas as pd
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+# Binance kline aralık adları -> kova hizalama kuralı
+INTERVALS = {
+    '1h': pd.Timedelta(hours=1),
+    '4h': pd.Timedelta(hours=4),
+    '12h': pd.Timedelta(hours=12),
+    '1d': pd.Timedelta(days=1),
+    '3d': pd.Timedelta(days=3),
+    '1w': 'W',
+    '1M': 'M'
+}
+# Kova başına tahmini süre (en ince aralığın tespiti ve karşılaştırma için)
+INTERVAL_SPANS = {
+    '1h': pd.Timedelta(hours=1),
+    '4h': pd.Timedelta(hours=4),
+    '12h': pd.Timedelta(hours=12),
+    '1d': pd.Timedelta(days=1),
+    '3d': pd.Timedelta(days=3),
+    '1w': pd.Timedelta(days=7),
+    '1M': pd.Timedelta(days=28)
+}
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'count']
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'count': 'sum'}
+
+# Kalıcı kovalar içerdikleri son temel mumun zamanını (kova filigranı) da tutar
+WATERMARK_AGGREGATIONS = {**AGGREGATIONS, 'last_timestamp': 'max'}
+
+STATE_COLLECTION = "rollup_state"
+ROLLUPS_COLLECTION = "market_rollups"
+DUPLICATE_KEY = 11000
+MAX_WRITE_ATTEMPTS = 5
+
+
+def base_interval(timestamps):
+    """Zaman damgaları arasındaki medyan farka en yakın aralık adını döndürür."""
+    ts = pd.Series(pd.to_datetime(timestamps)).sort_values()
+    if len(ts) < 2:
+        return '1d'
+    step = ts.diff().dropna().median()
+    return min(INTERVAL_SPANS, key=lambda name: abs(INTERVAL_SPANS[name] - step))
+
+
+def validate_interval(interval, base='1d'):
+    """Bilinmeyen veya temel aralıktan daha ince aralıklar için ValueError fırlatır."""
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval. Use one of: {', '.join(INTERVALS)}")
+    if INTERVAL_SPANS[interval] < INTERVAL_SPANS[base]:
+        raise ValueError(f"Interval {interval} is finer than the stored {base} candles")
+
+
+def bucket_starts(timestamps, interval):
+    """Her zaman damgasının ait olduğu kovanın başlangıcı (tz-naive UTC)."""
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).tz_convert(None)
+    rule = INTERVALS[interval]
+    if rule == 'W':
+        # Binance haftalık mumları Pazartesi 00:00 UTC'de başlar
+        return ts.normalize() - pd.to_timedelta(ts.dayofweek, unit='D')
+    if rule == 'M':
+        return ts.to_period('M').to_timestamp()
+    return ts.floor(rule)
+
+
+def ohlcv_frame(df):
+    """Ham mum DataFrame'ini OHLCV sütunlarına indirger; sadece fiyat varsa OHLC fiyattan türetilir."""
+    price = pd.to_numeric(df['close'] if 'close' in df.columns else df['price'], errors='coerce')
+    frame = pd.DataFrame({
+        'timestamp': pd.to_datetime(df['timestamp'], utc=True),
+        'open': pd.to_numeric(df['open'], errors='coerce') if 'open' in df.columns else price,
+        'high': pd.to_numeric(df['high'], errors='coerce') if 'high' in df.columns else price,
+        'low': pd.to_numeric(df['low'], errors='coerce') if 'low' in df.columns else price,
+        'close': price,
+        'volume': pd.to_numeric(df['volume'], errors='coerce').fillna(0.0) if 'volume' in df.columns else 0.0,
+        'count': 1
+    })
+    return frame.dropna(subset=['close']).sort_values('timestamp')
+
+
+def resample_ohlcv(df, interval):
+    """
+    Mumları `interval` kovalarına toplar (vektörize groupby).
+    Dönüş: bucket (tz-naive UTC kova başlangıcı) + OHLCV + count sütunları
+    """
+    frame = ohlcv_frame(df)
+    if frame.empty:
+        return pd.DataFrame(columns=['bucket'] + OHLCV_COLUMNS)
+    frame['bucket'] = bucket_starts(frame['timestamp'], interval)
+    return frame.groupby('bucket', sort=True).agg(AGGREGATIONS).reset_index()
+
+
+def merge_rollups(older, newer):
+    """Aynı kovaya düşen iki toplamayı birleştirir; `older` zaman olarak önce gelmelidir."""
+    if older is None or older.empty:
+        return newer
+    if newer is None or newer.empty:
+        return older
+    combined = pd.concat([older, newer], ignore_index=True)
+    return combined.groupby('bucket', sort=True).agg(AGGREGATIONS).reset_index()
+
+
+def to_market_records(rollups, coin_id):
+    """Toplamaları /api/market kayıt biçimine (price=close) dönüştürür."""
+    out = rollups.rename(columns={'bucket': 'timestamp'}).drop(columns=['count'])
+    out['timestamp'] = out['timestamp'].dt.tz_localize('UTC')
+    out['price'] = out['close']
+    out.insert(0, 'coin_id', coin_id)
+    return out
+
+
+class RollupStore:
+    """
+    (coin, aralık) başına OHLCV toplamalarını MongoDB'de saklar.
+
+    Her kova dokümanı içerdiği son temel mumun zamanını (`last_timestamp`) tutar. Ingestion
+    kapanmış mumlardan sadece kova filigranından sonrakileri ilgili kovalara birleştirir;
+    yazımlar ReplaceOne upsert ile okunan filigrana koşullu yapılır. (coin_id, interval, bucket)
+    tekil indeksi eşzamanlı yazıcıların kopya kova üretmesini engeller; çakışan kovalar
+    yeniden okunup tekrar denenir.
+
+    Okuma tarafı (get_rollups) artımlı yazım yapmaz: filigranların kapsamadığı temel mumlar
+    anlık toplanır. Sadece hiç toplama yoksa veya geçmiş geriye uzadıysa kovalar, aynı mumlar
+    için hep aynı sonucu veren (idempotent) bir yeniden kurulumla yazılır.
+    """
+
+    def __init__(self, database):
+        self.state_collection = database[STATE_COLLECTION]
+        self.rollups_collection = database[ROLLUPS_COLLECTION]
+
+    def _state(self, coin_id, interval):
+        return self.state_collection.find_one({'coin_id': coin_id, 'interval': interval}, {'_id': 0})
+
+    def _ensure_index(self):
+        self.rollups_collection.create_index(
+            [('coin_id', 1), ('interval', 1), ('bucket', 1)], unique=True, name='coin_interval_bucket'
+        )
+
+    def _load(self, coin_id, interval, since=None):
+        query = {'coin_id': coin_id, 'interval': interval}
+        if since is not None:
+            query['bucket'] = {'$gte': since}
+        docs = list(self.rollups_collection.find(query, {'_id': 0, 'coin_id': 0, 'interval': 0}).sort('bucket', 1))
+        if not docs:
+            return _empty_rollups()
+        frame = pd.DataFrame(docs)
+        frame['bucket'] = pd.to_datetime(frame['bucket'])
+        # Filigransız (eski) kovalarda aralık filigranı kullanılır (bkz. _unmerged)
+        frame['last_timestamp'] = pd.to_datetime(frame['last_timestamp']) if 'last_timestamp' in frame.columns else pd.NaT
+        return frame[['bucket'] + OHLCV_COLUMNS + ['last_timestamp']]
+
+    def _save(self, coin_id, interval, rollups, expected=None):
+        """
+        Kovaları tek bir toplu yazımda (bulk_write) ReplaceOne upsert ile yazar.
+        expected ({kova: okunan filigran}) verilirse her yazım o filigrana koşullanır; bu arada
+        başka bir yazıcının değiştirdiği kovalar yazılmaz ve liste olarak döndürülür.
+        """
+        if rollups.empty:
+            return []
+        self._ensure_index()
+        operations = []
+        for row in rollups.itertuples(index=False):
+            bucket = row.bucket.to_pydatetime()
+            doc = {
+                'coin_id': coin_id,
+                'interval': interval,
+                'bucket': bucket,
+                'open': float(row.open),
+                'high': float(row.high),
+                'low': float(row.low),
+                'close': float(row.close),
+                'volume': float(row.volume),
+                'count': int(row.count),
+                'last_timestamp': _naive(row.last_timestamp)
+            }
+            query = {'coin_id': coin_id, 'interval': interval, 'bucket': bucket}
+            if expected is not None:
+                query['last_timestamp'] = expected.get(row.bucket)
+            operations.append(ReplaceOne(query, doc, upsert=True))
+        try:
+            self.rollups_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != DUPLICATE_KEY for error in errors):
+                raise
+            # Koşul tutmadı, upsert tekil indekse takıldı: kovayı başka bir yazıcı güncelledi
+            return [rollups['bucket'].iloc[error['index']] for error in errors]
+        return []
+
+    def intervals(self, coin_id):
+        """Coin için kalıcı toplaması bulunan aralıklar."""
+        return [doc['interval'] for doc in self.state_collection.find({'coin_id': coin_id}, {'_id': 0, 'interval': 1})]
+
+    def rebuild(self, coin_id, interval, closed_candles):
+        """Aralığın toplamalarını kapanmış mumlardan baştan kurar (koşulsuz ve idempotent)."""
+        frame = ohlcv_frame(closed_candles)
+        rollups = _resample(frame, interval)
+        self._save(coin_id, interval, rollups)
+        if len(frame):
+            self.state_collection.update_one({'coin_id': coin_id, 'interval': interval}, {
+                '$set': {'first_timestamp': _naive(frame['timestamp'].iloc[0])},
+                '$max': {'last_timestamp': _naive(frame['timestamp'].iloc[-1])}
+            }, upsert=True)
+        return rollups
+
+    def update(self, coin_id, candles):
+        """
+        Kapanmış yeni mumları, toplaması tutulan her aralığa artımlı olarak ekler.
+        Kova filigranından eski mumlar yok sayılır; güncellenen aralık sayısını döndürür.
+        """
+        if not candles:
+            return 0
+        frame = ohlcv_frame(pd.DataFrame(candles))
+        updated = 0
+        for interval in self.intervals(coin_id):
+            if self._apply(coin_id, interval, self._state(coin_id, interval), frame):
+                updated += 1
+        return updated
+
+    def _apply(self, coin_id, interval, state, frame):
+        """Mumları kova filigranlarına göre birleştirir; çakışan kovalar yeniden denenir."""
+        applied = False
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            if frame.empty:
+                break
+            since = bucket_starts(frame['timestamp'].iloc[:1], interval)[0].to_pydatetime()
+            existing = self._load(coin_id, interval, since=since)
+            fresh = frame[_unmerged(frame, interval, existing, state)]
+            if fresh.empty:
+                break
+            increments = _resample(fresh, interval)
+            affected = existing[existing['bucket'].isin(increments['bucket'])]
+            expected = {bucket: _naive(mark) for bucket, mark in zip(affected['bucket'], affected['last_timestamp'])}
+            conflicts = self._save(coin_id, interval, _merge(affected, increments), expected=expected)
+
+            written = fresh[~bucket_starts(fresh['timestamp'], interval).isin(conflicts)]
+            if len(written):
+                applied = True
+                update = {'$max': {'last_timestamp': _naive(written['timestamp'].iloc[-1])}}
+                if not state or state.get('first_timestamp') is None:
+                    update['$set'] = {'first_timestamp': _naive(written['timestamp'].iloc[0])}
+                self.state_collection.update_one({'coin_id': coin_id, 'interval': interval}, update, upsert=True)
+            frame = fresh[bucket_starts(fresh['timestamp'], interval).isin(conflicts)]
+        return applied
+
+    def get_rollups(self, coin_id, interval, base_df):
+        """
+        Aralık toplamalarını döndürür. Kalıcı toplamalar temel serinin başını kapsamıyorsa
+        kapanmış mumlardan yeniden kurulur; kova filigranlarından sonraki mumlar (son, henüz
+        kapanmamış mum dahil) kalıcı yazılmadan anlık eklenir.
+        """
+        if ohlcv_frame(base_df).empty:
+            return resample_ohlcv(base_df, interval)
+        base_df = base_df.sort_values('timestamp')
+        closed = base_df.iloc[:-1]
+
+        state = self._state(coin_id, interval)
+        first = state.get('first_timestamp') if state else None
+        if first is None or _utc(first) > pd.to_datetime(base_df['timestamp'], utc=True).iloc[0]:
+            persisted = self.rebuild(coin_id, interval, closed) if len(closed) else _empty_rollups()
+            state = None
+        else:
+            persisted = self._load(coin_id, interval)
+
+        frame = ohlcv_frame(base_df)
+        pending = _resample(frame[_unmerged(frame, interval, persisted, state)], interval)
+        return _merge(persisted, pending)[['bucket'] + OHLCV_COLUMNS]
+
+
+def _empty_rollups():
+    return pd.DataFrame(columns=['bucket'] + OHLCV_COLUMNS + ['last_timestamp'])
+
+
+def _resample(frame, interval):
+    """ohlcv_frame çıktısını kova filigranıyla birlikte toplar."""
+    if frame.empty:
+        return _empty_rollups()
+    frame = frame.assign(
+        bucket=bucket_starts(frame['timestamp'], interval), last_timestamp=frame['timestamp'].dt.tz_convert(None)
+    )
+    return frame.groupby('bucket', sort=True).agg(WATERMARK_AGGREGATIONS).reset_index()
+
+
+def _merge(older, newer):
+    """merge_rollups gibi; kova filigranı da en büyük değer olarak taşınır."""
+    if older is None or older.empty:
+        return newer
+    if newer is None or newer.empty:
+        return older
+    combined = pd.concat([older, newer], ignore_index=True)
+    return combined.groupby('bucket', sort=True).agg(WATERMARK_AGGREGATIONS).reset_index()
+
+
+def _unmerged(frame, interval, rollups, state):
+    """
+    Kalıcı kovaya henüz girmemiş mumların maskesi: zaman damgası kovanın filigranından sonra
+    olanlar. Filigransız veya kalıcı olmayan kovalarda aralık durumunun filigranı kullanılır.
+    """
+    marks = pd.Series(rollups['last_timestamp'].to_numpy(), index=rollups['bucket'].to_numpy())
+    watermark = pd.Series(bucket_starts(frame['timestamp'], interval)).map(marks)
+    fallback = state.get('last_timestamp') if state else None
+    if fallback is not None:
+        watermark = watermark.fillna(pd.Timestamp(_naive(fallback)))
+    timestamps = frame['timestamp'].dt.tz_convert(None).to_numpy()
+    watermark = pd.to_datetime(watermark).to_numpy()
+    return pd.isna(watermark) | (timestamps > watermark)
+
+
+def _naive(value):
+    """Mongo'ya yazılacak tz-naive UTC datetime (eksik değer → None)."""
+    if value is None or pd.isna(value):
+        return None
+    return _utc(value).tz_convert(None).to_pydatetime()
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
@@ -0,0 +1,98 @@
+"""
+Response Cache - Veri sürümüne bağlı, boyutu sınırlı LRU yanıt önbelleği
+
+Analiz, anomali, rapor ve tahmin yanıtları sadece ingestion coin'in mumlarını
+değiştirdiğinde değişir. Önbellek anahtarı (rota, coin, sıralı sorgu parametreleri)
+üçlüsüdür; girdide coin'in veri sürümü de tutulur ve sürüm değiştiyse girdi geçersiz
+sayılıp atılır. Serileştirilmiş JSON baytları saklanır; isabette yeniden serileştirme
+yapılmaz. Toplam bayt `max_bytes`'ı aşınca en az yakın zamanda kullanılan (LRU)
+girdiler çıkarılır.
+
+Rota bazında isabet/ıska sayaçları ve tahliye (eviction) sayısı `metrics()` ile yayınlanır.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class ResponseCache:
+    """(rota, coin, parametreler) → (veri sürümü, JSON baytları) LRU önbelleği."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(route, coin_id, args):
+        """Sorgu parametreleri sıralanır; ?a=1&b=2 ile ?b=2&a=1 aynı girdiyi paylaşır."""
+        return (route, coin_id, tuple(sorted(args)))
+
+    def _count(self, route, field):
+        stats = self._stats.setdefault(route, {'hits': 0, 'misses': 0})
+        stats[field] += 1
+
+    def get(self, key, version):
+        """Sürümü eşleşen girdinin baytları; yoksa veya eskiyse None (eski girdi atılır)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._count(key[0], 'hits')
+                return entry[1]
+            if entry is not None:
+                self._discard(key)
+            self._count(key[0], 'misses')
+            return None
+
+    def put(self, key, version, body):
+        size = len(body)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (version, body)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+            return True
+
+    def _discard(self, key):
+        _, body = self._entries.pop(key)
+        self.bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def metrics(self):
+        """Toplam ve rota bazında isabet oranı, girdi sayısı, bayt ve tahliye sayısı."""
+        with self._lock:
+            routes = {}
+            for route, stats in self._stats.items():
+                total = stats['hits'] + stats['misses']
+                routes[route] = dict(stats, hit_rate=round(stats['hits'] / total, 4) if total else None)
+            hits = sum(s['hits'] for s in self._stats.values())
+            misses = sum(s['misses'] for s in self._stats.values())
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+                'routes': routes
+            }
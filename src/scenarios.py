@@ -0,0 +1,162 @@
+"""
+Scenarios - Portföyler için varsayımsal fiyat şoku (what-if) analizi
+
+Bir senaryo, her coin için basit getiri şokudur (-0.5 = %50 düşüş). S senaryo × K coin
+şok matrisi, coin başına güncel pozisyon değeri (exposure) vektörü ile tek bir matris
+çarpımında değerlenir: pnl = base_pnl + shocks @ exposure. Pozisyon değerleri işlemlerden
+np.bincount ile toplandığından milyonlarca işlem ve binlerce senaryo tek geçişte hesaplanır.
+
+Senaryo üreticileri:
+  - 'uniform'   : tüm coinler aynı oranda hareket eder (min..max ızgarası)
+  - 'per_coin'  : her coin tek başına min..max ızgarasında şoklanır, diğerleri sabit;
+                  şok matrisi kurulmaz, P&L doğrudan ızgara × exposure dış çarpımıdır
+  - 'correlated': geçmiş log getiri kovaryansından çok değişkenli normal örnekler
+                  (birlikte çöküşler / correlated crashes)
+"""
+import numpy as np
+
+from portfolio import TradeBook
+
+MODES = ('uniform', 'per_coin', 'correlated')
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+WORST_COUNT = 5
+MAX_SCENARIOS = 100_000
+
+
+def uniform_scenarios(coins, low=-0.5, high=0.5, steps=21):
+    """Tüm coinlere aynı şok; dönüş: (etiketler, şoklar S × K)."""
+    grid = np.linspace(low, high, steps)
+    labels = [f"all {shock:+.0%}" for shock in grid]
+    return labels, np.repeat(grid[:, None], len(coins), axis=1)
+
+
+class PerCoinLabels:
+    """per_coin senaryo etiketleri (coin sırasıyla, her coin için tüm ızgara); istenince üretilir."""
+
+    def __init__(self, coins, grid):
+        self.coins = coins
+        self.grid = grid
+
+    def __len__(self):
+        return len(self.coins) * len(self.grid)
+
+    def __getitem__(self, index):
+        coin, step = divmod(int(index), len(self.grid))
+        return f"{self.coins[coin]} {self.grid[step]:+.0%}"
+
+
+def per_coin_scenarios(coins, low=-0.5, high=0.5, steps=21):
+    """
+    Her coin için ayrı ızgara; dönüş: (etiketler, ızgara). (K·steps) × K şok matrisi yerine
+    senaryo P&L'i `per_coin_pnl` ile ızgara ve exposure'dan doğrudan hesaplanır.
+    """
+    grid = np.linspace(low, high, steps)
+    return PerCoinLabels(coins, grid), grid
+
+
+def per_coin_pnl(grid, exposure):
+    """Coin k'nın s. senaryosu sadece k'yı grid[s] kadar oynatır: etiket sırasıyla K·steps P&L."""
+    return (np.asarray(exposure)[:, None] * grid[None, :]).ravel()
+
+
+def correlated_scenarios(returns, n_scenarios=1000, horizon=1, seed=None):
+    """
+    Geçmiş log getiri matrisinden (T × K, eksik NaN) ortak dağılımlı şoklar üretir.
+    Kovaryans, geçmişi olan coinlerin birlikte gözlendiği satırlardan hesaplanır; `horizon`
+    gün ölçeklemesi kök-zaman (√t) ile yapılır. Hiç geçmişi olmayan coinler şoklanmaz.
+    """
+    returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+    known = ~np.isnan(returns).all(axis=0)
+    complete = returns[:, known]
+    complete = complete[~np.isnan(complete).any(axis=1)]
+    if not known.any() or len(complete) < 2:
+        raise ValueError("Not enough overlapping history for correlated scenarios")
+    mean = complete.mean(axis=0) * horizon
+    cov = np.atleast_2d(np.cov(complete, rowvar=False)) * horizon
+
+    # Yarı tanımlı (PSD) kovaryans için özdeğer ayrışımıyla karekök
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    root = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+    rng = np.random.default_rng(seed)
+    shocks = np.zeros((n_scenarios, returns.shape[1]))
+    shocks[:, known] = np.expm1(rng.standard_normal((n_scenarios, cov.shape[0])) @ root.T + mean)
+    labels = [f"correlated #{i + 1}" for i in range(n_scenarios)]
+    return labels, shocks
+
+
+def coin_exposure(book, current_prices):
+    """
+    Coin başına güncel pozisyon değeri ve toplam alış maliyeti.
+    Dönüş: (exposure float64[K], buy_value, current_value)
+    """
+    current = book.current_prices(current_prices)
+    exposure = np.bincount(book.coin_codes, weights=current * book.amounts, minlength=len(book.coins))
+    buy_value = float((book.amounts * book.buy_prices).sum())
+    return exposure, buy_value, float(exposure.sum())
+
+
+def summarize(pnl, labels, buy_value, current_pnl):
+    """Senaryo sonuçlarının dağılım özeti ve en kötü senaryolar."""
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if not len(pnl):
+        return {"scenarios": 0}
+    worst = np.argsort(pnl, kind='stable')[:WORST_COUNT]
+    percentiles = np.percentile(pnl, PERCENTILES)
+    return {
+        "scenarios": len(pnl),
+        "current_pnl": round(current_pnl, 2),
+        "mean_pnl": round(float(pnl.mean()), 2),
+        "min_pnl": round(float(pnl.min()), 2),
+        "max_pnl": round(float(pnl.max()), 2),
+        "loss_probability": round(float((pnl < 0).mean()), 4),
+        "percentiles": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)},
+        "worst_scenarios": [
+            {
+                "scenario": labels[i],
+                "pnl": round(float(pnl[i]), 2),
+                "pnl_percent": round(float(pnl[i] / (buy_value + 1e-10) * 100), 2)
+            }
+            for i in worst
+        ]
+    }
+
+
+def run(users, current_prices, mode='uniform', returns_by_coin=None, low=-0.5, high=0.5, steps=21,
+        n_scenarios=1000, horizon=1, seed=None, max_scenarios=MAX_SCENARIOS):
+    """
+    Kullanıcı belgelerindeki işlemler için senaryo analizini çalıştırır.
+    returns_by_coin: 'correlated' için (timestamps hizalı) log getiri matrisi üreten
+    fonksiyon; book.coins listesini alır ve T × K dizi döndürür.
+    max_scenarios: üretilecek senaryo sayısı sınırı ('per_coin' için K·steps)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown scenario mode. Use one of: {', '.join(MODES)}")
+    book = TradeBook.from_users(users)
+    if not len(book):
+        return {"mode": mode, "positions": 0, "coins": [], "scenarios": 0}
+
+    counts = {'uniform': steps, 'per_coin': len(book.coins) * steps, 'correlated': n_scenarios}
+    if counts[mode] > max_scenarios:
+        raise ValueError(f"{mode} would generate {counts[mode]} scenarios; the limit is {max_scenarios}")
+
+    # S senaryonun tamamı tek matris çarpımı: P&L (alış maliyetine göre) = base + şoklar @ exposure
+    exposure, buy_value, current_value = coin_exposure(book, current_prices)
+    if mode == 'uniform':
+        labels, shocks = uniform_scenarios(book.coins, low, high, steps)
+        shock_pnl = shocks @ exposure
+    elif mode == 'per_coin':
+        labels, grid = per_coin_scenarios(book.coins, low, high, steps)
+        shock_pnl = per_coin_pnl(grid, exposure)
+    else:
+        labels, shocks = correlated_scenarios(returns_by_coin(book.coins), n_scenarios, horizon, seed)
+        shock_pnl = shocks @ exposure
+    pnl = (current_value - buy_value) + shock_pnl
+    result = {
+        "mode": mode,
+        "positions": len(book),
+        "coins": book.coins,
+        "buy_value": round(buy_value, 2),
+        "current_value": round(current_value, 2)
+    }
+    result.update(summarize(pnl, labels, buy_value, current_value - buy_value))
+    return result
@@ -0,0 +1,251 @@
+"""
+Screener - Tüm coin evrenini son gösterge değerlerine göre filtreleyen/sıralayan tarayıcı
+
+Ingestion her coin için son göstergeleri (RSI, volatilite, Sharpe, ...) hesaplayıp
+`screener_indicators` koleksiyonuna artan `seq` ile yazar. API tarafı bu tabloyu
+bellekte sütun dizileri (coin × gösterge) olarak tutar ve sadece yeni `seq`'leri okuyarak
+artımlı senkronize eder; sorgular ham mumlara hiç dokunmaz.
+
+Her gösterge sütunu için sıralı indeks (argsort + sıralı değerler) tutulur. Bir koşul
+(`rsi<30`) searchsorted ile sıralı dizide bir aralığa çevrilir; koşullar maske kesişimi,
+sıralama ise hazır indeksin filtrelenmesiyle yapılır. 1000+ coin için sorgu milisaniyenin altındadır.
+
+Sorgu dili: `<koşul> [and <koşul> ...] [order by <gösterge> [asc|desc]] [limit N]`
+  koşul: `<gösterge> <op> <sayı>`, op: <, <=, >, >=, =, !=
+  Sıralama varsayılanı azalandır (desc); en yüksek değerler önce gelir.
+"""
+import re
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import ReturnDocument
+
+from alerts import rsi_from_window
+from backtest import ema
+
+INDICATORS_COLLECTION = "screener_indicators"
+STATE_COLLECTION = "screener_state"
+SEQ_ID = "indicator_seq"
+INDICATORS = (
+    'price', 'change_24h', 'return_7d', 'return_30d', 'rsi', 'macd_histogram', 'sma_7', 'sma_30',
+    'volatility_7d', 'volatility_30d', 'max_drawdown', 'sharpe_ratio', 'volume'
+)
+DEFAULT_LIMIT = 50
+RISK_FREE_RATE = 0.02
+
+_CONDITION = re.compile(r"^\s*([a-z0-9_]+)\s*(<=|>=|!=|==|<|>|=)\s*(-?[0-9]*\.?[0-9]+(?:e-?[0-9]+)?)\s*$")
+_ORDER = re.compile(r"\border\s+by\s+([a-z0-9_]+)(?:\s+(asc|desc))?\s*$")
+_LIMIT = re.compile(r"\blimit\s+([0-9]+)\s*$")
+_AND = re.compile(r"\s+and\s+")
+
+
+def compute_indicators(series):
+    """
+    CandleSeries'in son mumu için göstergeler; get_full_analysis ile aynı tanımlar.
+    Yetersiz geçmişte ilgili gösterge None olur.
+    """
+    prices = series.price
+    n = len(prices)
+    if n == 0:
+        return dict.fromkeys(INDICATORS)
+    returns = prices[1:] / prices[:-1] - 1
+
+    def change(k):
+        return (prices[-1] / prices[-1 - k] - 1) * 100 if n > k else None
+
+    def volatility(k):
+        return returns[-k:].std(ddof=1) * np.sqrt(k) * 100 if len(returns) >= k else None
+
+    sharpe = None
+    if len(returns) >= 30:
+        excess = returns[-30:] - RISK_FREE_RATE / 365
+        sharpe = excess.mean() / (excess.std(ddof=1) + 1e-10) * np.sqrt(365)
+    running_max = np.maximum.accumulate(prices)
+    macd = ema(prices, 12) - ema(prices, 26)
+
+    values = {
+        'price': prices[-1],
+        'change_24h': change(1),
+        'return_7d': change(7),
+        'return_30d': change(30),
+        'rsi': rsi_from_window(prices),
+        'macd_histogram': (macd - ema(macd, 9))[-1],
+        'sma_7': prices[-7:].mean() if n >= 7 else None,
+        'sma_30': prices[-30:].mean() if n >= 30 else None,
+        'volatility_7d': volatility(7),
+        'volatility_30d': volatility(30),
+        'max_drawdown': ((prices - running_max) / (running_max + 1e-10) * 100).min(),
+        'sharpe_ratio': sharpe,
+        'volume': series.volume[-1]
+    }
+    return {name: None if value is None else float(value) for name, value in values.items()}
+
+
+def parse_query(text):
+    """
+    Sorgu metnini çözümler; hatalı sorguda ValueError.
+    Dönüş: (koşullar [(gösterge, op, değer)], sıralama göstergesi veya None, azalan mı, limit veya None)
+    """
+    text = (text or "").strip().lower()
+    limit = None
+    match = _LIMIT.search(text)
+    if match:
+        limit = int(match.group(1))
+        text = text[:match.start()].strip()
+    order_by, descending = None, True
+    match = _ORDER.search(text)
+    if match:
+        order_by, descending = match.group(1), match.group(2) != 'asc'
+        text = text[:match.start()].strip()
+        if order_by not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{order_by}'. Use one of: {', '.join(INDICATORS)}")
+
+    conditions = []
+    for part in _AND.split(text) if text else []:
+        match = _CONDITION.match(part)
+        if not match:
+            raise ValueError(f"Invalid condition '{part.strip()}'; expected e.g. rsi<30")
+        name, op, value = match.groups()
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'. Use one of: {', '.join(INDICATORS)}")
+        conditions.append((name, '==' if op == '=' else op, float(value)))
+    return conditions, order_by, descending, limit
+
+
+class ScreenerStore:
+    """Coin başına son göstergelerin kalıcı (MongoDB) tarafı; her yazım yeni bir `seq` alır."""
+
+    _indexed = set()
+
+    def __init__(self, database):
+        self.indicators_collection = database[INDICATORS_COLLECTION]
+        self.state_collection = database[STATE_COLLECTION]
+        if database.name not in self._indexed:
+            self.indicators_collection.create_index("coin_id", unique=True)
+            self.indicators_collection.create_index("seq")
+            self._indexed.add(database.name)
+
+    def update(self, coin_id, series):
+        """Coin'in göstergelerini yeniden hesaplayıp yazar; boş seride bir şey yapmaz."""
+        if series.empty:
+            return None
+        seq = self.state_collection.find_one_and_update(
+            {"_id": SEQ_ID}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )["value"]
+        doc = {
+            "coin_id": coin_id,
+            "seq": seq,
+            "timestamp": datetime.fromtimestamp(series.timestamps[-1] / 1e9, tz=timezone.utc).isoformat(),
+            "indicators": compute_indicators(series),
+            "updated_at": datetime.now(timezone.utc)
+        }
+        self.indicators_collection.replace_one({"coin_id": coin_id}, doc, upsert=True)
+        return doc
+
+    def backfill(self, coin_ids, load_series):
+        """Tablo hiç yazılmamışsa (ingestion çalışmadan önce) göstergeleri mevcut mumlardan üretir."""
+        return sum(self.update(coin_id, load_series(coin_id)) is not None for coin_id in coin_ids)
+
+    def is_empty(self):
+        return self.indicators_collection.find_one({}, {"_id": 1}) is None
+
+    def changes_since(self, seq):
+        return self.indicators_collection.find({"seq": {"$gt": seq}}, {"_id": 0}).sort("seq", 1)
+
+
+class _Snapshot:
+    """Değişmez tablo görünümü; senkronizasyon yeni bir görünüm üretip atomik olarak değiştirir."""
+
+    __slots__ = ('coins', 'timestamps', 'columns', 'orders', 'sorted_values', 'valid')
+
+    def __init__(self, coins, timestamps, columns):
+        self.coins = coins
+        self.timestamps = timestamps
+        self.columns = columns
+        # NaN'lar argsort'ta sona düşer; sıralı değerlerde searchsorted aralıkları onları dışarıda bırakır
+        self.orders = {name: np.argsort(values, kind='stable') for name, values in columns.items()}
+        self.sorted_values = {name: columns[name][order] for name, order in self.orders.items()}
+        self.valid = {name: int(np.count_nonzero(~np.isnan(values))) for name, values in columns.items()}
+
+
+class ScreenerTable:
+    """API tarafı: gösterge tablosunun bellekteki sütun dizileri ve sıralı indeksleri."""
+
+    def __init__(self):
+        self.last_seq = 0
+        self.rows = {}
+        self._snapshot = _Snapshot([], [], {name: np.empty(0) for name in INDICATORS})
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshot.coins)
+
+    def sync(self, store):
+        """Son senkronizasyondan sonra yazılan gösterge belgelerini uygular; değişen coin sayısı."""
+        with self._lock:
+            changed = 0
+            for doc in store.changes_since(self.last_seq):
+                self.last_seq = max(self.last_seq, doc["seq"])
+                self.rows[doc["coin_id"]] = doc
+                changed += 1
+            if changed:
+                coins = sorted(self.rows)
+                columns = {
+                    name: np.array(
+                        [self.rows[coin]["indicators"].get(name) for coin in coins], dtype=np.float64
+                    )
+                    for name in INDICATORS
+                }
+                timestamps = [self.rows[coin].get("timestamp") for coin in coins]
+                self._snapshot = _Snapshot(coins, timestamps, columns)
+            return changed
+
+    def _matches(self, snapshot, name, op, value):
+        """Koşulu sağlayan satırların maskesi; sıralı değerlerde searchsorted ile O(log n + eşleşen)."""
+        valid = snapshot.valid[name]
+        values = snapshot.sorted_values[name][:valid]
+        lo = np.searchsorted(values, value, side='left')
+        hi = np.searchsorted(values, value, side='right')
+        ranges = {
+            '<': [(0, lo)], '<=': [(0, hi)], '>': [(hi, valid)], '>=': [(lo, valid)],
+            '==': [(lo, hi)], '!=': [(0, lo), (hi, valid)]
+        }[op]
+        mask = np.zeros(len(snapshot.coins), dtype=bool)
+        for start, end in ranges:
+            mask[snapshot.orders[name][start:end]] = True
+        return mask
+
+    def query(self, conditions, order_by=None, descending=True, limit=DEFAULT_LIMIT):
+        """
+        Koşulların hepsini sağlayan coinler; order_by göstergesine göre sıralı (değeri olmayanlar sonda).
+        Dönüş: (eşleşen toplam, [{'coin', 'timestamp', 'indicators'}] ilk `limit` satır)
+        """
+        snapshot = self._snapshot
+        mask = np.ones(len(snapshot.coins), dtype=bool)
+        for name, op, value in conditions:
+            mask &= self._matches(snapshot, name, op, value)
+
+        if order_by is None:
+            rows = np.flatnonzero(mask)
+        else:
+            order = snapshot.orders[order_by]
+            if descending:
+                # Azalan sırada da NaN'lar sonda kalır
+                valid = snapshot.valid[order_by]
+                order = np.concatenate([order[:valid][::-1], order[valid:]])
+            rows = order[mask[order]]
+        total = len(rows)
+        rows = rows[:limit] if limit is not None else rows
+        return total, [
+            {
+                "coin": snapshot.coins[i],
+                "timestamp": snapshot.timestamps[i],
+                "indicators": {name: _clean(snapshot.columns[name][i]) for name in INDICATORS}
+            }
+            for i in rows
+        ]
+
+
+def _clean(value):
+    return None if np.isnan(value) else round(float(value), 6)
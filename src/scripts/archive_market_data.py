@@ -0,0 +1,28 @@
+import os
+import sys
+import logging
+from datetime import datetime, timedelta, timezone
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_SRC not in sys.path:
+    sys.path.insert(0, ROOT_SRC)
+
+from db import database_manager as db
+from db.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_DIR
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Move cold market_data candles into the Parquet archive')
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f'Archive candles older than this many days (default: {ARCHIVE_AFTER_DAYS})')
+    parser.add_argument('--coins', nargs='*', help='Coin ids to archive (default: all coins in market_data)')
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help=f'Archive directory (default: {ARCHIVE_DIR})')
+    args = parser.parse_args()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
+    moved = db.archive_market_data(args.coins or None, cutoff=cutoff, directory=args.dir)
+    logger.info(f'Archived {sum(moved.values())} candles for {len(moved)} coins older than {cutoff.date()}.')
@@ -0,0 +1,30 @@
+import os
+import sys
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_SRC not in sys.path:
+    sys.path.insert(0, ROOT_SRC)
+
+from db import database_manager as db
+from db.snapshot import SNAPSHOT_DIR, SNAPSHOT_FORMAT, FILE_FORMATS
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Export/refresh the memory-mapped market_data snapshot')
+    parser.add_argument('--coins', nargs='*', help='Coin ids to export (default: every coin with a data version)')
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help=f'Snapshot directory (default: {SNAPSHOT_DIR})')
+    parser.add_argument('--force', action='store_true', help='Rewrite coins even if their version is unchanged')
+    parser.add_argument('--format', choices=FILE_FORMATS, default=SNAPSHOT_FORMAT,
+                        help=f'Column file format: .npy files or one Arrow IPC file per coin (default: {SNAPSHOT_FORMAT})')
+    args = parser.parse_args()
+
+    refreshed = db.refresh_snapshot(args.coins or None, directory=args.dir, force=args.force, file_format=args.format)
+    if refreshed:
+        logger.info(f"Snapshot refreshed for {len(refreshed)} coins: {', '.join(refreshed)}")
+    else:
+        logger.info('Snapshot is up to date.')
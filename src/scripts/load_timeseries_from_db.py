@@ -68,7 +68,10 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Load time-series price data from MongoDB for analysis')
     parser.add_argument('--coins', nargs='*', help='List of coin ids to load (default: popular_coins)')
     parser.add_argument('--out', help='Save merged CSV to this path (optional)')
+    parser.add_argument('--snapshot', action='store_true', help='Read fresh coins from the local market snapshot')
     args = parser.parse_args()
+    if args.snapshot:
+        db.enable_snapshot_read_through()
     coins = args.coins or None
     df = load_series_from_db(coins, save_csv=bool(args.out), csv_prefix='ts_db')
     if df.empty:
@@ -0,0 +1,39 @@
+import sys
+import os
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import database_manager as db
+from util.get_coins import BINANCE_TO_ID
+from shared_panel import SharedPanelPublisher, build_price_panel
+
+# Yükleyici süreç: veri sürümleri değiştikçe fiyat panelini paylaşımlı belleğe yayınlar.
+# API işçileri ile aynı makinede (aynı /dev/shm) çalışmalıdır.
+POLL_SECONDS = int(os.getenv("SHARED_PANEL_POLL_SECONDS", "60"))
+
+def load_panel(coins):
+    series = {coin: db.get_candle_series(coin) for coin in coins}
+    return build_price_panel(series)
+
+if __name__ == '__main__':
+    coins = list(BINANCE_TO_ID.values())
+    publisher = SharedPanelPublisher()
+    last_versions = None
+    try:
+        while True:
+            versions = {c: v['version'] for c, v in db.get_data_versions(coins).items()}
+            if versions != last_versions:
+                timestamps, panel_coins, prices = load_panel(coins)
+                version = publisher.publish(timestamps, panel_coins, prices)
+                logger.info(f'Published price panel v{version}: {len(timestamps)} x {len(panel_coins)}')
+                last_versions = versions
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        logger.info('Stopping price panel loader.')
+    finally:
+        publisher.close()
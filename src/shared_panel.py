@@ -0,0 +1,217 @@
+"""
+Shared Panel - Süreçler arası paylaşılan (multiprocessing.shared_memory) fiyat paneli
+
+Bir yükleyici (loader) süreç, zamana hizalı `zaman × coin` fiyat panelini paylaşımlı
+belleğe yazar. API işçileri (worker) paneli salt okunur NumPy dizileri olarak eşler;
+N işçi tek bir kopyayı paylaşır ve Mongo'ya gitmeden anında ısınır.
+
+Sabit isimli küçük bir başlık (header) segmenti güncel veri segmentini gösterir:
+  magic | seq | version | rows | cols | coins_bytes | data_name
+`seq` bir sıralı kilit (seqlock) sayacıdır: yazarken tek, bitince çift olur. Okuyucu
+tutarlı bir başlık görene kadar yeniden dener. Her yayın yeni bir veri segmenti
+oluşturur; eski segment unlink edilir ama onu eşlemiş okuyucular için geçerli kalır.
+
+Başlık yükleyici yeniden başladığında (kapanma veya çökme) silinmez: resource_tracker
+izlemesi kapatılır ve yeni yükleyici aynı başlığa bağlanıp sürümü oradan sürdürür. Böylece
+başlığı bir kez eşlemiş işçiler yeni yayınları görmeye devam eder.
+
+Veri segmenti: timestamps int64[rows] | prices float64[rows × cols] | coins (JSON)
+"""
+import json
+import os
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+PANEL_NAME = os.getenv("SHARED_PANEL_NAME", "crypto_price_panel")
+MAGIC = b"CRYPTPNL"
+HEADER_FORMAT = "<8sQqqqq64s"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+_ATTACH_LOCK = threading.Lock()
+
+
+class PricePanel:
+    """Paylaşımlı bellekteki panelin salt okunur görünümü."""
+
+    __slots__ = ('version', 'timestamps', 'prices', 'coins', 'coin_index', '_shm')
+
+    def __init__(self, version, timestamps, prices, coins, shm=None):
+        self.version = version
+        self.timestamps = timestamps
+        self.prices = prices
+        self.coins = coins
+        self.coin_index = {coin: j for j, coin in enumerate(coins)}
+        self._shm = shm
+
+    def __contains__(self, coin_id):
+        return coin_id in self.coin_index
+
+    def column(self, coin_id, dropna=True):
+        """Coin'in fiyat sütunu (görünüm); dropna=True ise eksik günler atılır."""
+        values = self.prices[:, self.coin_index[coin_id]]
+        return values[~np.isnan(values)] if dropna else values
+
+
+def build_price_panel(series_by_coin):
+    """
+    {coin: CandleSeries} sözlüğünü ortak zaman eksenine hizalar.
+    Dönüş: (timestamps int64[T], coins, prices float64[T × C]); eksik günler NaN
+    """
+    coins = [coin for coin, series in series_by_coin.items() if len(series)]
+    if not coins:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0))
+    timestamps = np.unique(np.concatenate([series_by_coin[c].timestamps for c in coins]))
+    prices = np.full((len(timestamps), len(coins)), np.nan)
+    for j, coin in enumerate(coins):
+        series = series_by_coin[coin]
+        prices[np.searchsorted(timestamps, series.timestamps), j] = series.close
+    return timestamps, coins, prices
+
+
+def _attach(name):
+    """Mevcut segmente bağlanır; okuyucu çıkarken segmentin silinmemesi için izlemeyi kapatır."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13: bağlanan süreç de segmenti resource_tracker'a kaydeder ve çıkarken
+    # unlink eder; kayıt bu çağrı süresince devre dışı bırakılır.
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _untrack(shm):
+    """Segmenti bu sürecin resource_tracker kaydından çıkarır (süreç çıkınca silinmez)."""
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def _read_header(buf):
+    magic, seq, version, rows, cols, coins_bytes, data_name = struct.unpack_from(HEADER_FORMAT, buf)
+    return magic, seq, version, rows, cols, coins_bytes, data_name.rstrip(b"\0").decode()
+
+
+class SharedPanelPublisher:
+    """Yükleyici süreç tarafı: paneli yeni bir segmente yazar ve başlığı atomik olarak değiştirir."""
+
+    def __init__(self, name=PANEL_NAME):
+        self.name = name
+        try:
+            self.header = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE)
+            struct.pack_into(HEADER_FORMAT, self.header.buf, 0, MAGIC, 0, 0, 0, 0, 0, b"")
+            _untrack(self.header)
+        except FileExistsError:
+            # Önceki yükleyicinin başlığı: okuyucular onu eşlemiş olabilir, yeniden kullanılır
+            self.header = _attach(name)
+        self.data = None
+
+    def publish(self, timestamps, coins, prices):
+        """Paneli yayınlar ve yeni sürüm numarasını döndürür."""
+        _, seq, version, _, _, _, _ = _read_header(self.header.buf)
+        version += 1
+        timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        coins_blob = json.dumps(list(coins)).encode()
+        rows, cols = prices.shape if prices.size else (len(timestamps), len(coins))
+
+        data_name = f"{self.name}_v{version}"
+        size = max(timestamps.nbytes + prices.nbytes + len(coins_blob), 1)
+        try:
+            data = shared_memory.SharedMemory(name=data_name, create=True, size=size)
+        except FileExistsError:
+            # Çöken bir yükleyiciden kalmış, başlıkta yayınlanmamış segment
+            stale = shared_memory.SharedMemory(name=data_name)
+            stale.close()
+            stale.unlink()
+            data = shared_memory.SharedMemory(name=data_name, create=True, size=size)
+        np.ndarray(timestamps.shape, dtype=np.int64, buffer=data.buf)[:] = timestamps
+        np.ndarray(prices.shape, dtype=np.float64, buffer=data.buf, offset=timestamps.nbytes)[:] = prices
+        offset = timestamps.nbytes + prices.nbytes
+        data.buf[offset:offset + len(coins_blob)] = coins_blob
+
+        struct.pack_into("<Q", self.header.buf, 8, seq + 1)
+        struct.pack_into(HEADER_FORMAT, self.header.buf, 0, MAGIC, seq + 1, version, rows, cols,
+                         len(coins_blob), data_name.encode())
+        struct.pack_into("<Q", self.header.buf, 8, seq + 2)
+
+        if self.data is not None:
+            self.data.close()
+            self.data.unlink()
+        self.data = data
+        return version
+
+    def close(self, unlink_header=False):
+        """
+        Veri segmentini siler, başlığı bırakır. Başlık varsayılan olarak silinmez; yeniden başlayan
+        yükleyici aynı başlığa yazar. unlink_header=True paneli tamamen kaldırır (işçiler son
+        eşledikleri panelde kalır).
+        """
+        if self.data is not None:
+            self.data.close()
+            self.data.unlink()
+            self.data = None
+        self.header.close()
+        if unlink_header:
+            # unlink kaydı da siler; izlemesi kapatılmış başlık önce yeniden kaydedilir (uyarı olmasın)
+            if getattr(self.header, "_track", True):
+                resource_tracker.register(self.header._name, "shared_memory")
+            self.header.unlink()
+
+
+class SharedPanelReader:
+    """
+    İşçi süreç tarafı: güncel paneli salt okunur eşler. Yeni sürüm yayınlandığında
+    bir sonraki `current()` çağrısında panel referansı tek atamayla değiştirilir.
+    """
+
+    def __init__(self, name=PANEL_NAME):
+        self.name = name
+        self.header = None
+        self.panel = None
+
+    def _header(self):
+        if self.header is None:
+            self.header = _attach(self.name)
+        return self.header
+
+    def current(self):
+        """Güncel PricePanel; panel yayınlanmamışsa None."""
+        try:
+            header = self._header()
+        except FileNotFoundError:
+            return None
+
+        for _ in range(100):
+            magic, seq, version, rows, cols, coins_bytes, data_name = _read_header(header.buf)
+            if magic != MAGIC or version == 0:
+                return None
+            if seq % 2 == 0 and _read_header(header.buf)[1] == seq:
+                break
+        else:
+            return self.panel
+
+        if self.panel is not None and self.panel.version == version:
+            return self.panel
+        try:
+            self.panel = self._map(version, rows, cols, coins_bytes, data_name)
+        except FileNotFoundError:
+            # Yayıncı bu arada yeni sürüm yazdı ya da yeniden başladı; başlık bir sonraki
+            # çağrıda yeniden eşlenir, o zamana kadar mevcut panel kullanılır
+            self.header = None
+        return self.panel
+
+    def _map(self, version, rows, cols, coins_bytes, data_name):
+        shm = _attach(data_name)
+        timestamps = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf)
+        prices = np.ndarray((rows, cols), dtype=np.float64, buffer=shm.buf, offset=timestamps.nbytes)
+        timestamps.flags.writeable = False
+        prices.flags.writeable = False
+        offset = timestamps.nbytes + prices.nbytes
+        coins = json.loads(bytes(shm.buf[offset:offset + coins_bytes]))
+        return PricePanel(version, timestamps, prices, coins, shm)
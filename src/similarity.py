@@ -0,0 +1,218 @@
+"""
+Similarity - Coinler arası zaman serisi benzerlik araması
+
+Her coin için son `window` günlük log getiri penceresi z-normalize edilir ve birim
+uzunluğa ölçeklenir; böylece iki satırın iç çarpımı Pearson korelasyonuna eşittir.
+Satırlar bitişik (contiguous) bir `coin × window` matrisinde tutulur ve bir sorgu
+tek bir matris-vektör çarpımı ile yanıtlanır.
+
+Büyük evrenlerde isteğe bağlı rastgele izdüşüm LSH (random-projection LSH) aday
+kümesini daraltır: her tabloda `bits` hiper düzleme göre işaret imzası hesaplanır,
+aynı kovaya düşen coinler tam çarpımla yeniden sıralanır.
+
+Pencereler ortak bir bitiş gününe (evrendeki en son mum günü) hizalanır; günlük
+ızgarada eksik günler son fiyatla doldurulur, son mumu bu günden eski (stale) olan
+coinler indekse alınmaz. Böylece tüm satırlar aynı tarihleri karşılaştırır.
+
+İndeks veri sürümleri (data versions) ile artımlı yenilenir: sadece sürümü değişen
+coinlerin satırı yeniden hesaplanır; ortak bitiş günü ilerlerse tüm satırlar yenilenir.
+Yenileme kilit altında yeni bir değişmez görünüm (snapshot) kurup tek atamayla değiştirir;
+sorgular kilitsiz olarak o anki görünümü okur.
+"""
+import threading
+
+import numpy as np
+
+DEFAULT_WINDOW = 60
+LSH_TABLES = 8
+LSH_BITS = 12
+LSH_MIN_COINS = 2000
+DAY_NS = 86_400 * 10**9
+
+
+def return_window(prices, window, timestamps=None, end_day=None):
+    """
+    Son `window` log getirisinden z-normalize, birim uzunluklu satır; yetersiz/sabit veride None.
+    timestamps (UTC ns) ve end_day verilirse fiyatlar `end_day`de biten günlük ızgaraya hizalanır.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    valid = np.isfinite(prices) & (prices > 0)
+    prices = prices[valid]
+    if timestamps is not None:
+        days = np.asarray(timestamps, dtype=np.int64)[valid] // DAY_NS
+        if not len(days) or days[-1] < end_day:
+            return None
+        # Her ızgara günü için o gün veya öncesindeki son mum (ileri doldurma)
+        rows = np.searchsorted(days, np.arange(end_day - window, end_day + 1), side='right') - 1
+        if rows[0] < 0:
+            return None
+        prices = prices[rows]
+    if len(prices) < window + 1:
+        return None
+    returns = np.diff(np.log(prices[-(window + 1):]))
+    returns -= returns.mean()
+    norm = np.linalg.norm(returns)
+    if norm == 0:
+        return None
+    return returns / norm
+
+
+class RandomProjectionLSH:
+    """İşaret imzalı rastgele izdüşüm (SimHash) tabloları; kosinüs benzerliği için aday üretir."""
+
+    def __init__(self, dim, tables=LSH_TABLES, bits=LSH_BITS, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((tables, dim, bits))
+        self.weights = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets = [dict() for _ in range(tables)]
+
+    def signatures(self, vectors):
+        """vectors: N × dim → tablo başına kova anahtarları (tables × N)."""
+        bits = np.einsum('nd,tdb->tnb', np.atleast_2d(vectors), self.planes) > 0
+        return bits @ self.weights
+
+    def build(self, matrix):
+        for table, keys in zip(self.buckets, self.signatures(matrix)):
+            table.clear()
+            for row, key in enumerate(keys.tolist()):
+                table.setdefault(key, []).append(row)
+
+    def candidates(self, vector):
+        rows = set()
+        for table, key in zip(self.buckets, self.signatures(vector)[:, 0].tolist()):
+            rows.update(table.get(key, ()))
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+
+class _Snapshot:
+    """Değişmez indeks görünümü; LSH tabloları ilk ihtiyaçta bir kez kurulur."""
+
+    __slots__ = ('coins', 'row_of', 'matrix', 'end_day', 'lsh')
+
+    def __init__(self, coins, matrix, end_day):
+        self.coins = coins
+        self.row_of = {coin: i for i, coin in enumerate(coins)}
+        self.matrix = matrix
+        self.end_day = end_day
+        self.lsh = None
+
+
+class SimilarityIndex:
+    """Tek pencere uzunluğu için coin getiri pencereleri matrisi."""
+
+    def __init__(self, window=DEFAULT_WINDOW, lsh_min_coins=LSH_MIN_COINS):
+        self.window = window
+        self.lsh_min_coins = lsh_min_coins
+        self.versions = {}
+        self.last_days = {}
+        self._snapshot = _Snapshot([], np.empty((0, window)), None)
+        self._lock = threading.Lock()
+
+    @property
+    def coins(self):
+        return self._snapshot.coins
+
+    @property
+    def row_of(self):
+        return self._snapshot.row_of
+
+    @property
+    def matrix(self):
+        return self._snapshot.matrix
+
+    @property
+    def end_day(self):
+        return self._snapshot.end_day
+
+    def __len__(self):
+        return len(self._snapshot.coins)
+
+    def __contains__(self, coin_id):
+        return coin_id in self._snapshot.row_of
+
+    def refresh(self, versions, load_series):
+        """
+        Sürümü değişen coinlerin satırlarını yeniden hesaplar.
+        versions: {coin_id: veri sürümü}, load_series: coin_id -> CandleSeries
+        Dönüş: yenilenen coin listesi
+        """
+        with self._lock:
+            return self._refresh(versions, load_series)
+
+    def _refresh(self, versions, load_series):
+        snapshot = self._snapshot
+        changed = [coin for coin, version in versions.items() if self.versions.get(coin) != version]
+        if not changed:
+            return []
+        loaded = {coin: load_series(coin) for coin in changed}
+        last_days = dict(self.last_days)
+        for coin, series in loaded.items():
+            last_days[coin] = int(series.timestamps[-1] // DAY_NS) if len(series) else None
+        end_day = max((day for day in last_days.values() if day is not None), default=None)
+        coins = snapshot.coins
+        if end_day != snapshot.end_day:
+            # Ortak bitiş günü değişti: tüm pencereler yeni tarihe hizalanarak baştan kurulur
+            for coin in coins:
+                if coin not in loaded:
+                    loaded[coin] = load_series(coin)
+
+        new_versions = dict(self.versions)
+        rows = {}
+        for coin, series in loaded.items():
+            row = None
+            if end_day is not None:
+                row = return_window(series.price, self.window, series.timestamps, end_day)
+            new_versions[coin] = versions.get(coin, self.versions.get(coin))
+            rows[coin] = row
+
+        # Eski sıralama korunur; düşen coinler çıkar, yeniler sona eklenir
+        keep = [coin for coin in coins if coin not in rows or rows[coin] is not None]
+        added = [coin for coin, row in rows.items() if row is not None and coin not in snapshot.row_of]
+        new_coins = keep + added
+        matrix = np.empty((len(new_coins), self.window))
+        unchanged = [i for i, coin in enumerate(new_coins) if coin not in rows]
+        if unchanged:
+            matrix[unchanged] = snapshot.matrix[[snapshot.row_of[new_coins[i]] for i in unchanged]]
+        fresh = [i for i, coin in enumerate(new_coins) if coin in rows]
+        if fresh:
+            matrix[fresh] = np.vstack([rows[new_coins[i]] for i in fresh])
+
+        self.versions = new_versions
+        self.last_days = last_days
+        self._snapshot = _Snapshot(new_coins, matrix, end_day)
+        return changed
+
+    def _candidates(self, snapshot, vector, use_lsh):
+        if use_lsh is None:
+            use_lsh = len(snapshot.coins) >= self.lsh_min_coins
+        if not use_lsh:
+            return None
+        lsh = snapshot.lsh
+        if lsh is None:
+            # Eşzamanlı iki sorgu aynı tabloları kurabilir; sonuç aynıdır, biri atılır
+            lsh = RandomProjectionLSH(self.window)
+            lsh.build(snapshot.matrix)
+            snapshot.lsh = lsh
+        return lsh.candidates(vector)
+
+    def query(self, coin_id, k=5, use_lsh=None):
+        """
+        Coin'e en benzer k coin: [(coin_id, korelasyon)] azalan sırada.
+        use_lsh: None ise evren büyüklüğüne göre otomatik seçilir.
+        """
+        snapshot = self._snapshot
+        own = snapshot.row_of[coin_id]
+        vector = snapshot.matrix[own]
+        rows = self._candidates(snapshot, vector, use_lsh)
+        if rows is None or len(rows) <= k:
+            rows = np.arange(len(snapshot.coins))
+        scores = snapshot.matrix[rows] @ vector
+
+        keep = rows != own
+        rows, scores = rows[keep], scores[keep]
+        k = min(k, len(rows))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(snapshot.coins[rows[i]], float(scores[i])) for i in top]
@@ -0,0 +1,138 @@
+"""
+Stats Kernel - Tek geçişli (single-pass) tanımlayıcı istatistik çekirdeği
+
+Ortalama, varyans, çarpıklık (skewness) ve basıklık (kurtosis) aynı sapma dizisi
+üzerinden; min, max ve tüm çeyrekler tek bir `np.partition` çağrısından hesaplanır.
+Sonuçlar pandas'ın `std`, `skew`, `kurtosis` ve `quantile` (linear) ile uyumludur.
+"""
+import numpy as np
+
+DEFAULT_QUANTILES = (0.25, 0.50, 0.75)
+
+
+def _zero_out_fperr(value):
+    return 0.0 if abs(value) < 1e-14 else value
+
+
+def _quantile_positions(n, quantiles):
+    positions = []
+    for q in quantiles:
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        positions.append((pos, lo, hi))
+    return positions
+
+
+def central_moments(x):
+    """(n, mean, m2, m3, m4): ortalama ve merkezi moment toplamları (NaN içermeyen dizi)."""
+    n = len(x)
+    if n == 0:
+        return (0, 0.0, 0.0, 0.0, 0.0)
+    mean = x.sum() / n
+    d = x - mean
+    d2 = d * d
+    return (n, float(mean), float(d2.sum()), float((d2 * d).sum()), float((d2 * d2).sum()))
+
+
+def merge_moments(a, b):
+    """
+    İki parçanın moment toplamlarını birleştirir (Chan/Pébay paralel formülleri).
+    Parçalı (chunked) hesaplamada tüm seriyi bellekte tutmadan aynı sonucu verir.
+    """
+    na, mean_a, m2a, m3a, m4a = a
+    nb, mean_b, m2b, m3b, m4b = b
+    if na == 0:
+        return b
+    if nb == 0:
+        return a
+    n = na + nb
+    delta = mean_b - mean_a
+    delta_n = delta / n
+    mean = mean_a + delta_n * nb
+    m2 = m2a + m2b + delta * delta_n * na * nb
+    m3 = (m3a + m3b + delta_n ** 2 * delta * na * nb * (na - nb)
+          + 3 * delta_n * (na * m2b - nb * m2a))
+    m4 = (m4a + m4b + delta_n ** 3 * delta * na * nb * (na * na - na * nb + nb * nb)
+          + 6 * delta_n ** 2 * (na * na * m2b + nb * nb * m2a)
+          + 4 * delta_n * (na * m3b - nb * m3a))
+    return (n, mean, m2, m3, m4)
+
+
+def shape_statistics(moments):
+    """Moment toplamlarından (var, skewness, kurtosis) üretir; pandas tahmincileri ile aynı."""
+    n, _, m2, m3, m4 = moments
+    m2 = _zero_out_fperr(m2)
+    m3 = _zero_out_fperr(m3)
+
+    var = m2 / (n - 1) if n > 1 else np.nan
+
+    if n < 3:
+        skewness = np.nan
+    elif m2 == 0:
+        skewness = 0.0
+    else:
+        skewness = (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+
+    if n < 4:
+        kurtosis = np.nan
+    else:
+        denominator = (n - 2) * (n - 3) * m2 ** 2
+        if denominator == 0:
+            kurtosis = 0.0
+        else:
+            numerator = n * (n + 1) * (n - 1) * m4
+            adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            kurtosis = numerator / denominator - adj
+
+    return var, skewness, kurtosis
+
+
+def summarize(values, quantiles=DEFAULT_QUANTILES):
+    """
+    Bir seri için tüm temel istatistikleri tek çekirdekte hesaplar.
+    values: pandas Series, liste veya numpy dizisi (NaN değerler atlanır)
+    Dönüş: count, mean, std, var, min, max, skewness, kurtosis ve quantiles sözlüğü
+    """
+    x = np.asarray(values, dtype=np.float64)
+    x = x[~np.isnan(x)]
+    n = len(x)
+
+    if n == 0:
+        return {
+            'count': 0, 'mean': np.nan, 'std': np.nan, 'var': np.nan,
+            'min': np.nan, 'max': np.nan, 'skewness': np.nan, 'kurtosis': np.nan,
+            'quantiles': {q: np.nan for q in quantiles}
+        }
+
+    # Sıra istatistikleri: min, max ve her çeyreğin iki komşu indeksi tek partition ile.
+    # Çeyrek istenmezse (ör. taslaktan okunacaksa) partition atlanır.
+    if quantiles:
+        positions = _quantile_positions(n, quantiles)
+        kth = sorted({0, n - 1} | {i for _, lo, hi in positions for i in (lo, hi)})
+        part = np.partition(x, kth)
+        minimum, maximum = part[0], part[n - 1]
+        quantile_values = {
+            q: part[lo] + (part[hi] - part[lo]) * (pos - lo)
+            for q, (pos, lo, hi) in zip(quantiles, positions)
+        }
+    else:
+        minimum, maximum = x.min(), x.max()
+        quantile_values = {}
+
+    # Momentler: tek sapma dizisi üzerinden m2, m3, m4
+    moments = central_moments(x)
+    mean = moments[1]
+    var, skewness, kurtosis = shape_statistics(moments)
+
+    return {
+        'count': n,
+        'mean': float(mean),
+        'std': float(np.sqrt(var)),
+        'var': float(var),
+        'min': float(minimum),
+        'max': float(maximum),
+        'skewness': float(skewness),
+        'kurtosis': float(kurtosis),
+        'quantiles': {q: float(v) for q, v in quantile_values.items()}
+    }
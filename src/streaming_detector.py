@@ -0,0 +1,242 @@
+"""
+Streaming Detector - Akan veri (streaming) için dayanıklı (robust) anomali tespiti
+
+Kayan pencere medyanı ve MAD (Median Absolute Deviation) indekslenebilir bir
+skiplist üzerinde tutulur: ekleme/çıkarma O(log w), medyan O(log w), MAD ise iki
+sıralı dizide k'ıncı eleman araması ile O(log² w) sürede bulunur.
+"""
+import math
+import random
+from collections import deque
+
+MAD_SCALE = 1.4826
+DEFAULT_WINDOW = 20
+DEFAULT_THRESHOLD = 3.5
+
+STATE_COLLECTION = "anomaly_detector_state"
+ANOMALIES_COLLECTION = "streaming_anomalies"
+
+
+class _Node:
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths
+
+
+_NIL = _Node(float('inf'), [], [])
+
+
+class IndexableSkiplist:
+    """Sıralı çoklu küme; sıra (rank) ile erişim ve değer ile ekleme/silme O(log n)."""
+
+    def __init__(self, expected_size=100, seed=0):
+        self.size = 0
+        self.maxlevels = int(1 + math.log(max(expected_size, 2), 2))
+        self.head = _Node('HEAD', [_NIL] * self.maxlevels, [1] * self.maxlevels)
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        node = self.head
+        i += 1
+        for level in reversed(range(self.maxlevels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def bisect_left(self, value):
+        """`value` değerinden küçük eleman sayısı."""
+        node = self.head
+        rank = 0
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                rank += node.width[level]
+                node = node.next[level]
+        return rank
+
+    def insert(self, value):
+        chain = [None] * self.maxlevels
+        steps_at_level = [0] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        depth = min(self.maxlevels, 1 - int(math.log(1.0 - self._random.random(), 2.0)))
+        new_node = _Node(value, [None] * depth, [None] * depth)
+        steps = 0
+        for level in range(depth):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(depth, self.maxlevels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        if value != chain[0].next[0].value:
+            raise KeyError(f"{value} not found in skiplist")
+
+        depth = len(chain[0].next[0].next)
+        for level in range(depth):
+            prev = chain[level]
+            prev.width[level] += prev.next[level].width[level] - 1
+            prev.next[level] = prev.next[level].next[level]
+        for level in range(depth, self.maxlevels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RollingMedianMAD:
+    """
+    Kayan pencere medyan/MAD dedektörü.
+    Her yeni değer, kendisinden önceki `window` değerle karşılaştırılır; böylece
+    anomali kendi medyanını kirletmez. Pencere dolmadan skor üretilmez.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD, values=None):
+        self.window = window
+        self.threshold = threshold
+        self.values = deque()
+        self.sorted = IndexableSkiplist(expected_size=window)
+        for value in values or []:
+            self._push(value)
+
+    def _push(self, value):
+        self.values.append(value)
+        self.sorted.insert(value)
+        if len(self.values) > self.window:
+            self.sorted.remove(self.values.popleft())
+
+    def median(self):
+        n = len(self.sorted)
+        mid = n // 2
+        if n % 2:
+            return self.sorted[mid]
+        return (self.sorted[mid - 1] + self.sorted[mid]) / 2
+
+    def _kth_deviation(self, k, median, split):
+        """
+        |x - medyan| dizisinin k'ıncı (0 tabanlı) en küçük elemanı.
+        Sol taraf (medyan altı) ters sırada, sağ taraf doğal sırada artandır;
+        iki sıralı dizide ikili arama ile bulunur.
+        """
+        s = self.sorted
+        left_len = split
+        right_len = len(s) - split
+
+        def left(i):
+            return median - s[split - 1 - i]
+
+        def right(j):
+            return s[split + j] - median
+
+        # i: ilk k+1 eleman içinde sol diziden alınan eleman sayısı
+        lo = max(0, k + 1 - right_len)
+        hi = min(k + 1, left_len)
+        while True:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if i < left_len and j > 0 and right(j - 1) > left(i):
+                lo = i + 1
+            elif i > 0 and j < right_len and left(i - 1) > right(j):
+                hi = i - 1
+            else:
+                break
+        candidates = []
+        if i > 0:
+            candidates.append(left(i - 1))
+        if j > 0:
+            candidates.append(right(j - 1))
+        return max(candidates)
+
+    def mad(self, median=None):
+        n = len(self.sorted)
+        if median is None:
+            median = self.median()
+        split = self.sorted.bisect_left(median)
+        mid = n // 2
+        if n % 2:
+            return self._kth_deviation(mid, median, split)
+        return (self._kth_deviation(mid - 1, median, split) + self._kth_deviation(mid, median, split)) / 2
+
+    def update(self, value):
+        """
+        Yeni değeri işler ve (medyan, mad, robust_zscore, is_anomaly) döndürür.
+        Pencere dolmamışsa medyan/mad/skor None olur.
+        """
+        result = (None, None, None, False)
+        if len(self.values) >= self.window:
+            median = self.median()
+            mad = self.mad(median)
+            score = (value - median) / (MAD_SCALE * mad + 1e-10)
+            result = (median, mad, score, abs(score) > self.threshold)
+        self._push(value)
+        return result
+
+
+class StreamingAnomalyStore:
+    """
+    Dedektör durumunu coin bazında MongoDB'de saklar ve ingestion sırasında gelen
+    mumlar için tespit edilen anomalileri `streaming_anomalies` koleksiyonuna yazar.
+    """
+
+    def __init__(self, database, window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD):
+        self.state_collection = database[STATE_COLLECTION]
+        self.anomalies_collection = database[ANOMALIES_COLLECTION]
+        self.window = window
+        self.threshold = threshold
+
+    def process(self, coin_id, candles, column="price"):
+        """Daha önce görülmemiş mumları işler ve bulunan anomalilerin listesini döndürür."""
+        state = self.state_collection.find_one({"coin_id": coin_id}, {"_id": 0}) or {
+            "coin_id": coin_id, "last_timestamp": None, "window": []
+        }
+        detector = RollingMedianMAD(self.window, self.threshold, values=state["window"])
+
+        anomalies = []
+        for candle in candles:
+            ts = candle.get("timestamp")
+            value = candle.get(column)
+            if ts is None or value is None:
+                continue
+            if state["last_timestamp"] is not None and ts <= state["last_timestamp"]:
+                continue
+            median, mad, score, is_anomaly = detector.update(value)
+            state["last_timestamp"] = ts
+            if is_anomaly:
+                anomalies.append({
+                    "coin_id": coin_id,
+                    "timestamp": ts,
+                    "price": value,
+                    "rolling_median": median,
+                    "rolling_mad": mad,
+                    "robust_zscore": score
+                })
+
+        state["window"] = list(detector.values)
+        self.state_collection.replace_one({"coin_id": coin_id}, state, upsert=True)
+        if anomalies:
+            self.anomalies_collection.insert_many([dict(a) for a in anomalies])
+        return anomalies
+
+    def recent_anomalies(self, coin_id, limit=10):
+        cursor = self.anomalies_collection.find({"coin_id": coin_id}, {"_id": 0}).sort("timestamp", -1).limit(limit)
+        return list(cursor)
@@ -4,8 +4,21 @@ import pymongo
 from datetime import datetime
 import pandas as pd
 import os
+import sys
 import logging
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.correlation_store import OnlineCovarianceStore, CORRELATION_TOP_N
+from db import data_versions
+from streaming_detector import StreamingAnomalyStore
+from quantile_sketch import QuantileSketchStore
+from resampling import RollupStore
+from leaderboard import Leaderboard
+from alerts import AlertEngine
+from screener import ScreenerStore
+from candle_series import CandleSeries
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -145,6 +158,8 @@ BINANCE_TO_ID = {
     
 }
 
+CORRELATION_COINS = list(BINANCE_TO_ID.values())[:CORRELATION_TOP_N]
+
 def fetch_and_store_all_coin_details_full():
     client = pymongo.MongoClient(MONGO_URI)
     db = client[DB_NAME]
@@ -337,9 +352,67 @@ def fetch_and_store_binance_ohlc(symbol, interval="1d", limit=90):
             if mapped:
                 market_collection.insert_many(mapped)
                 logger.info(f"Additionally saved {len(mapped)} data with id {frontend_id}.")
+        data_versions.bump(db_, symbol)
+        if frontend_id:
+            data_versions.bump(db_, frontend_id)
+        # Son mum henüz kapanmadı; artımlı yapılara sadece kapanmış mumlar gönderilir.
+        process_new_candles(db_, frontend_id or symbol, records[:-1])
+        # Alarmlar ve sıralama her tick'te güncellenir; açık mumun güncel (canlı) fiyatı da dahil
+        process_price_alerts(db_, frontend_id or symbol, records)
+        update_leaderboard_price(db_, frontend_id or symbol, records)
+        update_screener(db_, frontend_id or symbol, records)
     else:
         logger.warning(f"No data for {symbol}.")
 
+def process_new_candles(database, coin_id, candles):
+    """Yeni kapanmış mumları artımlı (incremental) analiz yapılarına iletir."""
+    try:
+        store = OnlineCovarianceStore(database, CORRELATION_COINS)
+        updated = store.update(coin_id, candles)
+        if updated:
+            logger.info(f"Correlation store updated with {updated} returns for {coin_id}.")
+    except Exception as e:
+        logger.error(f"Correlation store update failed for {coin_id}: {e}")
+    try:
+        anomalies = StreamingAnomalyStore(database).process(coin_id, candles)
+        if anomalies:
+            logger.info(f"{len(anomalies)} streaming anomalies flagged for {coin_id}.")
+    except Exception as e:
+        logger.error(f"Streaming anomaly detection failed for {coin_id}: {e}")
+    try:
+        QuantileSketchStore(database).update(coin_id, candles)
+    except Exception as e:
+        logger.error(f"Quantile sketch update failed for {coin_id}: {e}")
+    try:
+        RollupStore(database).update(coin_id, candles)
+    except Exception as e:
+        logger.error(f"OHLCV rollup update failed for {coin_id}: {e}")
+
+def update_leaderboard_price(database, coin_id, candles):
+    """Sıralamadaki coin fiyatını son (açık) mumun canlı fiyatıyla günceller."""
+    try:
+        leaderboard = Leaderboard(database)
+        if candles and leaderboard.is_built():
+            leaderboard.update_price(coin_id, candles[-1].get("price"))
+    except Exception as e:
+        logger.error(f"Leaderboard update failed for {coin_id}: {e}")
+
+def process_price_alerts(database, coin_id, candles):
+    """Gelen fiyatlarla kesilen alarm kurallarını tetikler (triggered_alerts)."""
+    try:
+        triggered = AlertEngine.for_database(database).process(coin_id, candles)
+        if triggered:
+            logger.info(f"{len(triggered)} price alerts triggered for {coin_id}.")
+    except Exception as e:
+        logger.error(f"Price alert evaluation failed for {coin_id}: {e}")
+
+def update_screener(database, coin_id, candles):
+    """Tarayıcı (screener) tablosundaki son göstergeleri açık mum dahil güncel mumlarla yeniler."""
+    try:
+        ScreenerStore(database).update(coin_id, CandleSeries.from_documents(candles))
+    except Exception as e:
+        logger.error(f"Screener update failed for {coin_id}: {e}")
+
 def main():
     while True:
         update_all_coins()
@@ -0,0 +1,138 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import numpy as np
+import pandas as pd
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from alerts import AlertIndex, AlertEngine, AlertRuleStore, rsi_from_window
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()['test_crypto_db']
+
+def ticks(prices, start='2024-01-01'):
+    dates = pd.date_range(start, periods=len(prices), freq='D')
+    return [{'timestamp': d.strftime('%Y-%m-%dT%H:%M:%SZ'), 'price': float(p)} for d, p in zip(dates, prices)]
+
+def test_index_matches_full_scan():
+    rng = np.random.default_rng(0)
+    rules = [
+        {'rule_id': i, 'coin_id': 'bitcoin', 'metric': 'price',
+         'condition': 'above' if i % 2 else 'below', 'threshold': float(t)}
+        for i, t in enumerate(rng.integers(90, 110, 2000))
+    ]
+    index = AlertIndex()
+    index.extend(rules[:1000])
+    for rule in rules[1000:]:
+        index.add(rule)
+
+    prices = 100 + np.cumsum(rng.normal(0, 2, 200))
+    for previous, value in zip(prices, prices[1:]):
+        expected = {
+            r['rule_id'] for r in rules
+            if (r['condition'] == 'above' and previous < r['threshold'] <= value)
+            or (r['condition'] == 'below' and value <= r['threshold'] < previous)
+        }
+        assert set(index.crossed('bitcoin', 'price', previous, value)) == expected
+    assert index.remove(rules[0]) and len(index) == 1999
+
+def test_rsi_matches_engine():
+    prices = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 40))
+    df = CryptoAnalysisEngine().calculate_rsi(pd.DataFrame({'price': prices}))
+
+    assert rsi_from_window(list(prices)) == pytest.approx(df['rsi'].iloc[-1])
+    assert rsi_from_window(list(prices[:10])) is None
+
+def test_engine_triggers_and_records(database):
+    store = AlertRuleStore(database)
+    cross_up = store.add_rule('ali', 'bitcoin', 'price', 'above', 70000)
+    store.add_rule('ali', 'bitcoin', 'price', 'below', 60000)
+    removed = store.add_rule('veli', 'bitcoin', 'price', 'above', 69500)
+    engine = AlertEngine(database)
+
+    assert engine.process('bitcoin', ticks([68000, 69000])) == []
+    store.delete_rule('veli', removed['rule_id'])
+    alerts = engine.process('bitcoin', ticks([68000, 69000, 71000]))
+
+    assert [a['rule_id'] for a in alerts] == [cross_up['rule_id']]
+    assert store.triggered('ali')[0]['value'] == 71000
+    assert store.triggered('veli') == []
+
+def test_live_candle_updates_are_ticks(database):
+    store = AlertRuleStore(database)
+    rule = store.add_rule('ali', 'ethereum', 'price', 'below', 3000)
+    engine = AlertEngine(database)
+    candles = ticks([3200, 3100])
+    engine.process('ethereum', candles)
+
+    # Açık mum aynı zaman damgasıyla yeni fiyatla tekrar gelir
+    candles[-1]['price'] = 2950.0
+    assert [a['rule_id'] for a in engine.process('ethereum', candles)] == [rule['rule_id']]
+    assert engine.process('ethereum', candles) == []
+
+def test_rsi_rules(database):
+    store = AlertRuleStore(database)
+    rule = store.add_rule('ali', 'solana', 'rsi', 'below', 30)
+    engine = AlertEngine(database)
+    prices = list(np.linspace(100, 120, 20)) + list(np.linspace(118, 80, 10))
+
+    engine.process('solana', ticks(prices[:20]))
+    alerts = engine.process('solana', ticks(prices))
+    assert [a['rule_id'] for a in alerts] == [rule['rule_id']]
+    assert alerts[0]['metric'] == 'rsi' and alerts[0]['value'] < 30
+
+def test_invalid_rules_are_rejected(database):
+    with pytest.raises(ValueError):
+        AlertRuleStore(database).add_rule('ali', 'bitcoin', 'volume', 'above', 1)
+    with pytest.raises(ValueError):
+        AlertRuleStore(database).add_rule('ali', 'bitcoin', 'price', 'crosses', 1)
+    for metric, threshold in (('price', float('nan')), ('price', float('inf')), ('rsi', -1), ('rsi', 101)):
+        with pytest.raises(ValueError):
+            AlertRuleStore(database).add_rule('ali', 'bitcoin', metric, 'above', threshold)
+
+def test_first_sight_seeds_without_replaying_history(database):
+    store = AlertRuleStore(database)
+    rule = store.add_rule('ali', 'bitcoin', 'price', 'above', 70000)
+    engine = AlertEngine(database)
+    # İlk ingestion tüm geçmişi getirir; geçmişteki kesişim alarm üretmez
+    history = ticks([69000, 71000, 69500])
+    assert engine.process('bitcoin', history) == []
+    alerts = engine.process('bitcoin', history + ticks([70500], start='2024-01-04'))
+    assert [a['rule_id'] for a in alerts] == [rule['rule_id']]
+
+def test_sync_is_idempotent_and_catches_late_rules(database):
+    store = AlertRuleStore(database)
+    store.add_rule('ali', 'bitcoin', 'price', 'above', 70000)
+    engine = AlertEngine(database)
+    assert engine.sync() == 1
+    # Aynı pencerenin tekrar okunması indekse kopya eklemez
+    engine.last_seq = 0
+    assert engine.sync() == 0 and len(engine.index) == 1
+
+    # seq'i ayrılmış ama daha yüksek seq'ten sonra yazılmış kural (eşzamanlı ekleme)
+    late = store.add_rule('veli', 'bitcoin', 'price', 'above', 71000)
+    database['alert_rules'].delete_one({'rule_id': late['rule_id']})
+    store.add_rule('ali', 'bitcoin', 'price', 'above', 72000)
+    assert engine.sync() == 1
+    database['alert_rules'].insert_one(dict(late))
+    assert engine.sync() == 1 and len(engine.index) == 3
+
+def test_concurrent_syncs_do_not_duplicate_rules(database):
+    store = AlertRuleStore(database)
+    for threshold in range(70000, 70100):
+        store.add_rule('ali', 'bitcoin', 'price', 'above', threshold)
+    engine = AlertEngine(database)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        list(pool.map(lambda _: engine.sync(), range(10)))
+
+    assert len(engine.index) == 100
+    engine.process('bitcoin', ticks([69000]))
+    assert len(engine.process('bitcoin', ticks([69000, 80000]))) == 100
@@ -77,4 +77,36 @@ def test_investor_stats_endpoint(client: FlaskClient):
 
 def test_invalid_endpoint(client: FlaskClient):
     response = client.get('/api/invalid-endpoint-xyz')
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_market_conditional_get(client: FlaskClient, monkeypatch):
+    import mongomock
+    import pandas as pd
+    import app as app_module
+    from db import data_versions
+    from db.data_versions import VersionTracker
+
+    database = mongomock.MongoClient().db
+    data_versions.bump(database, 'bitcoin')
+    monkeypatch.setattr(app_module, 'version_tracker', VersionTracker(database))
+    calls = []
+    def fake_market_data(coin_id):
+        calls.append(coin_id)
+        return pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01'], utc=True), 'price': [1.0]})
+    monkeypatch.setattr(app_module.db, 'get_market_data', fake_market_data)
+
+    response = client.get('/api/market/bitcoin')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    # Eşleşen doğrulayıcıda 304 döner; veri okunmaz
+    assert client.get('/api/market/bitcoin', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/market/bitcoin', headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+    assert calls == ['bitcoin']
+
+    # Yeni veri sürümü ETag'i değiştirir
+    data_versions.bump(database, 'bitcoin')
+    app_module.version_tracker.invalidate()
+    response = client.get('/api/market/bitcoin', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
@@ -0,0 +1,84 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+pytest.importorskip('pyarrow')
+
+import db.database_manager as db_module
+
+@pytest.fixture
+def fake_db(monkeypatch, tmp_path):
+    database = mongomock.MongoClient()['test_crypto_db']
+    monkeypatch.setattr(db_module, 'db', database)
+    monkeypatch.setattr(db_module, 'market_collection', database['market_data'])
+    monkeypatch.setattr(db_module, 'ARCHIVE_DIR', str(tmp_path))
+    dates = pd.date_range('2023-01-01', periods=120, freq='D')
+    database['market_data'].insert_many([
+        {'coin_id': 'bitcoin', 'timestamp': d.strftime('%Y-%m-%dT%H:%M:%SZ'), 'price': 100.0 + i, 'volume': 1.0}
+        for i, d in enumerate(dates)
+    ])
+    return database
+
+def test_archive_moves_cold_candles_into_monthly_partitions(fake_db, tmp_path):
+    moved = db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01')
+
+    assert moved == {'bitcoin': 59}
+    assert fake_db['market_data'].count_documents({'coin_id': 'bitcoin'}) == 61
+    assert sorted(os.listdir(tmp_path / 'coin_id=bitcoin')) == ['month=2023-01', 'month=2023-02']
+    assert db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01') == {}
+
+def test_reads_merge_archive_and_live(fake_db):
+    before = db_module.get_market_data('bitcoin')
+    db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01')
+    after = db_module.get_market_data('bitcoin')
+
+    assert after['price'].tolist() == before['price'].tolist()
+    assert after['timestamp'].is_monotonic_increasing
+    np.testing.assert_array_equal(db_module.get_candle_series('bitcoin').price, before['price'].to_numpy())
+
+def test_archive_state_is_read_once_per_query(fake_db, monkeypatch):
+    db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01')
+    fake_db['market_data'].delete_many({'coin_id': 'bitcoin'})
+    calls = []
+    has_archive = db_module.MarketArchive.has_archive
+    monkeypatch.setattr(db_module.MarketArchive, 'has_archive', lambda self, coin_id: calls.append(coin_id) or has_archive(self, coin_id))
+
+    # Canlı mum kalmadı; tüm geçmiş arşivden gelir
+    assert len(db_module.get_market_data('bitcoin')) == 59
+    assert calls == ['bitcoin']
+
+def test_range_reads_prune_archive(fake_db):
+    db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01')
+
+    recent = db_module.get_market_data('bitcoin', start='2023-04-01')
+    assert len(recent) == 30 and recent['price'].iloc[0] == 190
+    window = db_module.get_market_data('bitcoin', start='2023-02-25', end='2023-03-05')
+    assert window['price'].tolist() == [155.0 + i for i in range(9)]
+
+def test_reingested_candles_are_not_duplicated(fake_db):
+    db_module.archive_market_data(['bitcoin'], cutoff='2023-03-01')
+    fake_db['market_data'].insert_one({'coin_id': 'bitcoin', 'timestamp': '2023-02-28T00:00:00Z', 'price': 158.0})
+
+    assert len(db_module.get_market_data('bitcoin')) == 120
+    chunks = list(db_module.iter_market_data_chunks('bitcoin', chunk_size=25))
+    assert sum(len(c) for c in chunks) == 120
+
+def test_archive_lookup_uses_exact_coin_id(fake_db):
+    db_module.archive_market_data(['bitcoin'], cutoff='2024-01-01')
+    fake_db['market_data'].insert_many([
+        {'coin_id': 'bitcoin-cash', 'timestamp': '2023-02-01T00:00:00Z', 'price': 5.0},
+        {'coin_id': 'bitcoin-cash', 'timestamp': '2023-06-01T00:00:00Z', 'price': 6.0}
+    ])
+
+    # Canlı mumu kalmayan coin sadece kendi arşivinden okunur; regex geri dönüşü
+    # 'bitcoin-cash' mumlarını bulup bu coin'in arşiviyle birleştirmez
+    df = db_module.get_market_data('bitcoin')
+    assert df['price'].tolist() == [100.0 + i for i in range(120)]
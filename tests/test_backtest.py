@@ -0,0 +1,98 @@
+import sys
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+import backtest
+from backtest import rsi_matrix, ema, hold_positions, evaluate_positions
+from analysis_engine import CryptoAnalysisEngine
+
+def random_walk(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+def naive_rsi_positions(rsi, lower, upper):
+    positions, held = [], 0.0
+    for value in rsi:
+        if value > upper:
+            held = 0.0
+        elif value < lower:
+            held = 1.0
+        positions.append(held)
+    return np.array(positions)
+
+def test_indicators_match_engine():
+    prices = random_walk()
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({'price': prices})
+    for period in (7, 14):
+        expected = engine.calculate_rsi(df, period=period)['rsi'].to_numpy()
+        got = rsi_matrix(prices, [period])[0]
+        np.testing.assert_allclose(got[period - 1:], expected[period - 1:], atol=1e-9)
+        assert np.isnan(got[:period - 1]).all()
+    np.testing.assert_allclose(ema(prices, 12), df['price'].ewm(span=12, adjust=False).mean(), rtol=1e-12)
+
+def test_broadcast_positions_match_loop():
+    prices = random_walk()
+    grid = {'period': [14], 'lower': [25, 30], 'upper': [70, 75]}
+    params, positions = backtest._rsi_positions(prices, grid)
+    rsi = np.nan_to_num(rsi_matrix(prices, [14])[0], nan=50.0)
+    for param_set, row in zip(params, positions):
+        np.testing.assert_array_equal(row, naive_rsi_positions(rsi, param_set['lower'], param_set['upper']))
+
+def test_exit_wins_on_same_bar():
+    entries = np.array([True, False, True, False])
+    exits = np.array([False, False, True, False])
+    np.testing.assert_array_equal(hold_positions(entries, exits), [1, 1, 0, 0])
+
+def test_buy_and_hold_metrics():
+    prices = np.array([100.0, 110.0, 99.0, 120.0])
+    metrics = evaluate_positions(np.ones((1, 4)), prices, fee=0.0)
+    assert metrics['total_return'][0] == pytest.approx(20.0)
+    assert metrics['max_drawdown'][0] == pytest.approx(-10.0)
+    assert metrics['trades'][0] == 1
+    # Komisyon pozisyon açılışında bir kez düşülür
+    with_fee = evaluate_positions(np.ones((1, 4)), prices, fee=0.01)
+    assert with_fee['total_return'][0] == pytest.approx((1.09 * 0.9 * 120 / 99 - 1) * 100)
+
+def test_sweep_is_sorted_and_parallel_matches_serial():
+    prices = random_walk(300)
+    serial = backtest.run(prices, 'sma', grid={'short': [5, 10, 40], 'long': [20, 40]}, workers=1)
+    # short < long olmayan çiftler atlanır
+    assert serial['evaluated'] == 4
+    sharpes = [r['sharpe_ratio'] for r in serial['results']]
+    assert sharpes == sorted(sharpes, reverse=True)
+
+    grid = {'period': [7, 14, 21], 'lower': [25, 30], 'upper': [70]}
+    parallel = backtest.run(prices, 'rsi', grid=grid, workers=2)
+    assert parallel == backtest.run(prices, 'rsi', grid=grid, workers=1)
+    assert parallel['evaluated'] == 6
+
+@pytest.mark.parametrize("strategy", backtest.STRATEGIES)
+def test_default_grids_run(strategy):
+    result = CryptoAnalysisEngine().run_backtest(pd.DataFrame({'price': random_walk()}), strategy=strategy, top=3)
+    assert len(result['results']) == 3
+    assert result['evaluated'] >= 3
+
+def test_invalid_input_raises():
+    prices = random_walk()
+    with pytest.raises(ValueError):
+        backtest.run(prices, 'unknown')
+    with pytest.raises(ValueError):
+        backtest.run(prices, 'rsi', grid={'short': [5]})
+    with pytest.raises(ValueError):
+        backtest.run(prices[:2], 'rsi')
+
+def test_windows_longer_than_history_are_dropped():
+    # Ingestion 90 mum tutar; long=100/200 hiç pozisyon açamaz ve sonuçlara girmez
+    result = backtest.run(random_walk(90), 'sma')
+    assert {r['params']['long'] for r in result['results']} == {30, 50}
+    assert result['evaluated'] == 8
+    with pytest.raises(ValueError):
+        backtest.run(random_walk(90), 'sma', grid={'long': [100, 200]})
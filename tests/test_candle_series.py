@@ -0,0 +1,67 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from candle_series import CandleSeries
+from analysis_engine import CryptoAnalysisEngine
+import db.database_manager as db_module
+
+@pytest.fixture
+def market_df():
+    rng = np.random.default_rng(2)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, size=90))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=90, freq='D', tz='UTC'),
+        'open': close * 0.99,
+        'high': close * 1.01,
+        'low': close * 0.98,
+        'close': close,
+        'price': close,
+        'volume': rng.uniform(1, 10, size=90)
+    })
+
+def test_round_trip_and_slots(market_df):
+    series = CandleSeries.from_dataframe(market_df)
+
+    assert not hasattr(series, '__dict__')
+    assert series.timestamps.dtype == np.int64
+    assert series.nbytes == 90 * 6 * 8
+    pd.testing.assert_frame_equal(series.to_dataframe(), market_df[series.to_dataframe().columns], check_dtype=False)
+
+def test_time_slicing_is_zero_copy(market_df):
+    series = CandleSeries.from_dataframe(market_df)
+    window = series.between('2024-01-10', '2024-01-19')
+
+    assert len(window) == 10
+    assert np.shares_memory(window.close, series.close)
+    assert window.last_price == market_df['close'].iloc[18]
+
+def test_engine_accepts_candle_series(market_df):
+    engine = CryptoAnalysisEngine()
+    series = CandleSeries.from_dataframe(market_df)
+
+    assert engine.predict_future_price(series) == engine.predict_future_price(market_df)
+    assert engine.calculate_descriptive_statistics(series) == engine.calculate_descriptive_statistics(market_df)
+    from_series = engine.generate_scientific_report(series)
+    assert from_series['risk_analysis'] == engine.generate_scientific_report(market_df)['risk_analysis']
+
+def test_database_returns_candle_series(monkeypatch, market_df):
+    fake_db = mongomock.MongoClient()['test_crypto_db']
+    monkeypatch.setattr(db_module, 'db', fake_db)
+    monkeypatch.setattr(db_module, 'market_collection', fake_db['market_data'])
+    records = market_df.assign(coin_id='bitcoin', timestamp=market_df['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+    fake_db['market_data'].insert_many(records.iloc[::-1].to_dict('records'))
+
+    series = db_module.get_candle_series('bitcoin')
+    np.testing.assert_allclose(series.price, market_df['price'].to_numpy())
+    assert (np.diff(series.timestamps) > 0).all()
+    assert series.timestamps[0] == market_df['timestamp'].iloc[0].value
+    assert db_module.get_candle_series('unknown').empty
@@ -0,0 +1,120 @@
+import sys
+import os
+import tracemalloc
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from analysis_engine import CryptoAnalysisEngine
+from quantile_sketch import KLLSketch
+import db.database_manager as db_module
+
+@pytest.fixture
+def engine():
+    return CryptoAnalysisEngine()
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(11)
+    prices = 20000 * np.cumprod(1 + rng.normal(0.0005, 0.03, size=5000))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2010-01-01', periods=5000, freq='D'),
+        'price': prices
+    })
+
+def generate_chunks(rows, chunk_size, seed=0):
+    """Bellekte tüm seriyi tutmadan dakikalık sentetik mum blokları üretir."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2000-01-01')
+    last_price = 100.0
+    for offset in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - offset)
+        prices = last_price * np.cumprod(1 + rng.normal(0, 0.0005, size=size))
+        last_price = prices[-1]
+        timestamps = start + pd.to_timedelta(np.arange(offset, offset + size), unit='min')
+        yield pd.DataFrame({'timestamp': timestamps, 'price': prices})
+
+def test_chunked_matches_in_memory_report(engine, history):
+    exact = engine.generate_scientific_report(history)
+    chunks = [history.iloc[i:i + 777] for i in range(0, len(history), 777)]
+    chunked = engine.generate_scientific_report_chunked(chunks)
+
+    for key in ('count', 'mean', 'std', 'min', 'max', 'variance', 'skewness', 'kurtosis'):
+        assert chunked['descriptive_statistics'][key] == pytest.approx(exact['descriptive_statistics'][key], rel=1e-9)
+    for key in ('mean', 'std', 'min', 'max', 'positive_days', 'negative_days', 'win_rate'):
+        assert chunked['returns_analysis']['daily_returns'][key] == pytest.approx(exact['returns_analysis']['daily_returns'][key], rel=1e-9)
+    assert chunked['returns_analysis']['cumulative_return'] == pytest.approx(exact['returns_analysis']['cumulative_return'], rel=1e-9)
+    assert chunked['risk_analysis']['var_parametric_95'] == pytest.approx(exact['risk_analysis']['var_parametric_95'], rel=1e-9)
+    assert chunked['risk_analysis']['max_drawdown'] == pytest.approx(exact['risk_analysis']['max_drawdown'], rel=1e-9)
+    assert chunked['trend_analysis'] == exact['trend_analysis']
+    assert chunked['analysis_period'] == exact['analysis_period']
+
+    # Çeyrekler taslaktan okunur: sıra hatası belgelenen sınır içinde kalmalı
+    ordered = np.sort(history['price'].to_numpy())
+    rank = np.searchsorted(ordered, chunked['descriptive_statistics']['median'], side='right') / len(ordered)
+    assert abs(rank - 0.5) <= KLLSketch.rank_error()
+
+    # Anomaliler ikinci geçişte sayılır; IQR sınırları taslaktan geldiği için yaklaşık
+    exact_counts = exact['anomaly_detection']['by_method']
+    chunked_counts = chunked['anomaly_detection']['by_method']
+    for method in ('zscore', 'rolling', 'price_spike'):
+        assert chunked_counts[method] == exact_counts[method]
+    assert abs(chunked_counts['iqr'] - exact_counts['iqr']) <= 0.01 * len(history)
+
+def test_chunked_report_counts_only_valid_prices(engine, history):
+    history = history.copy()
+    history.loc[[10, 2000, 4999], 'price'] = np.nan
+    chunked = engine.generate_scientific_report_chunked(lambda: (history.iloc[i:i + 500] for i in range(0, len(history), 500)))
+    assert chunked['analysis_period']['total_days'] == len(history) - 3
+    assert chunked['data_quality']['missing_values'] == 3
+    assert chunked['anomaly_detection']['total_anomalies'] == chunked['anomaly_detection']['by_method']['any_method']
+
+def test_one_shot_iterator_is_rejected(engine, history):
+    with pytest.raises(TypeError):
+        engine.generate_scientific_report_chunked(iter([history]))
+
+def test_mongo_cursor_chunks(monkeypatch, history):
+    fake_db = mongomock.MongoClient()['test_crypto_db']
+    monkeypatch.setattr(db_module, 'db', fake_db)
+    monkeypatch.setattr(db_module, 'market_collection', fake_db['market_data'])
+    records = history.assign(coin_id='bitcoin', timestamp=history['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+    fake_db['market_data'].insert_many(records.to_dict('records'))
+
+    chunks = list(db_module.iter_market_data_chunks('bitcoin', chunk_size=1200))
+    assert [len(c) for c in chunks] == [1200, 1200, 1200, 1200, 200]
+    assert chunks[0]['timestamp'].is_monotonic_increasing
+
+def test_fifty_million_rows_under_memory_cap(engine):
+    rows = 50_000_000
+    chunk_size = 500_000
+    memory_cap = 256 * 1024 * 1024  # 50M float64 fiyat tek başına ~400MB eder
+
+    tracemalloc.start()
+    try:
+        report = engine.generate_scientific_report_chunked(lambda: generate_chunks(rows, chunk_size))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert report['analysis_period']['total_days'] == rows
+    assert report['descriptive_statistics']['count'] == rows
+    assert sum(report['trend_analysis']['trend_distribution'].values()) == rows
+    assert peak < memory_cap
+
+def test_return_reservoir_is_bounded(history):
+    from chunked_report import ChunkedReportBuilder
+    builder = ChunkedReportBuilder(return_sample_size=100)
+    for i in range(0, len(history), 777):
+        builder.add_chunk(history.iloc[i:i + 777])
+    sample = builder.sampled_returns()
+    prices = history['price'].to_numpy()
+    log_returns = np.log(prices[1:] / prices[:-1])
+
+    assert builder.return_sample_seen == len(log_returns) and len(sample) == 100
+    assert np.isin(sample, log_returns).all() and len(np.unique(sample)) == 100
@@ -0,0 +1,86 @@
+import sys
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from clustering import pairwise_correlation, cluster_map, ClusterCache
+from analysis_engine import CryptoAnalysisEngine
+
+def planted_panel(n_days=200, per_group=5, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.03, (n_days, 2))
+    returns = np.column_stack([
+        factors[:, g] + rng.normal(0, 0.005, n_days) for g in (0, 1) for _ in range(per_group)
+    ])
+    coins = [f'{name}{i}' for name in ('a', 'b') for i in range(per_group)]
+    return coins, 100 * np.exp(np.cumsum(returns, axis=0))
+
+def test_pairwise_correlation_matches_pandas():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 1, (300, 6))
+    returns[rng.random(returns.shape) < 0.2] = np.nan
+    returns[:250, 5] = np.nan
+
+    expected = pd.DataFrame(returns).corr(min_periods=20).to_numpy()
+    np.testing.assert_allclose(pairwise_correlation(returns, min_overlap=20), expected, atol=1e-10, equal_nan=True)
+
+def test_planted_groups_are_recovered():
+    coins, prices = planted_panel()
+    prices[:50, 3] = np.nan
+    result = CryptoAnalysisEngine().calculate_cluster_map(coins, prices, n_clusters=2)
+
+    labels = dict(zip(result['coins'], result['clusters']))
+    assert len({labels[f'a{i}'] for i in range(5)}) == 1
+    assert len({labels[f'b{i}'] for i in range(5)}) == 1
+    assert labels['a0'] != labels['b0']
+    # Yeniden dizilmiş matriste aynı kümedeki coinler bitişik bloklar oluşturur
+    assert result['clusters'] == sorted(result['clusters'])
+    assert all(r['mean_correlation'] > 0.9 for r in result['regimes'])
+    assert np.allclose(np.diag(result['matrix']), 1.0)
+
+def test_short_histories_are_excluded():
+    coins, prices = planted_panel()
+    prices[:-10, 0] = np.nan
+    result = cluster_map(coins, prices, n_clusters=2)
+    assert 'a0' not in result['coins']
+    with pytest.raises(ValueError):
+        cluster_map(coins[:1], prices[:, :1])
+    with pytest.raises(ValueError):
+        cluster_map(coins, prices, method='median')
+
+def test_thousand_coin_universe():
+    rng = np.random.default_rng(2)
+    returns = rng.normal(0, 0.02, (365, 1000))
+    returns[rng.random(returns.shape) < 0.05] = np.nan
+    prices = 100 * np.exp(np.nancumsum(returns, axis=0))
+    prices[np.isnan(returns)] = np.nan
+
+    start = time.perf_counter()
+    result = cluster_map([f'c{i}' for i in range(1000)], prices)
+    assert time.perf_counter() - start < 10
+    assert len(result['coins']) == 1000 and len(result['matrix']) == 1000
+
+def test_cache_is_keyed_by_versions():
+    cache = ClusterCache()
+    cache.put((180, 8, 'average'), (('bitcoin', 1),), {'coins': []})
+    assert cache.get((180, 8, 'average'), (('bitcoin', 1),)) == {'coins': []}
+    assert cache.get((180, 8, 'average'), (('bitcoin', 2),)) is None
+
+def test_cache_evicts_least_recently_used():
+    cache = ClusterCache(max_entries=2)
+    versions = (('bitcoin', 1),)
+    for days in (30, 60, 90):
+        cache.put((days, 8, 'average'), versions, {'days': days})
+        cache.get((30, 8, 'average'), versions)
+    assert len(cache) == 2
+    assert cache.get((30, 8, 'average'), versions) == {'days': 30}
+    assert cache.get((60, 8, 'average'), versions) is None
+    # Sürümü eskiyen girdi okunurken atılır
+    assert cache.get((90, 8, 'average'), (('bitcoin', 2),)) is None and len(cache) == 1
@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from db.correlation_store import OnlineCovarianceStore
+
+COINS = ['bitcoin', 'ethereum', 'solana']
+
+@pytest.fixture
+def mock_db():
+    return mongomock.MongoClient()['test_crypto_db']
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(42)
+    dates = pd.date_range(start='2023-01-01', periods=40, freq='D')
+    timestamps = [d.strftime('%Y-%m-%dT%H:%M:%SZ') for d in dates]
+    base = rng.normal(0, 0.02, size=40)
+    result = {}
+    for i, coin in enumerate(COINS):
+        returns = base * (i + 1) + rng.normal(0, 0.01, size=40)
+        prices = 100 * np.cumprod(1 + returns)
+        result[coin] = [{'timestamp': ts, 'price': float(p)} for ts, p in zip(timestamps, prices)]
+    return result
+
+def expected_matrix(candles):
+    frame = pd.DataFrame({coin: [c['price'] for c in rows] for coin, rows in candles.items()})
+    return frame.pct_change().dropna().corr()
+
+def test_matrix_matches_pandas(mock_db, candles):
+    store = OnlineCovarianceStore(mock_db, COINS)
+    for coin in COINS:
+        store.update(coin, candles[coin])
+
+    matrix = store.get_correlation_matrix(COINS)
+    expected = expected_matrix(candles)
+    for a in COINS:
+        for b in COINS:
+            assert matrix[a][b] == pytest.approx(expected.loc[a, b], rel=1e-9)
+
+def test_interleaved_and_repeated_ingestion(mock_db, candles):
+    store = OnlineCovarianceStore(mock_db, COINS)
+    for start in range(0, 40, 10):
+        for coin in COINS:
+            # Binance her çağrıda tüm geçmişi tekrar döndürür
+            store.update(coin, candles[coin][:start + 10])
+
+    matrix = store.get_correlation_matrix(COINS)
+    expected = expected_matrix(candles)
+    assert matrix['bitcoin']['solana'] == pytest.approx(expected.loc['bitcoin', 'solana'], rel=1e-9)
+
+def test_untracked_coin_is_ignored(mock_db, candles):
+    store = OnlineCovarianceStore(mock_db, ['bitcoin', 'ethereum'])
+    assert store.update('solana', candles['solana']) == 0
+    assert not store.has_coins(['bitcoin', 'solana'])
+
+def test_backfill_seeds_missing_pairs_without_double_counting(mock_db, candles):
+    store = OnlineCovarianceStore(mock_db, COINS)
+    for coin in COINS:
+        store.update(coin, candles[coin][:30])
+    # Çiftler henüz birikmemiş gibi (ör. ilk ingestion'da eşleşemeyen getiriler)
+    mock_db['correlation_pairs'].delete_many({})
+    assert store.has_coins(COINS) and not store.has_pairs(COINS)
+
+    # Geçmiş her coin'in son işlenen mumunda kesilir; sonrası artımlı güncellemeye kalır
+    assert store.backfill(COINS, lambda coin: candles[coin]) == 3
+    assert store.has_pairs(COINS)
+    for coin in COINS:
+        store.update(coin, candles[coin])
+
+    matrix = store.get_correlation_matrix(COINS)
+    expected = expected_matrix(candles)
+    for a in COINS:
+        for b in COINS:
+            assert matrix[a][b] == pytest.approx(expected.loc[a, b], rel=1e-9)
+    assert store.backfill(COINS, lambda coin: candles[coin]) == 0
+
+class SlowWrites:
+    """Durum yazımını geciktiren koleksiyon sarmalayıcısı (yarış penceresini görünür kılar)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def replace_one(self, *args, **kwargs):
+        time.sleep(0.002)
+        return self.collection.replace_one(*args, **kwargs)
+
+class SlowStore(OnlineCovarianceStore):
+    def __init__(self, database, coins=None):
+        super().__init__(database, coins)
+        self.state_collection = SlowWrites(self.state_collection)
+
+def test_threaded_ingestion_keeps_every_observation(mock_db, candles):
+    # Ingestion betikleri coinleri iş parçacığı havuzunda aynı anda işler
+    with ThreadPoolExecutor(max_workers=len(COINS)) as pool:
+        for step in range(1, 41):
+            list(pool.map(lambda coin: SlowStore(mock_db, COINS).update(coin, candles[coin][:step]), COINS))
+
+    pairs = list(mock_db['correlation_pairs'].find({}, {'_id': 0}))
+    assert len(pairs) == 3 and all(doc['n'] == 39 for doc in pairs)
+    matrix = OnlineCovarianceStore(mock_db).get_correlation_matrix(COINS)
+    assert matrix['bitcoin']['ethereum'] == pytest.approx(expected_matrix(candles).loc['bitcoin', 'ethereum'], rel=1e-9)
@@ -112,4 +112,28 @@ def test_market_data_with_null_values():
     save_market_data(coin_id, test_df)
     result = get_market_data(coin_id)
     
-    assert len(result) >= 1
\ No newline at end of file
+    assert len(result) >= 1
+
+def test_save_market_data_bumps_data_version():
+    coin_id = "version-test"
+    assert db_module.get_data_version(coin_id) == 0
+
+    save_market_data(coin_id, pd.DataFrame([{"timestamp": "2023-01-01", "price": 100}]))
+    save_market_data(coin_id, pd.DataFrame([{"timestamp": "2023-01-02", "price": 110}]))
+
+    assert db_module.get_data_version(coin_id) == 2
+    assert db_module.get_data_versions([coin_id])[coin_id]["version"] == 2
+
+def test_concurrent_bumps_return_distinct_versions(mock_db):
+    from concurrent.futures import ThreadPoolExecutor
+    from db import data_versions
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        versions = list(pool.map(lambda _: data_versions.bump(mock_db, "race-test"), range(50)))
+    assert sorted(versions) == list(range(1, 51))
+
+def test_market_coin_ids_skip_symbol_aliases():
+    for coin_id in ("bitcoin", "BTCUSDT", "ethereum", "ETHUSDT"):
+        save_market_data(coin_id, pd.DataFrame([{"timestamp": "2023-01-01", "price": 100}]))
+
+    assert db_module.get_market_coin_ids() == ["BTCUSDT", "ETHUSDT", "bitcoin", "ethereum"]
+    assert db_module.get_market_coin_ids(frontend_only=True) == ["bitcoin", "ethereum"]
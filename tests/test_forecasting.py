@@ -0,0 +1,56 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from forecasting import fit_models, forecast, ForecastModelCache
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def coin_prices():
+    rng = np.random.default_rng(4)
+    return {
+        'bitcoin': 30000 + np.cumsum(rng.normal(50, 300, size=90)),
+        'ethereum': 2000 + np.cumsum(rng.normal(5, 30, size=60)),
+        'solana': 100 + np.cumsum(rng.normal(0.5, 2, size=30))
+    }
+
+def test_panel_ols_matches_per_coin_fit(coin_prices):
+    params = fit_models(coin_prices, 'linear')
+    for coin, prices in coin_prices.items():
+        slope, intercept = np.polyfit(np.arange(len(prices)), prices, 1)
+        assert params[coin]['slope'] == pytest.approx(slope)
+        assert params[coin]['intercept'] == pytest.approx(intercept)
+        assert params[coin]['last_price'] == prices[-1]
+
+def test_forecast_has_widening_bands(coin_prices):
+    params = fit_models(coin_prices, 'holt')['bitcoin']
+    result = forecast(params, 'holt', horizon=7)
+
+    assert len(result) == 7
+    widths = [r['upper_bound'] - r['lower_bound'] for r in result]
+    assert all(r['lower_bound'] < r['predicted_price'] < r['upper_bound'] for r in result)
+    assert widths == sorted(widths)
+
+def test_engine_prediction_keeps_format(coin_prices):
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({'price': coin_prices['solana']})
+    result = engine.predict_future_price(df)
+
+    assert result[0]['day'] == '+1 Day'
+    assert 'predicted_price' in result[0]
+    assert engine.predict_future_price(df.head(3)) == []
+
+def test_cache_is_keyed_by_data_version():
+    cache = ForecastModelCache()
+    cache.put('bitcoin', 'linear', 3, {'slope': 1.0})
+
+    assert cache.get('bitcoin', 'linear', 3) == {'slope': 1.0}
+    assert cache.get('bitcoin', 'linear', 4) is None
+    assert cache.get('bitcoin', 'holt', 3) is None
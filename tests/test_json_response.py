@@ -0,0 +1,47 @@
+import sys
+import os
+import json
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+import json_response
+from json_response import dumps, frame_records, format_timestamps
+
+def test_frame_records_formats_timestamps_and_nulls():
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 00:00:00', '2024-01-02 12:30:00.250000', None], format='ISO8601'),
+        'price': [1.5, np.nan, 3.0],
+        'volume': [10, 20, 30]
+    })
+    records = frame_records(df)
+    assert records[0] == {'timestamp': '2024-01-01T00:00:00Z', 'price': 1.5, 'volume': 10}
+    assert records[1]['timestamp'] == '2024-01-02T12:30:00.250000Z' and records[1]['price'] is None
+    assert records[2]['timestamp'] is None
+    # Saat dilimli değerler UTC'ye çevrilir
+    aware = pd.Series(pd.to_datetime(['2024-01-01 03:00'], utc=False)).dt.tz_localize('Europe/Istanbul')
+    assert format_timestamps(aware, suffix='+00:00').tolist() == ['2024-01-01T00:00:00+00:00']
+
+def test_string_timestamps():
+    values = pd.Series(['Mon, 01 Jan 2024 00:00:00 GMT', 'not a date', None], dtype=object)
+    assert format_timestamps(values).tolist() == ['2024-01-01T00:00:00Z', 'not a date', None]
+
+@pytest.mark.parametrize('backend', ['orjson', 'json'])
+def test_dumps_handles_numpy_and_non_finite(monkeypatch, backend):
+    if backend == 'json':
+        monkeypatch.setattr(json_response, 'orjson', None)
+    elif json_response.orjson is None:
+        pytest.skip('orjson not installed')
+    payload = {
+        'b': np.float64('nan'), 'a': np.array([1.0, np.inf]), 'n': np.int64(3),
+        'flag': np.bool_(True), 'when': pd.Timestamp('2024-01-01', tz='UTC'), 'nested': [{'x': float('-inf')}]
+    }
+    assert json.loads(dumps(payload)) == {
+        'a': [1.0, None], 'b': None, 'flag': True, 'n': 3,
+        'when': 'Mon, 01 Jan 2024 00:00:00 GMT', 'nested': [{'x': None}]
+    }
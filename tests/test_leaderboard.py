@@ -0,0 +1,122 @@
+import sys
+import os
+import pytest
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from leaderboard import Leaderboard
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()['test_crypto_db']
+
+@pytest.fixture
+def users():
+    rng = np.random.default_rng(11)
+    coins = ['bitcoin', 'ethereum', 'solana', 'dogecoin']
+    return [
+        {
+            'username': f'user{u}',
+            'wallet_balance': round(float(rng.uniform(0, 10000)), 2),
+            'trades': [
+                {'coin': coins[rng.integers(0, 4)], 'amount': float(rng.uniform(0.1, 5)),
+                 'buy_price': float(rng.uniform(100, 70000))}
+                for _ in range(rng.integers(0, 6))
+            ]
+        }
+        for u in range(30)
+    ]
+
+PRICES = {'bitcoin': 64000.0, 'ethereum': 3500.0, 'solana': 150.0}
+
+def snapshot(leaderboard):
+    return {doc['username']: doc['pnl_percent'] for doc in leaderboard.users_collection.find()}
+
+def test_overview_matches_full_scan(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users, PRICES)
+
+    assert leaderboard.is_built()
+    assert leaderboard.overview() == CryptoAnalysisEngine().calculate_exchange_overview(users, PRICES)
+
+def test_top_k_is_sorted(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users, PRICES)
+    top = leaderboard.top(5)
+
+    expected = sorted(snapshot(leaderboard).items(), key=lambda item: (-item[1], item[0]))[:5]
+    assert [row['username'] for row in top] == [username for username, _ in expected]
+    assert [row['rank'] for row in top] == [1, 2, 3, 4, 5]
+
+def test_price_update_touches_only_holders(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users, PRICES)
+    holders = sum(any(t['coin'] == 'solana' for t in u['trades']) for u in users)
+
+    assert leaderboard.update_price('solana', 175.0) == holders
+    assert leaderboard.update_price('solana', 175.0) == 0
+    # Fiyatı bilinmeyen coin ilk kez fiyatlanınca maliyetten piyasa değerine geçer
+    leaderboard.update_price('dogecoin', 0.2)
+
+    expected = Leaderboard(mongomock.MongoClient()['other'])
+    expected.rebuild(users, dict(PRICES, solana=175.0, dogecoin=0.2))
+    assert snapshot(leaderboard) == pytest.approx(snapshot(expected))
+
+def test_new_users_and_trades_are_incremental(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users[:-1], PRICES)
+    leaderboard.upsert_user(users[-1])
+    users[0]['trades'].append({'coin': 'ethereum', 'amount': 1.0, 'buy_price': 1000.0})
+    leaderboard.upsert_user(users[0])
+
+    assert snapshot(leaderboard) == pytest.approx({
+        u['username']: CryptoAnalysisEngine().calculate_exchange_overview([u], PRICES)['king']['pnl_percent']
+        for u in users
+    }, abs=0.01)
+    assert leaderboard.overview() == CryptoAnalysisEngine().calculate_exchange_overview(users, PRICES)
+
+def test_users_version_advances_only_from_previous(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users[:-2], PRICES, users_version=3)
+    leaderboard.upsert_user(users[-2], users_version=4)
+    assert leaderboard.users_version() == 4
+    # Araya başka bir yazım girdiyse (sürüm 5 atlandı) sıralama eski sürümde kalır
+    leaderboard.upsert_user(users[-1], users_version=6)
+    assert leaderboard.users_version() == 4
+
+class InterleavedFind:
+    """Sahipler okunduktan hemen sonra araya bir upsert_user sokar (eşzamanlı yazım)."""
+
+    def __init__(self, collection, on_find):
+        self._collection = collection
+        self._on_find = on_find
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, *args, **kwargs):
+        docs = list(self._collection.find(*args, **kwargs))
+        on_find, self._on_find = self._on_find, None
+        if on_find:
+            on_find()
+        return docs
+
+def test_price_update_does_not_overwrite_concurrent_upsert(database, users):
+    leaderboard = Leaderboard(database)
+    leaderboard.rebuild(users, PRICES)
+    holder = next(u for u in users if any(t['coin'] == 'solana' for t in u['trades']))
+    holder['trades'].append({'coin': 'ethereum', 'amount': 2.0, 'buy_price': 3000.0})
+
+    concurrent = Leaderboard(database)
+    leaderboard.users_collection = InterleavedFind(database['leaderboard'], lambda: concurrent.upsert_user(holder))
+    leaderboard.update_price('solana', 175.0)
+
+    expected = Leaderboard(mongomock.MongoClient()['other'])
+    expected.rebuild(users, dict(PRICES, solana=175.0))
+    assert snapshot(leaderboard) == pytest.approx(snapshot(expected))
@@ -0,0 +1,78 @@
+import sys
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from market_anomalies import detect, scan, MarketAnomalyCache
+from analysis_engine import CryptoAnalysisEngine
+
+def make_panel(n_days=150, n_coins=6, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, (n_days, n_coins)), axis=0))
+    timestamps = pd.date_range('2024-01-01', periods=n_days, freq='D', tz='UTC').as_unit('ns').asi8
+    return timestamps, [f'coin{j}' for j in range(n_coins)], prices
+
+def test_flags_match_per_coin_summary():
+    timestamps, coins, prices = make_panel()
+    prices[70, 2] *= 1.6
+    flags = detect(prices)
+    engine = CryptoAnalysisEngine()
+    for j in range(len(coins)):
+        df = pd.DataFrame({'timestamp': pd.to_datetime(timestamps, utc=True), 'price': prices[:, j]})
+        expected = engine.get_anomaly_summary(df)['dataframe']
+        np.testing.assert_array_equal(flags['zscore'][:, j], expected['is_anomaly_zscore'])
+        np.testing.assert_array_equal(flags['iqr'][:, j], expected['is_anomaly_iqr'])
+        np.testing.assert_array_equal(flags['rolling'][:, j], expected['is_anomaly_rolling'])
+        np.testing.assert_array_equal(flags['price_spike'][:, j], expected['is_spike'])
+
+def test_gaps_do_not_shift_windows():
+    timestamps, coins, prices = make_panel(n_coins=2)
+    gappy = prices.copy()
+    gappy[50, 1] = np.nan
+    flags = detect(gappy)
+    # Eksik gün hiçbir yöntemde anomali sayılmaz; o günü içeren kayan pencereler tanımsızdır
+    assert not any(values[50, 1] for values in flags.values())
+    assert not flags['rolling'][50:70, 1].any()
+    # Ani değişim bir önceki gözleme göre ölçülür
+    gappy[51, 1] = gappy[49, 1] * 1.5
+    assert detect(gappy)['price_spike'][51, 1]
+
+def test_market_wide_events_are_flagged():
+    timestamps, coins, prices = make_panel()
+    prices[100:, :4] *= 0.7
+    prices[120:, 5] *= 1.4
+    result = scan(timestamps, coins, prices, event_share=0.5, min_coins=3)
+
+    event_days = [row['timestamp'] for row in result['events']]
+    # Seviye kayması sonraki birkaç günde kayan pencere anomalisi olarak sürebilir
+    assert event_days[0] == pd.Timestamp(timestamps[100], tz='UTC').isoformat()
+    assert all(day < pd.Timestamp(timestamps[110], tz='UTC').isoformat() for day in event_days)
+    day = result['events'][0]
+    assert day['anomalous'] >= 4 and day['methods']['price_spike'] == 4
+    assert result['coins'] == 6 and result['timestamps'] == 150
+    # Tek coin'lik şok piyasa geneli olay sayılmaz
+    single = next(row for row in result['timeline'] if row['timestamp'] == pd.Timestamp(timestamps[120], tz='UTC').isoformat())
+    assert not single['market_event']
+
+def test_cache_is_keyed_by_versions():
+    cache = MarketAnomalyCache()
+    cache.put((90, 0.3, 3), (('bitcoin', 1),), {'coins': 1})
+    assert cache.get((90, 0.3, 3), (('bitcoin', 1),)) == {'coins': 1}
+    assert cache.get((90, 0.3, 3), (('bitcoin', 2),)) is None
+
+def test_cache_evicts_least_recently_used():
+    cache = MarketAnomalyCache(max_entries=2)
+    versions = (('bitcoin', 1),)
+    for share in (0.1, 0.2, 0.3):
+        cache.put((90, share, 3), versions, {'share': share})
+        cache.get((90, 0.1, 3), versions)
+    assert len(cache) == 2
+    assert cache.get((90, 0.1, 3), versions) == {'share': 0.1}
+    assert cache.get((90, 0.2, 3), versions) is None
+    assert cache.get((90, 0.3, 3), (('bitcoin', 2),)) is None and len(cache) == 1
@@ -0,0 +1,96 @@
+import sys
+import os
+import tracemalloc
+import pytest
+import pandas as pd
+import numpy as np
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from monte_carlo import simulate_paths, simulate_terminal, simulate_risk, value_at_risk, log_returns
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(9)
+    return 100 * np.cumprod(1 + rng.normal(0.001, 0.02, size=500))
+
+def test_seeded_paths_are_reproducible_across_workers(prices):
+    returns = log_returns(prices)
+    serial = simulate_paths(returns, horizon=5, n_paths=4000, seed=7, chunk_size=1000)
+    parallel = simulate_paths(returns, horizon=5, n_paths=4000, seed=7, chunk_size=1000, workers=2)
+
+    assert serial.shape == (4000, 5)
+    np.testing.assert_array_equal(serial, parallel)
+
+def test_bootstrap_one_day_var_matches_historic(prices):
+    returns = pd.Series(prices).pct_change().dropna()
+    result = simulate_risk(prices, n_paths=200_000, seed=1)
+
+    assert result['var_daily'] == pytest.approx(returns.quantile(0.05) * 100, abs=0.15)
+    assert result['cvar_daily'] <= result['var_daily']
+
+def test_gbm_var_matches_normal_quantile():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.0, 0.01, size=5000)
+    paths = simulate_paths(returns, horizon=4, n_paths=100_000, method='gbm', seed=5)
+    var, cvar = value_at_risk(paths[:, -1])
+
+    sigma = returns.std(ddof=1) * 2  # 4 günlük ufukta σ·√4
+    assert var == pytest.approx(np.expm1(returns.mean() * 4 - 0.5 * sigma ** 2 - 1.645 * sigma), abs=2e-3)
+    assert cvar < var
+
+def test_fan_bands_are_ordered_and_widen(prices):
+    fan = simulate_risk(prices, horizon=10, n_paths=5000, seed=2, fan=True)['fan_chart']
+
+    assert len(fan) == 10
+    assert all(d['p5'] < d['p25'] < d['p50'] < d['p75'] < d['p95'] for d in fan)
+    assert fan[-1]['p95'] - fan[-1]['p5'] > fan[0]['p95'] - fan[0]['p5']
+
+def test_report_includes_monte_carlo_on_request(prices):
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=len(prices), freq='D'),
+        'price': prices
+    })
+
+    assert 'monte_carlo' not in engine.generate_scientific_report(df)['risk_analysis']
+    report = engine.generate_scientific_report(df, monte_carlo_options={'n_paths': 1000, 'seed': 4})
+    assert report['risk_analysis']['monte_carlo']['n_paths'] == 1000
+
+def test_unknown_method_rejected(prices):
+    with pytest.raises(ValueError):
+        simulate_paths(log_returns(prices), method='heston')
+
+def test_terminal_simulation_keeps_only_two_columns(prices):
+    returns = log_returns(prices)
+    full = simulate_paths(returns, horizon=30, n_paths=3000, seed=6, chunk_size=500)
+    ends = simulate_terminal(returns, horizon=30, n_paths=3000, seed=6, chunk_size=500)
+    np.testing.assert_array_equal(ends, full[:, [0, -1]])
+
+    tracemalloc.start()
+    try:
+        simulate_risk(prices, horizon=90, n_paths=200_000, seed=1, chunk_size=10_000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Tam yol matrisi 200k × 90 × 8 bayt ≈ 144MB ederdi
+    assert peak < 40 * 1024 * 1024
+
+def test_chunked_report_includes_monte_carlo(prices):
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=len(prices), freq='D'),
+        'price': prices
+    })
+    options = {'n_paths': 2000, 'seed': 4, 'horizon': 5}
+    exact = engine.generate_scientific_report(df, monte_carlo_options=options)['risk_analysis']['monte_carlo']
+    chunks = [df.iloc[i:i + 64] for i in range(0, len(df), 64)]
+    chunked = engine.generate_scientific_report_chunked(chunks, monte_carlo_options=options)['risk_analysis']['monte_carlo']
+    # Örneklem tüm getirileri kapsadığında sonuç bellek içi raporla aynıdır
+    assert chunked['return_sample_size'] == len(prices) - 1
+    for key in ('var_daily', 'cvar_daily', 'var_horizon', 'cvar_horizon'):
+        assert chunked[key] == pytest.approx(exact[key], rel=1e-9)
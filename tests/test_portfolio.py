@@ -0,0 +1,144 @@
+import sys
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from portfolio import TradeBook, value_trades, user_totals, coin_trade_counts
+from analysis_engine import CryptoAnalysisEngine
+
+PRICES = {'bitcoin': 64000.0, 'ethereum': 3500.0, 'solana': 150.0}
+
+@pytest.fixture
+def users():
+    rng = np.random.default_rng(3)
+    coins = ['bitcoin', 'ethereum', 'solana', 'dogecoin']
+    return [
+        {
+            'username': f'user{u}',
+            'wallet_balance': float(rng.uniform(0, 10000)),
+            'trades': [
+                {'coin': coins[rng.integers(0, 4)], 'amount': float(rng.uniform(0.1, 5)),
+                 'buy_price': float(rng.uniform(100, 70000))}
+                for _ in range(rng.integers(0, 6))
+            ]
+        }
+        for u in range(40)
+    ]
+
+def legacy_user_performance(user, prices):
+    details, total = [], 0
+    for trade in user['trades']:
+        current = prices.get(trade['coin'], trade['buy_price'])
+        pnl = (current - trade['buy_price']) * trade['amount']
+        pnl_percent = ((current - trade['buy_price']) / (trade['buy_price'] + 1e-10)) * 100
+        details.append((trade['coin'], current, round(pnl, 2), round(pnl_percent, 2)))
+        total += pnl
+    return details, round(total, 2)
+
+def test_user_performance_matches_loop(users):
+    engine = CryptoAnalysisEngine()
+    for user in users:
+        result = engine.analyze_user_performance(user, PRICES)
+        details, total = legacy_user_performance(user, PRICES)
+
+        assert result['total_pnl'] == pytest.approx(total, abs=0.011)
+        assert len(result['portfolio_details']) == len(details)
+        for row, (coin, current, pnl, pnl_percent) in zip(result['portfolio_details'], details):
+            assert row['coin'] == coin
+            assert row['current_price'] == current
+            assert row['pnl'] == pytest.approx(pnl, abs=0.011)
+            assert row['pnl_percent'] == pytest.approx(pnl_percent, abs=0.011)
+
+def test_missing_price_falls_back_to_buy_price():
+    user = {'username': 'a', 'trades': [{'coin': 'unknown', 'amount': 2, 'buy_price': 10}]}
+    result = CryptoAnalysisEngine().analyze_user_performance(user, PRICES)
+
+    assert result['portfolio_details'][0]['current_price'] == 10
+    assert result['total_pnl'] == 0
+    assert result['overall_status'] == "Loss"
+
+def test_exchange_overview(users):
+    overview = CryptoAnalysisEngine().calculate_exchange_overview(users, PRICES)
+
+    book = TradeBook.from_users(users)
+    totals = user_totals(book, PRICES)
+    best = int(np.argmax(np.round(totals['pnl_percent'], 2)))
+    counts = {}
+    for user in users:
+        for trade in user['trades']:
+            counts[trade['coin']] = counts.get(trade['coin'], 0) + 1
+
+    assert overview['king']['username'] == users[best]['username']
+    assert overview['most_popular_coin'] == max(counts, key=counts.get).upper()
+    assert overview['total_investors'] == len(users)
+    assert overview['total_liquidity'] == pytest.approx(sum(u['wallet_balance'] for u in users), abs=0.01)
+    assert totals['trade_count'].sum() == sum(len(u['trades']) for u in users)
+
+def test_exchange_overview_empty():
+    overview = CryptoAnalysisEngine().calculate_exchange_overview([], PRICES)
+
+    assert overview['king'] is None
+    assert overview['most_popular_coin'] == "N/A"
+    assert overview['total_investors'] == 0
+
+def test_columnar_million_trades():
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    coins = np.array(['bitcoin', 'ethereum', 'solana'], dtype=object)[rng.integers(0, 3, n)]
+    amounts = rng.uniform(0.1, 1, n)
+    buy_prices = rng.uniform(100, 1000, n)
+    owners = rng.integers(0, 1000, n)
+    book = TradeBook.from_arrays(coins, amounts, buy_prices, user_ids=owners, users=list(range(1000)))
+
+    current, pnl, _ = value_trades(book, PRICES)
+    totals = user_totals(book, PRICES)
+
+    assert len(book) == n
+    assert totals['pnl'].sum() == pytest.approx(pnl.sum())
+    assert totals['trade_count'].sum() == n
+    assert coin_trade_counts(book).sum() == n
+    assert totals['current_value'][5] == pytest.approx((current * amounts)[owners == 5].sum())
+
+def test_equity_curve_as_of_join():
+    from datetime import datetime
+    timestamps = pd.date_range('2024-01-01', periods=5, freq='D', tz='UTC').as_unit('ns').asi8
+    prices = np.array([
+        [100.0, np.nan],
+        [110.0, 10.0],
+        [np.nan, 12.0],
+        [120.0, np.nan],
+        [90.0, 8.0],
+    ])
+    user = {'username': 'a', 'trades': [
+        {'coin': 'bitcoin', 'amount': 1, 'buy_price': 100, 'date': datetime(2024, 1, 2, 12)},
+        {'coin': 'ethereum', 'amount': 2, 'buy_price': 11, 'date': datetime(2024, 1, 1)},
+        {'coin': 'dogecoin', 'amount': 3, 'buy_price': 1},
+    ]}
+    curve = CryptoAnalysisEngine().calculate_equity_curve(user, timestamps, ['bitcoin', 'ethereum'], prices)
+
+    assert [p['timestamp'][:10] for p in curve] == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+    # 1. gün: ethereum fiyatı yok (maliyetten), bitcoin henüz alınmadı
+    assert curve[0]['value'] == 22 + 3
+    assert curve[1]['value'] == 2 * 10 + 3
+    # bitcoin 2. gün öğlen alındı; as-of fiyat 3. gün eksik olduğu için 110 taşınır
+    assert curve[2]['value'] == 110 + 2 * 12 + 3
+    assert curve[3]['value'] == 120 + 2 * 12 + 3
+    assert curve[4]['invested'] == 100 + 22 + 3
+    assert curve[4]['pnl'] == pytest.approx(90 + 16 + 3 - 125)
+
+def test_equity_curve_cache_invalidates_on_key():
+    from portfolio import EquityCurveCache, trades_fingerprint
+    cache = EquityCurveCache()
+    trades = [{'coin': 'bitcoin', 'amount': 1, 'buy_price': 100}]
+    key = (trades_fingerprint(trades), (3,))
+    cache.put('a', key, ['curve'])
+
+    assert cache.get('a', key) == ['curve']
+    assert cache.get('a', (trades_fingerprint(trades), (4,))) is None
+    assert cache.get('a', (trades_fingerprint(trades + trades), (3,))) is None
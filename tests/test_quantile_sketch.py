@@ -0,0 +1,90 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from quantile_sketch import KLLSketch, QuantileSketchStore
+from analysis_engine import CryptoAnalysisEngine
+
+def rank_errors(sketch, data, qs):
+    ordered = np.sort(data)
+    return [abs(np.searchsorted(ordered, sketch.quantile(q), side='right') / len(ordered) - q) for q in qs]
+
+def test_rank_error_within_bound():
+    data = np.random.default_rng(1).lognormal(size=100000)
+    sketch = KLLSketch(seed=1).update_many(data)
+
+    assert sketch.n == len(data)
+    assert max(rank_errors(sketch, data, np.linspace(0.01, 0.99, 49))) <= KLLSketch.rank_error()
+    assert sketch.quantile(0) == data.min()
+    assert sketch.quantile(1) == data.max()
+
+def test_merge_and_serialization():
+    rng = np.random.default_rng(2)
+    parts = [rng.normal(size=20000) for _ in range(4)]
+    merged = KLLSketch(seed=0)
+    for part in parts:
+        restored = KLLSketch.from_dict(KLLSketch(seed=0).update_many(part).to_dict())
+        merged.merge(restored)
+
+    data = np.concatenate(parts)
+    assert merged.n == len(data)
+    assert max(rank_errors(merged, data, [0.05, 0.25, 0.5, 0.75, 0.95])) <= KLLSketch.rank_error()
+
+def test_store_buckets_and_report_approx_mode():
+    database = mongomock.MongoClient()['test_crypto_db']
+    dates = pd.date_range('2023-01-01', periods=120, freq='D')
+    prices = 100 * np.cumprod(1 + np.random.default_rng(5).normal(0, 0.02, size=120))
+    candles = [{'timestamp': d.strftime('%Y-%m-%dT%H:%M:%SZ'), 'price': float(p)} for d, p in zip(dates, prices)]
+
+    store = QuantileSketchStore(database)
+    store.update('bitcoin', candles[:60])
+    assert store.update('bitcoin', candles) == 60
+    assert database['quantile_sketches'].count_documents({'field': 'price'}) == 4
+
+    price_sketch = store.get_sketch('bitcoin', 'price')
+    return_sketch = store.get_sketch('bitcoin', 'return')
+    assert price_sketch.n == 120
+    assert return_sketch.n == 119
+
+    df = pd.DataFrame({'timestamp': dates, 'price': prices})
+    report = CryptoAnalysisEngine().generate_scientific_report(
+        df, coin_name='Bitcoin', sketches={'price': price_sketch, 'return': return_sketch}
+    )
+    # Küçük seriler taslakta sıkıştırılmadan tutulur; sonuç tam değerlere çok yakın olmalı
+    assert report['descriptive_statistics']['median'] == pytest.approx(np.median(prices), rel=0.02)
+    assert report['approximation']['method'] == 'KLL'
+    assert store.get_sketch('ethereum') is None
+
+def test_persisted_summary_is_kept_apart_from_live_statistics():
+    database = mongomock.MongoClient()['test_crypto_db']
+    dates = pd.date_range('2023-01-01', periods=90, freq='D')
+    prices = 100 * np.cumprod(1 + np.random.default_rng(6).normal(0, 0.02, size=90))
+    candles = [{'timestamp': d.strftime('%Y-%m-%dT%H:%M:%SZ'), 'price': float(p)} for d, p in zip(dates, prices)]
+    store = QuantileSketchStore(database)
+    store.update('bitcoin', candles)
+
+    coverage = store.coverage('bitcoin', 'return')
+    assert coverage['start_bucket'] == '2023-01' and coverage['end_bucket'] == '2023-03'
+    assert coverage['items'] == 89 and coverage['last_timestamp'] == '2023-03-31T00:00:00Z'
+    assert store.coverage('ethereum') is None
+
+    summary = store.summary('bitcoin')
+    assert summary['price']['items'] == 90 and summary['price']['start_bucket'] == '2023-01'
+    assert summary['price']['median'] == store.get_sketch('bitcoin', 'price').quantile(0.5)
+    assert summary['return']['var_historic'] < 0 and summary['return']['cvar'] <= summary['return']['var_historic']
+    assert store.summary('ethereum') is None
+
+    # Canlı pencere yalnızca son 30 gün; tüm istatistikler aynı aralıktan gelir
+    df = pd.DataFrame({'timestamp': dates, 'price': prices}).iloc[-30:]
+    chunks = [df.iloc[i:i + 10] for i in range(0, len(df), 10)]
+    stats = CryptoAnalysisEngine().generate_scientific_report_chunked(chunks)['descriptive_statistics']
+    assert stats['count'] == 30
+    assert stats['min'] <= stats['q1'] <= stats['median'] <= stats['q3'] <= stats['max']
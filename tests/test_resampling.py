@@ -0,0 +1,104 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from resampling import RollupStore, resample_ohlcv, base_interval, validate_interval
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(5)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, size=200))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=200, freq='D', tz='UTC'),
+        'open': close * 0.995,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'price': close,
+        'volume': rng.uniform(100, 1000, size=200)
+    })
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()['test_crypto_db']
+
+def as_records(df):
+    out = df.copy()
+    out['timestamp'] = out['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return out.to_dict('records')
+
+def test_weekly_rollup_matches_pandas_resample(candles):
+    rollups = resample_ohlcv(candles, '1w').set_index('bucket')
+    expected = candles.set_index(candles['timestamp'].dt.tz_convert(None)).resample('W-MON', label='left', closed='left').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    )
+
+    assert (rollups.index.dayofweek == 0).all()
+    pd.testing.assert_frame_equal(rollups[['open', 'high', 'low', 'close', 'volume']], expected, check_names=False, check_freq=False)
+
+def test_interval_validation(candles):
+    assert base_interval(candles['timestamp']) == '1d'
+    validate_interval('1M', '1d')
+    with pytest.raises(ValueError):
+        validate_interval('4h', '1d')
+    with pytest.raises(ValueError):
+        validate_interval('2w', '1d')
+
+def test_incremental_update_matches_full_rebuild(database, candles):
+    store = RollupStore(database)
+    store.get_rollups('bitcoin', '3d', candles.iloc[:120])
+    # Ingestion son pencerenin kapanmış mumlarını gönderir (öncekilerle örtüşür)
+    assert store.update('bitcoin', as_records(candles.iloc[110:-1])) == 1
+    # Aynı mumların tekrar gelmesi toplamaları değiştirmez
+    store.update('bitcoin', as_records(candles.iloc[100:150]))
+
+    expected = resample_ohlcv(candles, '3d')
+    result = store.get_rollups('bitcoin', '3d', candles)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+
+def test_open_candle_is_not_persisted(database, candles):
+    store = RollupStore(database)
+    store.get_rollups('bitcoin', '1M', candles)
+    state = database['rollup_state'].find_one({'coin_id': 'bitcoin', 'interval': '1M'})
+    assert pd.Timestamp(state['last_timestamp']) == candles['timestamp'].iloc[-2].tz_convert(None)
+
+    revised = candles.copy()
+    revised.loc[revised.index[-1], ['close', 'price', 'high']] = 10_000
+    result = store.get_rollups('bitcoin', '1M', revised)
+    assert result['close'].iloc[-1] == 10_000
+    assert result['high'].iloc[-1] == 10_000
+
+def test_read_path_does_not_persist_increments(database, candles):
+    store = RollupStore(database)
+    store.get_rollups('bitcoin', '1w', candles.iloc[:120])
+    before = list(database['market_rollups'].find({}, {'_id': 0}))
+
+    result = store.get_rollups('bitcoin', '1w', candles.iloc[:150])
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), resample_ohlcv(candles.iloc[:150], '1w'), check_dtype=False)
+    assert list(database['market_rollups'].find({}, {'_id': 0})) == before
+
+def test_stale_writer_conflicts_instead_of_double_counting(database, candles):
+    store = RollupStore(database)
+    store.get_rollups('bitcoin', '1w', candles.iloc[:120])
+    stale = store._load('bitcoin', '1w')
+    stale_marks = {bucket: mark.to_pydatetime() for bucket, mark in zip(stale['bucket'], stale['last_timestamp'])}
+
+    # Başka bir yazıcı (ör. ikinci ingestion iş parçacığı) aynı mumları önce birleştirir
+    assert RollupStore(database).update('bitcoin', as_records(candles.iloc[100:-1])) == 1
+    stale.loc[stale.index[-1], 'volume'] += 1
+    assert store._save('bitcoin', '1w', stale.iloc[-1:], expected=stale_marks) == [stale['bucket'].iloc[-1]]
+    # Aynı mumların tekrar gelmesi kova filigranı sayesinde bir şey değiştirmez
+    assert store.update('bitcoin', as_records(candles.iloc[100:-1])) == 0
+
+    buckets = [doc['bucket'] for doc in database['market_rollups'].find({'interval': '1w'})]
+    assert len(buckets) == len(set(buckets))
+    result = store.get_rollups('bitcoin', '1w', candles)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), resample_ohlcv(candles, '1w'), check_dtype=False)
@@ -0,0 +1,51 @@
+import sys
+import os
+import pytest
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from response_cache import ResponseCache
+
+def test_hit_requires_matching_version():
+    cache = ResponseCache(max_bytes=1024)
+    key = ResponseCache.key('analysis', 'bitcoin', [('interval', '1d')])
+    assert cache.get(key, 1) is None
+    cache.put(key, 1, b'{"a": 1}')
+    assert cache.get(key, 1) == b'{"a": 1}'
+    # Sorgu parametrelerinin sırası anahtarı değiştirmez
+    assert ResponseCache.key('analysis', 'bitcoin', [('b', '2'), ('a', '1')]) == \
+        ResponseCache.key('analysis', 'bitcoin', [('a', '1'), ('b', '2')])
+    # Yeni veri sürümü eski girdiyi geçersiz kılar ve atar
+    assert cache.get(key, 2) is None
+    assert len(cache) == 0 and cache.bytes == 0
+
+def test_lru_eviction_by_size():
+    cache = ResponseCache(max_bytes=30)
+    keys = [ResponseCache.key('report', coin, []) for coin in ('a', 'b', 'c')]
+    cache.put(keys[0], 1, b'x' * 10)
+    cache.put(keys[1], 1, b'x' * 10)
+    cache.get(keys[0], 1)
+    cache.put(keys[2], 1, b'x' * 15)
+    # En az yakın zamanda kullanılan 'b' çıkarılır
+    assert cache.get(keys[1], 1) is None
+    assert cache.get(keys[0], 1) is not None and cache.get(keys[2], 1) is not None
+    assert cache.bytes == 25 and cache.evictions == 1
+    # Sınırdan büyük yanıt hiç saklanmaz
+    assert not cache.put(keys[1], 1, b'x' * 31)
+
+def test_metrics_per_route():
+    cache = ResponseCache()
+    key = ResponseCache.key('forecast', 'bitcoin', [])
+    cache.get(key, 1)
+    cache.put(key, 1, b'{}')
+    cache.get(key, 1)
+    cache.get(key, 1)
+    cache.get(ResponseCache.key('analysis', 'bitcoin', []), 1)
+    metrics = cache.metrics()
+    assert metrics['hits'] == 2 and metrics['misses'] == 2
+    assert metrics['hit_rate'] == pytest.approx(0.5)
+    assert metrics['routes']['forecast'] == {'hits': 2, 'misses': 1, 'hit_rate': pytest.approx(0.6667)}
+    assert metrics['routes']['analysis']['hit_rate'] == 0
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+import scenarios
+from analysis_engine import CryptoAnalysisEngine
+
+PRICES = {'bitcoin': 64000.0, 'ethereum': 3500.0, 'solana': 150.0}
+
+@pytest.fixture
+def users():
+    rng = np.random.default_rng(5)
+    coins = ['bitcoin', 'ethereum', 'solana', 'dogecoin']
+    return [
+        {'username': f'user{u}', 'trades': [
+            {'coin': coins[rng.integers(0, 4)], 'amount': float(rng.uniform(0.1, 2)),
+             'buy_price': float(rng.uniform(100, 70000))}
+            for _ in range(3)
+        ]}
+        for u in range(50)
+    ]
+
+def shocked_pnl(users, prices, shock_by_coin):
+    total = 0.0
+    for user in users:
+        for trade in user['trades']:
+            price = prices.get(trade['coin'], trade['buy_price'])
+            total += (price * (1 + shock_by_coin.get(trade['coin'], 0)) - trade['buy_price']) * trade['amount']
+    return total
+
+def test_uniform_matches_repriced_loop(users):
+    result = CryptoAnalysisEngine().calculate_scenarios(users, PRICES, steps=11)
+    coins = result['coins']
+
+    assert result['scenarios'] == 11
+    assert result['min_pnl'] == pytest.approx(shocked_pnl(users, PRICES, dict.fromkeys(coins, -0.5)), abs=0.01)
+    assert result['max_pnl'] == pytest.approx(shocked_pnl(users, PRICES, dict.fromkeys(coins, 0.5)), abs=0.01)
+    assert result['current_pnl'] == pytest.approx(shocked_pnl(users, PRICES, {}), abs=0.01)
+    assert result['worst_scenarios'][0]['scenario'] == 'all -50%'
+
+def test_per_coin_shocks_one_coin_at_a_time(users):
+    result = scenarios.run(users, PRICES, mode='per_coin', low=-0.3, high=0.3, steps=3)
+    worst = result['worst_scenarios'][0]
+    coin = worst['scenario'].split()[0]
+
+    assert result['scenarios'] == 3 * len(result['coins'])
+    assert worst['pnl'] == pytest.approx(shocked_pnl(users, PRICES, {coin: -0.3}), abs=0.01)
+
+def test_per_coin_pnl_matches_dense_shocks_and_is_capped(users):
+    coins = ['bitcoin', 'ethereum', 'solana']
+    exposure = np.array([100.0, 50.0, 10.0])
+    labels, grid = scenarios.per_coin_scenarios(coins, -0.2, 0.2, 5)
+    dense = np.zeros((15, 3))
+    dense[np.arange(15), np.repeat(np.arange(3), 5)] = np.tile(grid, 3)
+
+    assert np.allclose(scenarios.per_coin_pnl(grid, exposure), dense @ exposure)
+    assert len(labels) == 15 and labels[7] == 'ethereum +0%' and labels[14] == 'solana +20%'
+    with pytest.raises(ValueError):
+        scenarios.run(users, PRICES, mode='per_coin', steps=1001, max_scenarios=1000)
+
+def test_correlated_scenarios_follow_history():
+    rng = np.random.default_rng(0)
+    market = rng.normal(0, 0.03, size=500)
+    returns = np.column_stack([market, market + rng.normal(0, 0.005, 500), np.full(500, np.nan)])
+    _, shocks = scenarios.correlated_scenarios(returns, n_scenarios=5000, seed=1)
+
+    assert shocks.shape == (5000, 3)
+    assert np.corrcoef(shocks[:, 0], shocks[:, 1])[0, 1] > 0.9
+    assert (shocks[:, 2] == 0).all()
+    with pytest.raises(ValueError):
+        scenarios.correlated_scenarios(np.full((10, 2), np.nan))
+
+def test_thousands_of_scenarios_for_large_book():
+    rng = np.random.default_rng(1)
+    coins = [f'coin-{i}' for i in range(50)]
+    users = [{'username': f'u{u}', 'trades': [
+        {'coin': coins[c], 'amount': 1.0, 'buy_price': 10.0} for c in rng.integers(0, 50, 20)
+    ]} for u in range(5000)]
+    prices = {coin: 12.0 for coin in coins}
+
+    start = time.perf_counter()
+    result = scenarios.run(users, prices, mode='correlated', n_scenarios=10000, seed=3,
+                           returns_by_coin=lambda names: rng.normal(0, 0.02, size=(365, len(names))))
+    assert time.perf_counter() - start < 1.0
+    assert result['positions'] == 100000
+    assert result['scenarios'] == 10000
@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from screener import ScreenerStore, ScreenerTable, compute_indicators, parse_query, INDICATORS
+from candle_series import CandleSeries
+from analysis_engine import CryptoAnalysisEngine
+
+def make_series(n=90, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    ts = pd.date_range('2024-01-01', periods=n, freq='D', tz='UTC').as_unit('ns').asi8
+    return CandleSeries(ts, prices, prices, prices, prices, rng.uniform(1, 10, n))
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient().db
+
+def test_indicators_match_full_analysis():
+    series = make_series()
+    analysis = CryptoAnalysisEngine().get_full_analysis(series)
+    values = compute_indicators(series)
+    expected = dict(analysis['indicators'], **analysis['risk_metrics'])
+    for name in ('rsi', 'macd_histogram', 'sma_7', 'sma_30', 'volatility_7d', 'volatility_30d',
+                 'max_drawdown', 'sharpe_ratio'):
+        assert values[name] == pytest.approx(expected[name], rel=1e-6, abs=1e-9), name
+    assert values['price'] == pytest.approx(analysis['current_price'])
+    # Kısa geçmişte hesaplanamayan göstergeler None
+    assert compute_indicators(make_series(10))['volatility_30d'] is None
+
+def test_parse_query():
+    conditions, order_by, descending, limit = parse_query("RSI<30 and volatility_30d >= 50.5 order by sharpe_ratio asc limit 5")
+    assert conditions == [('rsi', '<', 30.0), ('volatility_30d', '>=', 50.5)]
+    assert (order_by, descending, limit) == ('sharpe_ratio', False, 5)
+    assert parse_query("order by price") == ([], 'price', True, None)
+    assert parse_query("change_24h=-1.5")[0] == [('change_24h', '==', -1.5)]
+    for bad in ("rsi", "rsi<abc", "foo>1", "rsi<30 or rsi>70", "order by foo"):
+        with pytest.raises(ValueError):
+            parse_query(bad)
+
+def test_query_matches_brute_force_filter(database):
+    rng = np.random.default_rng(1)
+    store = ScreenerStore(database)
+    coins = [f"coin{i:04d}" for i in range(1500)]
+    columns = {name: rng.normal(50, 20, len(coins)) for name in INDICATORS}
+    columns['sharpe_ratio'][::7] = np.nan
+    database['screener_indicators'].insert_many([
+        {"coin_id": coin, "seq": i + 1, "timestamp": None,
+         "indicators": {name: None if np.isnan(v[i]) else float(v[i]) for name, v in columns.items()}}
+        for i, coin in enumerate(coins)
+    ])
+    table = ScreenerTable()
+    assert table.sync(store) == 1500
+
+    conditions, order_by, descending, _ = parse_query("rsi<30 and volatility_30d>50 order by sharpe_ratio")
+    start = time.perf_counter()
+    matched, rows = table.query(conditions, order_by, descending, limit=None)
+    elapsed = time.perf_counter() - start
+
+    mask = (columns['rsi'] < 30) & (columns['volatility_30d'] > 50)
+    assert matched == mask.sum()
+    result = [row['coin'] for row in rows]
+    assert set(result) == {coins[i] for i in np.flatnonzero(mask)}
+    sharpes = [row['indicators']['sharpe_ratio'] for row in rows]
+    known = [s for s in sharpes if s is not None]
+    assert known == sorted(known, reverse=True)
+    # Değeri olmayan coinler sıralamada sona düşer
+    assert sharpes[len(known):] == [None] * (len(sharpes) - len(known))
+    assert elapsed < 0.05
+
+    not_equal = table.query([('rsi', '!=', float(columns['rsi'][0]))], limit=None)[0]
+    assert not_equal == 1499
+
+def test_sync_applies_only_new_writes(database):
+    store = ScreenerStore(database)
+    table = ScreenerTable()
+    store.update('bitcoin', make_series(seed=1))
+    store.update('ethereum', make_series(seed=2))
+    assert table.sync(store) == 2
+    assert table.sync(store) == 0
+
+    store.update('bitcoin', make_series(60, seed=3))
+    assert table.sync(store) == 1
+    _, rows = table.query([], limit=None)
+    assert [row['coin'] for row in rows] == ['bitcoin', 'ethereum']
+    assert rows[0]['indicators']['price'] == pytest.approx(make_series(60, seed=3).last_price, rel=1e-6)
+    assert store.update('empty', CandleSeries.empty_series()) is None
@@ -0,0 +1,95 @@
+import sys
+import os
+import multiprocessing
+import pytest
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from shared_panel import SharedPanelPublisher, SharedPanelReader, build_price_panel
+from candle_series import CandleSeries
+
+@pytest.fixture
+def publisher():
+    pub = SharedPanelPublisher(f"test_panel_{os.getpid()}")
+    yield pub
+    pub.close(unlink_header=True)
+
+def make_series(start, periods, base):
+    frame = pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq='D', tz='UTC'),
+        'price': base + np.arange(periods, dtype=float)
+    })
+    return CandleSeries.from_dataframe(frame)
+
+def read_panel(name, queue):
+    panel = SharedPanelReader(name).current()
+    queue.put((panel.version, panel.coins, panel.prices.sum(), panel.prices.flags.writeable))
+
+def test_build_price_panel_aligns_timestamps():
+    timestamps, coins, prices = build_price_panel({
+        'bitcoin': make_series('2024-01-01', 5, 100),
+        'solana': make_series('2024-01-03', 5, 10),
+        'empty': CandleSeries.empty_series()
+    })
+
+    assert coins == ['bitcoin', 'solana']
+    assert prices.shape == (7, 2)
+    assert np.isnan(prices[:2, 1]).all() and np.isnan(prices[5:, 0]).all()
+    assert prices[2, 1] == 10
+
+def test_reader_maps_read_only_and_swaps_on_new_version(publisher):
+    reader = SharedPanelReader(publisher.name)
+    assert reader.current() is None
+
+    publisher.publish(*build_price_panel({'bitcoin': make_series('2024-01-01', 3, 100)}))
+    first = reader.current()
+    assert first.version == 1
+    assert reader.current() is first
+    with pytest.raises(ValueError):
+        first.prices[0, 0] = 0
+
+    publisher.publish(*build_price_panel({
+        'bitcoin': make_series('2024-01-01', 4, 100),
+        'ethereum': make_series('2024-01-01', 4, 50)
+    }))
+    second = reader.current()
+    assert second.version == 2
+    assert 'ethereum' in second
+    np.testing.assert_array_equal(second.column('ethereum'), [50, 51, 52, 53])
+    # Eski segment unlink edildi ama eşlenmiş görünüm hâlâ geçerli
+    np.testing.assert_array_equal(first.column('bitcoin'), [100, 101, 102])
+
+def test_other_process_shares_panel(publisher):
+    publisher.publish(*build_price_panel({'bitcoin': make_series('2024-01-01', 10, 1)}))
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    worker = ctx.Process(target=read_panel, args=(publisher.name, queue))
+    worker.start()
+    worker.join(timeout=60)
+
+    assert queue.get(timeout=5) == (1, ['bitcoin'], 55.0, False)
+    # İşçi çıkışı segmenti silmemeli
+    assert SharedPanelReader(publisher.name).current().version == 1
+
+def test_reader_follows_restarted_publisher():
+    name = f"test_panel_restart_{os.getpid()}"
+    first = SharedPanelPublisher(name)
+    first.publish(*build_price_panel({'bitcoin': make_series('2024-01-01', 3, 100)}))
+    reader = SharedPanelReader(name)
+    assert reader.current().version == 1
+
+    # Yükleyici yeniden başlar: başlık korunur, sürüm oradan devam eder
+    first.close()
+    restarted = SharedPanelPublisher(name)
+    try:
+        assert restarted.publish(*build_price_panel({'bitcoin': make_series('2024-01-01', 5, 200)})) == 2
+        panel = reader.current()
+        assert panel.version == 2
+        np.testing.assert_array_equal(panel.column('bitcoin'), [200, 201, 202, 203, 204])
+    finally:
+        restarted.close(unlink_header=True)
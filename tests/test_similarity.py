@@ -0,0 +1,125 @@
+import sys
+import os
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from similarity import SimilarityIndex, return_window, DAY_NS
+from candle_series import CandleSeries
+
+START = np.datetime64('2024-01-01', 'ns').astype(np.int64)
+
+def daily_series(prices, offset=0, skip=()):
+    """`offset` gün kaydırılmış günlük seri; `skip` günleri eksik."""
+    prices = np.asarray(prices, dtype=np.float64)
+    days = np.arange(len(prices)) + offset
+    keep = ~np.isin(days, list(skip))
+    ts = START + days[keep] * DAY_NS
+    p = prices[keep]
+    return CandleSeries(ts, p, p, p, p, np.zeros(len(p)))
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(4)
+    market = rng.normal(0, 0.02, 120)
+    coins = {
+        'solana': market + rng.normal(0, 0.002, 120),
+        'avalanche': market + rng.normal(0, 0.005, 120),
+        'bitcoin': rng.normal(0, 0.02, 120),
+        'ethereum': -market + rng.normal(0, 0.01, 120),
+    }
+    return {coin: daily_series(100 * np.exp(np.cumsum(r))) for coin, r in coins.items()}
+
+def test_scores_are_pearson_correlations(universe):
+    index = SimilarityIndex(window=60)
+    index.refresh(dict.fromkeys(universe, 1), universe.get)
+    results = index.query('solana', k=3)
+
+    returns = {coin: np.diff(np.log(series.price[-61:])) for coin, series in universe.items()}
+    assert [coin for coin, _ in results] == ['avalanche', 'bitcoin', 'ethereum']
+    for coin, score in results:
+        assert score == pytest.approx(np.corrcoef(returns['solana'], returns[coin])[0, 1])
+    assert index.matrix.flags['C_CONTIGUOUS']
+
+def test_refresh_only_recomputes_changed_coins(universe):
+    index = SimilarityIndex(window=30)
+    loaded = []
+    load = lambda coin: loaded.append(coin) or universe[coin]
+    index.refresh(dict.fromkeys(universe, 1), load)
+    loaded.clear()
+
+    assert index.refresh(dict(dict.fromkeys(universe, 1), bitcoin=2), load) == ['bitcoin']
+    assert loaded == ['bitcoin']
+    # Veri yetersiz kalan coin indeksten çıkar, yeni coin eklenir
+    index.refresh({'bitcoin': 3, 'dogecoin': 1}, lambda coin: universe['solana'] if coin == 'dogecoin' else daily_series([1, 2], 118))
+    assert 'bitcoin' not in index and 'dogecoin' in index
+    assert index.query('dogecoin', k=1)[0] == ('solana', pytest.approx(1.0))
+
+def test_lsh_finds_near_duplicates():
+    rng = np.random.default_rng(9)
+    base = rng.normal(0, 0.02, (500, 40))
+    prices = {f'coin{i}': daily_series(100 * np.exp(np.cumsum(r))) for i, r in enumerate(base)}
+    prices['twin'] = daily_series(100 * np.exp(np.cumsum(base[7] + rng.normal(0, 0.001, 40))))
+    index = SimilarityIndex(window=39, lsh_min_coins=100)
+    index.refresh(dict.fromkeys(prices, 1), prices.get)
+
+    assert index.query('twin', k=1)[0][0] == 'coin7'
+    assert index.query('twin', k=1, use_lsh=False)[0][0] == 'coin7'
+
+def test_flat_or_short_series_are_skipped():
+    assert return_window(np.full(100, 5.0), 30) is None
+    assert return_window(np.arange(1, 10.0), 30) is None
+
+def test_windows_are_aligned_on_common_end_day(universe):
+    prices = universe['solana'].price
+    shifted = {
+        'solana': universe['solana'],
+        # Aynı fiyatlar bir gün geride biten seri: son mumu eski (stale) olduğu için dışarıda
+        'lagging': daily_series(prices, offset=-1),
+        # İç günleri eksik seri: boşluklar ileri doldurulur, tarihler hizalı kalır
+        'gappy': daily_series(prices, skip=(100, 101)),
+    }
+    index = SimilarityIndex(window=30)
+    index.refresh(dict.fromkeys(shifted, 1), shifted.get)
+
+    assert 'lagging' not in index
+    filled = prices.copy()
+    filled[[100, 101]] = filled[99]
+    expected = np.corrcoef(np.diff(np.log(prices[-31:])), np.diff(np.log(filled[-31:])))[0, 1]
+    assert index.query('solana', k=1)[0] == ('gappy', pytest.approx(expected))
+
+def test_end_day_advance_realigns_all_rows(universe):
+    index = SimilarityIndex(window=30)
+    index.refresh(dict.fromkeys(universe, 1), universe.get)
+    assert len(index) == 4
+    # Sadece bitcoin'e yeni gün eklenir; diğerleri yeni bitiş gününe göre eski kalır
+    longer = daily_series(np.append(universe['bitcoin'].price, 101.0))
+    index.refresh(dict(dict.fromkeys(universe, 1), bitcoin=2), lambda coin: longer if coin == 'bitcoin' else universe[coin])
+    assert index.coins == ['bitcoin']
+
+def test_refresh_swaps_snapshot_under_concurrent_queries(universe):
+    from concurrent.futures import ThreadPoolExecutor
+    index = SimilarityIndex(window=30)
+    index.refresh(dict.fromkeys(universe, 1), universe.get)
+    before = index._snapshot
+    longer = daily_series(np.append(universe['bitcoin'].price, 101.0))
+
+    def refresh(version):
+        index.refresh(dict(dict.fromkeys(universe, 1), bitcoin=version),
+                      lambda coin: (longer if version % 2 else universe['bitcoin']) if coin == 'bitcoin' else universe[coin])
+
+    def query(_):
+        snapshot = index._snapshot
+        assert len(snapshot.coins) == len(snapshot.matrix) == len(snapshot.row_of)
+        return index.query('bitcoin', k=3) if 'bitcoin' in snapshot.row_of else []
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(refresh, v) for v in range(2, 40)] + [pool.submit(query, i) for i in range(200)]
+        for future in futures:
+            future.result()
+    # Eski görünüm yerinde değiştirilmez
+    assert before.coins == list(universe) and before.matrix.shape == (4, 30)
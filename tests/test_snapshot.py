@@ -0,0 +1,78 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+import db.database_manager as db_module
+from db.snapshot import MarketSnapshot
+
+def candles(periods, base):
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'price': base + np.arange(periods, dtype=float)
+    })
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = mongomock.MongoClient()['test_crypto_db']
+    monkeypatch.setattr(db_module, 'db', database)
+    monkeypatch.setattr(db_module, 'market_collection', database['market_data'])
+    db_module.save_market_data('bitcoin', candles(30, 100))
+    db_module.save_market_data('ethereum', candles(20, 10))
+    yield database
+    db_module.disable_snapshot_read_through()
+
+def test_refresh_is_incremental(fake_db, tmp_path):
+    assert sorted(db_module.refresh_snapshot(['bitcoin', 'ethereum'], directory=str(tmp_path))) == ['bitcoin', 'ethereum']
+    assert db_module.refresh_snapshot(['bitcoin', 'ethereum'], directory=str(tmp_path)) == []
+
+    db_module.save_market_data('ethereum', candles(25, 10))
+    assert db_module.refresh_snapshot(['bitcoin', 'ethereum'], directory=str(tmp_path)) == ['ethereum']
+
+    snapshot = MarketSnapshot(str(tmp_path))
+    assert snapshot.entry('ethereum')['version'] == 2
+    assert snapshot.entry('ethereum')['rows'] == 25
+    # Eski sürüm dizini silinir
+    assert os.listdir(tmp_path / 'ethereum') == ['v2']
+
+def test_snapshot_is_memory_mapped(fake_db, tmp_path):
+    db_module.refresh_snapshot(['bitcoin'], directory=str(tmp_path))
+    series = MarketSnapshot(str(tmp_path)).load('bitcoin')
+
+    assert isinstance(series.close.base, np.memmap) or isinstance(series.close, np.memmap)
+    np.testing.assert_array_equal(series.price, 100 + np.arange(30))
+
+def test_read_through_serves_fresh_snapshot_only(fake_db, tmp_path):
+    db_module.refresh_snapshot(['bitcoin'], directory=str(tmp_path))
+    db_module.enable_snapshot_read_through(str(tmp_path))
+
+    # Snapshot güncelken Mongo'daki mumlar okunmaz
+    fake_db['market_data'].update_many({'coin_id': 'bitcoin'}, {'$set': {'price': 1.0}})
+    assert db_module.get_market_data('bitcoin')['price'].iloc[0] == 100
+    assert db_module.get_candle_series('bitcoin').price[-1] == 129
+
+    # Yeni kayıt sürümü artırır; snapshot bayatlar ve Mongo'ya dönülür
+    db_module.save_market_data('bitcoin', candles(5, 500))
+    assert db_module.get_market_data('bitcoin')['price'].tolist() == [500, 501, 502, 503, 504]
+    assert len(db_module.get_candle_series('ethereum')) == 20
+
+def test_arrow_format_round_trip(fake_db, tmp_path):
+    pytest.importorskip('pyarrow')
+    db_module.refresh_snapshot(['bitcoin'], directory=str(tmp_path), file_format='arrow')
+    snapshot = MarketSnapshot(str(tmp_path))
+    assert snapshot.entry('bitcoin')['format'] == 'arrow'
+    assert os.listdir(tmp_path / 'bitcoin' / 'v1') == ['candles.arrow']
+
+    series = snapshot.load('bitcoin')
+    np.testing.assert_array_equal(series.price, 100 + np.arange(30))
+    assert not series.close.flags.owndata
+    # Biçim değişince sürüm aynı olsa da coin yeniden yazılır
+    assert db_module.refresh_snapshot(['bitcoin'], directory=str(tmp_path)) == ['bitcoin']
+    assert snapshot.entry('bitcoin')['format'] == 'npy'
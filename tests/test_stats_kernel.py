@@ -0,0 +1,52 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from stats_kernel import summarize
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    values = 20000 * np.cumprod(1 + rng.normal(0, 0.02, size=500))
+    values[[10, 250]] = np.nan
+    return pd.Series(values)
+
+def test_summary_matches_pandas(series):
+    stats = summarize(series)
+
+    assert stats['count'] == series.count()
+    assert stats['mean'] == pytest.approx(series.mean())
+    assert stats['std'] == pytest.approx(series.std())
+    assert stats['var'] == pytest.approx(series.var())
+    assert stats['min'] == series.min()
+    assert stats['max'] == series.max()
+    assert stats['skewness'] == pytest.approx(series.skew())
+    assert stats['kurtosis'] == pytest.approx(series.kurtosis())
+    for q in (0.25, 0.5, 0.75):
+        assert stats['quantiles'][q] == pytest.approx(series.quantile(q))
+
+def test_small_and_constant_series():
+    assert summarize([])['count'] == 0
+    assert np.isnan(summarize([1.0, 2.0])['skewness'])
+
+    constant = summarize([5.0] * 10)
+    assert constant['std'] == 0
+    assert constant['skewness'] == 0
+    assert constant['quantiles'][0.5] == 5.0
+
+def test_descriptive_statistics_use_kernel(series):
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({'price': series})
+    result = engine.calculate_descriptive_statistics(df)
+
+    assert result['count'] == series.count()
+    assert result['iqr'] == pytest.approx(series.quantile(0.75) - series.quantile(0.25))
+    assert result['kurtosis'] == pytest.approx(series.kurtosis())
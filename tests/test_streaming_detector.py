@@ -0,0 +1,66 @@
+import sys
+import os
+import pytest
+import pandas as pd
+import numpy as np
+import mongomock
+
+current_dir = os.path.dirname(__file__)
+src_path = os.path.abspath(os.path.join(current_dir, '..', 'src'))
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from streaming_detector import IndexableSkiplist, RollingMedianMAD, StreamingAnomalyStore
+from analysis_engine import CryptoAnalysisEngine
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(3)
+    values = 100 + rng.normal(0, 1, size=200)
+    values[120] = 140.0
+    return values
+
+def test_skiplist_order_statistics():
+    skiplist = IndexableSkiplist(expected_size=50)
+    values = [5, 1, 9, 3, 3, 7]
+    for v in values:
+        skiplist.insert(v)
+    skiplist.remove(9)
+
+    assert [skiplist[i] for i in range(len(skiplist))] == [1, 3, 3, 5, 7]
+    assert skiplist.bisect_left(3) == 1
+    with pytest.raises(KeyError):
+        skiplist.remove(42)
+
+@pytest.mark.parametrize('window', [4, 5, 20])
+def test_rolling_median_mad_matches_numpy(prices, window):
+    detector = RollingMedianMAD(window=window)
+    for t, value in enumerate(prices):
+        if t >= window:
+            past = prices[t - window:t]
+            median = np.median(past)
+            assert detector.median() == pytest.approx(median)
+            assert detector.mad() == pytest.approx(np.median(np.abs(past - median)))
+        detector.update(value)
+
+def test_store_flags_spike_once(prices):
+    database = mongomock.MongoClient()['test_crypto_db']
+    timestamps = [d.strftime('%Y-%m-%dT%H:%M:%SZ') for d in pd.date_range('2023-01-01', periods=200, freq='D')]
+    candles = [{'timestamp': ts, 'price': float(p)} for ts, p in zip(timestamps, prices)]
+
+    store = StreamingAnomalyStore(database)
+    store.process('bitcoin', candles[:150])
+    store.process('bitcoin', candles)
+
+    flagged = [a['timestamp'] for a in store.recent_anomalies('bitcoin', limit=100)]
+    assert timestamps[120] in flagged
+    assert len(flagged) == len(set(flagged))
+
+def test_anomaly_summary_extra_method(prices):
+    engine = CryptoAnalysisEngine()
+    df = pd.DataFrame({'timestamp': pd.date_range('2023-01-01', periods=200, freq='D'), 'price': prices})
+
+    summary = engine.get_anomaly_summary(df, methods=['rolling_mad'])
+    assert summary['anomaly_counts']['rolling_mad'] >= 1
+    assert summary['dataframe']['is_anomaly_rolling_mad'].iloc[120]
+    assert 'rolling_mad' not in engine.get_anomaly_summary(df)['anomaly_counts']